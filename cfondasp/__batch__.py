@@ -0,0 +1,308 @@
+#
+# Copyright 2023-2025 Sebastian Sardina & Nitin Yadav
+#
+# ------------------------------
+#
+# This file is part of cfond-asp.
+#
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+"""
+Batch solver: runs the planner on many tasks (e.g., the YAML task files produced by
+experiments/benchexec/gen_tasks.py) within a budget of cores and memory.
+
+Each job is a forked copy of this process (so Python and all imports are loaded only once) running the planner
+on one task, with its own output folder, log file, time limit and memory limit. One summary row per job is
+written (CSV or JSONL) as jobs finish.
+"""
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import shlex
+import shutil
+import sys
+import time
+from dataclasses import asdict, dataclass
+from multiprocessing.connection import wait
+
+import coloredlogs
+import psutil
+import yaml
+
+from cfondasp import VERSION
+from cfondasp.__main__ import get_arg_parser, run_planner
+from cfondasp.checker.verify import _get_file_id, _get_last_output_file, _get_status
+from cfondasp.utils.system_utils import kill_process_tree
+from cfondasp.utils.translator_worker import start_translator_worker
+
+logger: logging.Logger = None
+LOGGER_LEVEL = logging.INFO
+
+# extra time (in seconds) given to a job over its time limit before it is killed
+JOB_KILL_GRACE = 30
+# status of a job killed by the batch solver (i.e., not stopped by the planner itself within its time limit)
+STATUS_KILLED = "KILLED"
+# address space limit of a job process, as a multiple of its memory limit: only a backstop for the planner process
+# itself (e.g., in-process engines), as address space counts virtual memory (thread stacks, arenas), not memory used
+JOB_ADDRESS_SPACE_FACTOR = 4
+
+
+@dataclass
+class Job:
+    name: str  # name of the job (task file name)
+    domain: str
+    problem: str
+    output_dir: str
+    planner_args: list[str]  # extra planner options (besides domain, problem and output)
+    timeout: int | None = None  # time limit (in seconds)
+    status: str = "PENDING"  # SOLVED, UNSOLVED, TIMEOUT, MEMOUT, UNKNOWN, KILLED or ERROR once finished
+    controller_size: int | None = None  # number of controller states (if solved)
+    time: float | None = None  # wall time taken (in seconds)
+    exit_code: int | None = None
+
+
+def get_jobs(task_paths: list[str], output_dir: str, planner_args: list[str], timeout: int | None) -> list[Job]:
+    """
+    Builds the jobs from YAML task files, with the format below (paths relative to the task file):
+
+        input_files:
+        - ../benchmarks/acrobatics/domain.pddl
+        - ../benchmarks/acrobatics/p01.pddl
+        options:
+            output: acrobatics/p01      # output folder of the job (relative to the batch output folder)
+            kb: acrobatics              # optional, domain knowledge to use (--domain-kb)
+            timeout: 600                # optional, overrides the batch time limit
+
+    :param task_paths: task files, or folders with task files (*.yml, *.yaml)
+    :param output_dir: batch output folder
+    :param planner_args: extra planner options for all jobs
+    :param timeout: time limit of each job (in seconds), unless the task sets its own
+    :return: list of jobs, in order
+    """
+    task_files = []
+    for path in task_paths:
+        if os.path.isdir(path):
+            task_files += sorted(
+                os.path.join(path, f) for f in os.listdir(path) if f.endswith((".yml", ".yaml"))
+            )
+        else:
+            task_files.append(path)
+
+    jobs = []
+    for task_file in task_files:
+        with open(task_file) as f:
+            task = yaml.safe_load(f)
+        task_dir = os.path.dirname(os.path.abspath(task_file))
+        domain, problem = [os.path.normpath(os.path.join(task_dir, f)) for f in task["input_files"]]
+        options = task.get("options") or {}
+        name = os.path.splitext(os.path.basename(task_file))[0]
+
+        job_args = list(planner_args)
+        if options.get("kb") is not None:
+            job_args += ["--domain-kb", str(options["kb"])]
+        jobs.append(
+            Job(
+                name=name,
+                domain=domain,
+                problem=problem,
+                output_dir=os.path.join(output_dir, str(options.get("output", name))),
+                planner_args=job_args,
+                timeout=options.get("timeout", timeout),
+            )
+        )
+    return jobs
+
+
+def run_jobs(jobs: list[Job], cores: int, job_cores: int, memory: int, job_memory: int, summary_file: str, log_dir: str):
+    """
+    Runs the jobs, as many at once as the cores and memory budgets allow, and writes their summary rows
+    :param jobs: jobs to run
+    :param cores: number of cores available
+    :param job_cores: number of cores used by each job
+    :param memory: memory available (in MB)
+    :param job_memory: memory limit of each job (in MB)
+    :param summary_file: CSV (.csv) or JSONL (any other extension) file for the summary
+    :param log_dir: folder for the log of each job
+    """
+    max_running = max(1, min(cores // job_cores, memory // job_memory))
+    logger.info(f"Running {len(jobs)} jobs, {max_running} at a time ({job_cores} cores and {job_memory} MB each)")
+
+    context = multiprocessing.get_context("fork")
+    pending = list(jobs)
+    running = {}  # sentinel -> (process, job, start time)
+    with open(summary_file, "w", newline="") as summary:
+        writer = None
+        if summary_file.endswith(".csv"):
+            writer = csv.DictWriter(summary, fieldnames=list(asdict(jobs[0]).keys()) if jobs else [])
+            writer.writeheader()
+
+        while pending or running:
+            while pending and len(running) < max_running:
+                job = pending.pop(0)
+                log_file = os.path.join(log_dir, f"{job.name}.log")
+                process = context.Process(target=_run_job, args=(job, job_memory, log_file), name=job.name)
+                process.start()
+                running[process.sentinel] = (process, job, time.time())
+                logger.info(f"Started job {job.name} ({len(jobs) - len(pending)}/{len(jobs)})")
+
+            # block until a job ends or the next job deadline (no polling)
+            deadlines = [
+                start + job.timeout + JOB_KILL_GRACE
+                for _, job, start in running.values()
+                if job.timeout is not None
+            ]
+            wait(running.keys(), timeout=max(0, min(deadlines) - time.time()) if deadlines else None)
+
+            for sentinel, (process, job, start) in list(running.items()):
+                killed = False
+                if process.is_alive():
+                    if job.timeout is None or time.time() < start + job.timeout + JOB_KILL_GRACE:
+                        continue
+                    kill_process_tree(process.pid)
+                    killed = True
+                process.join()
+                del running[sentinel]
+
+                _set_job_result(job, process.exitcode, time.time() - start, killed)
+                logger.info(f"Finished job {job.name}: {job.status} ({job.time:.2f}s)")
+                if writer is not None:
+                    writer.writerow(asdict(job))
+                else:
+                    summary.write(json.dumps(asdict(job)) + "\n")
+                summary.flush()
+
+
+def _run_job(job: Job, job_memory: int, log_file: str):
+    """
+    Runs the planner on a job (in a forked process), with its output going to the job log file
+    :param job: job to run
+    :param job_memory: memory limit (in MB) of the translator and clingo processes of the job (--memory-limit of the
+        planner, unless given in the planner options), so that going over it gives a MEMOUT status
+    :param log_file: log file of the job
+    """
+    log = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+    os.dup2(log, sys.stdout.fileno())
+    os.dup2(log, sys.stderr.fileno())
+    limit = job_memory * JOB_ADDRESS_SPACE_FACTOR * 1024**2
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    cli_args = [job.domain, job.problem, "--output", job.output_dir] + job.planner_args
+    if not any(arg.split("=")[0] == "--memory-limit" for arg in job.planner_args):
+        cli_args += ["--memory-limit", str(job_memory)]
+    if job.timeout is not None:
+        cli_args += ["--timeout", str(job.timeout)]
+    run_planner(get_arg_parser().parse_args(cli_args))
+
+
+def _set_job_result(job: Job, exit_code: int, time_taken: float, killed: bool):
+    """
+    Fills the result of a finished job from its exit code and the clingo output files in its output folder
+    :param job: job finished
+    :param exit_code: exit code of the job process
+    :param time_taken: wall time taken by the job (in seconds)
+    :param killed: whether the job was killed for going over its time limit
+    """
+    job.exit_code = exit_code
+    job.time = time_taken
+    last_output_file = _get_last_output_file(job.output_dir) if os.path.isdir(job.output_dir) else None
+    if killed:
+        job.status = STATUS_KILLED
+    elif exit_code != 0:
+        job.status = "ERROR"
+    elif os.path.exists(os.path.join(job.output_dir, "unsat.out")):
+        job.status = "UNSOLVED"  # backbone found the problem has no solution
+    elif last_output_file is None:
+        job.status = "UNKNOWN"
+    else:
+        job.status = _get_status(os.path.join(job.output_dir, last_output_file))
+        if job.status == "SOLVED":
+            job.controller_size = _get_file_id(last_output_file) + 1
+
+
+def main():
+    """Main function to run the batch solver. Entry point of the program."""
+    global logger
+    logger = logging.getLogger(__name__)
+    coloredlogs.install(level=LOGGER_LEVEL, logger=logger)
+
+    # CLI options
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description=f"CFOND-ASP Batch: runs the FOND planner on many tasks at once - Version: {VERSION}"
+    )
+    parser.add_argument("tasks", nargs="+", help="YAML task files, or folders with task files.")
+    parser.add_argument(
+        "--output",
+        help="location of batch output folder, one subfolder per job (Default: %(default)s).",
+        type=str,
+        default="./output-batch",
+    )
+    parser.add_argument(
+        "--timeout",
+        help="Timeout for each job (in seconds), unless set in its task file.",
+        type=int,
+    )
+    parser.add_argument(
+        "--cores",
+        help="Number of cores to use for all jobs (Default: %(default)s).",
+        type=int,
+        default=os.cpu_count(),
+    )
+    parser.add_argument(
+        "--job-cores",
+        help="Number of cores used by each job, e.g., with --parallel-sizes (Default: %(default)s).",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--memory",
+        help="Memory to use for all jobs, in MB (Default: %(default)s).",
+        type=int,
+        default=psutil.virtual_memory().total // 1024**2,
+    )
+    parser.add_argument(
+        "--job-memory",
+        help="Memory limit of each job (--memory-limit of its translator and clingo processes), in MB (Default: %(default)s).",
+        type=int,
+        default=4096,
+    )
+    parser.add_argument(
+        "--planner-args",
+        help="Options to pass to the planner for all jobs (e.g., \"--model strong --use-backbone\").",
+        type=str,
+        default="",
+    )
+    parser.add_argument(
+        "--summary",
+        help="Summary file: CSV if it ends in .csv, JSONL otherwise (Default: OUTPUT/summary.csv).",
+        type=str,
+        default=None,
+    )
+    args = parser.parse_args()
+    args.output = os.path.abspath(args.output)
+    if args.summary is None:
+        args.summary = os.path.join(args.output, "summary.csv")
+
+    log_dir = os.path.join(args.output, "logs")
+    os.makedirs(log_dir, exist_ok=True)
+
+    jobs = get_jobs(args.tasks, args.output, shlex.split(args.planner_args), args.timeout)
+
+    # a single translator worker for all jobs (forked from this process, so they find it started)
+    planner_args = get_arg_parser().parse_args(["domain", "problem"] + shlex.split(args.planner_args))
+    translator_path = shutil.which(planner_args.translator_path)
+    if planner_args.translator_worker and translator_path is not None:
+        start_translator_worker(os.path.abspath(translator_path))
+    run_jobs(jobs, args.cores, args.job_cores, args.memory, args.job_memory, args.summary, log_dir)
+
+    statuses = [job.status for job in jobs]
+    logger.info(", ".join(f"{s}: {statuses.count(s)}" for s in sorted(set(statuses))))
+    logger.info(f"Summary saved in {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
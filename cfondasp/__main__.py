@@ -9,17 +9,21 @@ from timeit import default_timer as timer
 
 from cfondasp import VERSION
 from cfondasp.base.config import (
+    CACHE_SIZE,
     CLINGO_BIN,
     DEFAULT_MODEL,
     FD_INV_LIMIT,
     FILE_CONTROLLER_WEAK,
     FILE_INSTANCE,
+    PORTFOLIO_MODELS,
     PYTHON_MINOR_VERSION,
+    SIMPLIFY,
     TRANSLATOR_BIN,
 )
 from cfondasp.checker.verify import build_controller
 from .base.elements import FONDProblem
 from .utils.system_utils import get_pkg_root
+from .utils.metrics import reset_metrics, save_metrics, timed
 from .solver.asp import solve, parse_and_translate, solve
 
 logger: logging.Logger = None
@@ -47,30 +51,41 @@ def get_fond_problem(args) -> FONDProblem:
         problem=args.problem,
         # main ASP files
         controller_model=os.path.join(
-            get_pkg_root(), "asp", f"controller-{args.model}.lp"
+            get_pkg_root(), "asp", f"controller-{args.model if args.model != 'portfolio' else DEFAULT_MODEL}.lp"
         ),
         classical_planner=os.path.join(get_pkg_root(), "asp", FILE_CONTROLLER_WEAK),
         instance_file=os.path.join(args.output_dir, FILE_INSTANCE),
         # systems properties
         clingo=CLINGO_BIN,
         clingo_args=clingo_args,
+        engine=args.engine,
         sas_translator=os.path.abspath(args.translator_path),
         translator_args=translator_args,
+        translator_worker=args.translator_worker,
         output_dir=args.output_dir,
+        cache_dir=os.path.abspath(args.cache_dir) if args.cache_dir is not None else None,
+        cache_size=args.cache_size,
         # solving contraints
         max_states=args.max_states,
         min_states=args.min_states,
         inc_states=args.inc_states,
+        parallel_sizes=args.parallel_sizes,
+        size_search=args.size_search,
         time_limit=args.timeout,
+        memory_limit=args.memory_limit,
+        instance_in_memory=args.instance_in_memory,
         # additional optimizations
         backbone=args.use_backbone,
         filter_undo=args.filter_undo,
+        symmetry_breaking=args.symmetry_breaking,
         controller_constraints=(
             {"extra": os.path.abspath(args.extra_constraints)}
             if args.extra_constraints is not None
             else dict({})
         ),
         domain_knowledge=args.domain_kb,
+        portfolio=args.portfolio_models.split(",") if args.model == "portfolio" else None,
+        simplify=[name for name in args.simplify.split(",") if name not in ["", "none"]],
     )
 
     if args.filter_undo:
@@ -81,13 +96,11 @@ def get_fond_problem(args) -> FONDProblem:
     return fond_problem
 
 
-def main():
-    """Main function to run the planner. Entry point of the program."""
-    # set logger
-    logger = logging.getLogger(__name__)
-    coloredlogs.install(level=LOGGER_LEVEL, logger=logger)
-
-    # CLI options
+def get_arg_parser() -> argparse.ArgumentParser:
+    """
+    Returns the CLI options parser of the planner (also used to build the arguments of batch jobs)
+    :return: the argument parser
+    """
     parser: argparse.ArgumentParser = argparse.ArgumentParser(
         description=f"CFOND-ASP: A FOND planner for compact controllers via ASP. - Version: {VERSION}"
     )
@@ -111,18 +124,47 @@ def main():
         type=int,
         default=1,
     )
+    parser.add_argument(
+        "--size-search",
+        help="Strategy to choose the controller sizes to try (Default: %(default)s).",
+        choices=["linear", "galloping", "adaptive", "optimize"],
+        default="linear",
+    )
+    parser.add_argument(
+        "--parallel-sizes",
+        help="Number of controller sizes to solve in parallel, each in its own Clingo process (Default: %(default)s).",
+        type=int,
+        default=1,
+    )
     parser.add_argument(
         "--timeout", help="Timeout for solving the problem (in seconds).", type=int
     )
+    parser.add_argument(
+        "--memory-limit",
+        help="Memory limit for each Clingo and translator process, with its children (in MB). Processes going over it are killed and the run stops (MEMOUT). Not applied to Clingo with the in-process engines (multishot, ground-once).",
+        type=int,
+    )
     parser.add_argument(
         "--model",
         help="ASP model to use for FOND (Default: %(default)s)",
-        choices=["fondsat", "regression", "strong"],
+        choices=["fondsat", "regression", "strong", "portfolio"],
         default=DEFAULT_MODEL,
     )
+    parser.add_argument(
+        "--portfolio-models",
+        help="Comma-separated ASP models raced by --model portfolio; the first to find a controller wins (Default: %(default)s).",
+        type=str,
+        default=PORTFOLIO_MODELS,
+    )
     parser.add_argument(
         "--clingo-args", help="Arguments to pass to Clingo.", type=str, default=""
     )
+    parser.add_argument(
+        "--engine",
+        help="How Clingo is run for the controller sizes: one process per size, one in-process multi-shot solver, or one in-process grounding probed with assumptions, for 8 controller states at first and doubled as needed up to --max-states (Default: %(default)s).",
+        choices=["subprocess", "multishot", "ground-once"],
+        default="subprocess",
+    )
     parser.add_argument(
         "--extra-constraints",
         help="Additional asp constraints (as input file to Clingo)",
@@ -134,11 +176,22 @@ def main():
         help="Filter undo actions from policy consideration.",
         action="store_true",
     )
+    parser.add_argument(
+        "--symmetry-breaking",
+        help="Break symmetries between interchangeable objects with lex-leader constraints on the policy (not with --extra-constraints, --domain-kb or --backbone-mode strict).",
+        action="store_true",
+    )
     parser.add_argument(
         "--use-backbone",
         help="Use backbone size for minimum controller size estimation.",
         action="store_true",
     )
+    parser.add_argument(
+        "--backbone-mode",
+        help="How the backbone is used with --use-backbone: only its size as minimum controller size, also as a strict constraint on the controller, or also as Clingo heuristics guiding the search (Default: %(default)s).",
+        choices=["size", "strict", "heuristic"],
+        default="size",
+    )
     parser.add_argument(
         "--domain-kb",
         help="Add pre-defined domain knowledge (Default: %(default)s).",
@@ -156,13 +209,59 @@ def main():
         type=str,
         default="./output",
     )
+    parser.add_argument(
+        "--cache-dir",
+        help="Folder to cache translation results and grounded programs across runs (Default: %(default)s, no cache and no separate grounding).",
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        "--cache-size",
+        help="Maximum size of the cache in MB, least recently used entries are evicted (Default: %(default)s).",
+        type=int,
+        default=CACHE_SIZE,
+    )
+    parser.add_argument(
+        "--simplify",
+        help="Comma-separated simplifications of the SAS model before encoding it, or none: static folds variables no action changes into the initial state, reachability drops actions and variable values not reachable from the initial state ignoring deletes, relevance drops actions and variables the goal does not depend on (Default: %(default)s).",
+        type=str,
+        default=SIMPLIFY,
+    )
+    parser.add_argument(
+        "--instance-in-memory",
+        help="In-process engines (multishot, ground-once) take the ASP instance as clingo symbols, instance.lp is only written if needed.",
+        action="store_true",
+    )
     parser.add_argument(
         "--translator-path",
         help="SAS translator binary to use (Default: %(default)s).",
         default=TRANSLATOR_BIN,
         type=str,
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--translator-worker",
+        help="Run the SAS translator in a persistent worker process with the translator already loaded, instead of a new Python process per problem (e.g., for the jobs of a batch).",
+        action="store_true",
+    )
+    return parser
+
+
+def main():
+    """Main function to run the planner. Entry point of the program."""
+    args = get_arg_parser().parse_args()
+    run_planner(args)
+
+
+def run_planner(args: argparse.Namespace) -> float:
+    """
+    Runs the planner on a problem
+    :param args: planner options (see get_arg_parser)
+    :return: total time taken (in seconds)
+    """
+    # set logger
+    logger = logging.getLogger(__name__)
+    coloredlogs.install(level=LOGGER_LEVEL, logger=logger)
+
     args.domain = os.path.abspath(args.domain)
     args.problem = os.path.abspath(args.problem)
     args.clingo_args = args.clingo_args.replace("'", "").replace('"', "")
@@ -203,15 +302,22 @@ def main():
 
     # 2. All good to go. Next, build a whole FONDProblem object with all the info needed
     start = timer()
+    reset_metrics()
     fond_problem: FONDProblem = get_fond_problem(args)
 
     # 3. Solve the problem
-    solve(fond_problem, back_bone=args.use_backbone, only_size=True)
+    solve(
+        fond_problem,
+        back_bone=args.use_backbone,
+        only_size=args.backbone_mode == "size",
+        heuristic=args.backbone_mode == "heuristic",
+    )
 
     # 4. If requested, dump the controller
     if args.dump_cntrl:
         logger.info("Dumping controller (if problem has been solved!)...")
-        build_controller(fond_problem.output_dir)
+        with timed("controller_dump"):
+            build_controller(fond_problem.output_dir)
 
     # 5. Done! Wrap up and summary info
     end = timer()
@@ -221,6 +327,9 @@ def main():
 
     with open(os.path.join(fond_problem.output_dir, "time_taken.out"), "w+") as f:
         f.write(f"Total time: {total_time}\n")
+    save_metrics(fond_problem.output_dir, total_time)
+
+    return total_time
 
 
 # run all code (marcos' funny comment)
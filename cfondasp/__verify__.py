@@ -40,6 +40,11 @@ def main():
         type=str,
         default="./output",
     )
+    parser.add_argument(
+        "--strong",
+        action="store_true",
+        help="Check the controller is a strong (acyclic) solution, not only a strong cyclic one.",
+    )
 
     args = parser.parse_args()
     args.output_dir = os.path.abspath(args.output_dir)
@@ -62,7 +67,7 @@ def main():
     start = timer()
 
     # 3. Run the requested mode
-    verify(args.output_dir)
+    verify(args.output_dir, strong=args.strong)
 
     # 4. Done! Wrap up and summary info
     end = timer()
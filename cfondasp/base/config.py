@@ -30,16 +30,28 @@ FILE_INSTANCE = "instance.lp"   # asp encoding for finding strong/strong-cyclic
 FILE_INSTANCE_WEAK = "instance_weak.lp" # asp encoding for finding weak plans
 FILE_WEAK_PLAN_OUT = "weak_plan.out"    # file to drop Clingo output for weak plan solving
 FILE_BACKBONE = "backbone.lp"  # file to drop Clingo output for weak plan solving
+FILE_SYMMETRY = "symmetry.lp"  # lex-leader constraints breaking object symmetries
 FILE_UNDO_ACTIONS = "undo_actions.out"
+FILE_CLINGO_STATS = "clingo_stats.jsonl"  # clingo --stats of each controller size tried
+FILE_METRICS = "metrics.json"  # time taken by each phase of a run
+FILE_PORTFOLIO = "portfolio.out"  # models raced and winner of a portfolio run
+FILE_GROUND_PROGRAM = "ground.aspif"  # grounded program (clingo intermediate format) kept in the cache
 
 
 CLINGO_BIN = "clingo"
 DETERMINISER_BIN = "fond-utils" # not really used anymore, used via library API
 TRANSLATOR_BIN = "translate.py"
 
+CACHE_SIZE = 1024  # maximum size of the cache shared by runs (in MB), least recently used entries evicted
+MEMORY_POLL_INTERVAL = 0.2  # time (in seconds) between samples of the memory used by clingo/translator processes
+
 DEFAULT_MODEL = "fondsat"  # strong-cyclic fondsat-type encoding
+PORTFOLIO_MODELS = "fondsat,regression,strong"  # models raced by --model portfolio
+SIMPLIFY = "none"  # simplifications of the SAS model run by default (--simplify), opt-in as they change the instance
 FD_INV_LIMIT = 300
 
 PYTHON_MINOR_VERSION = 10   # minimum python version required
 
 FILE_CONTROLLER_WEAK = "controller-weak.lp"
+FILE_CONTROLLER_OPTIMIZE = "controller-optimize.lp"  # minimizes the number of controller states (--size-search optimize)
+OPTIMIZE_STRATEGY = "usc"  # clingo --opt-strategy to minimize the number of controller states (unless given)
@@ -1,9 +1,12 @@
 import os
+import sys
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import List
 
-from cfondasp.base.config import CLINGO_BIN, TRANSLATOR_BIN
+from cfondasp.base.config import CACHE_SIZE, CLINGO_BIN, TRANSLATOR_BIN
 
 
 @dataclass(slots=True)
@@ -25,6 +28,16 @@ class Variable(object):
     domain: List[str]
 
 
+@lru_cache
+def field_high_bits(num_fields: int) -> int:
+    """
+    Returns an int with the top bit of each of the 16-bit fields of packed values set (see State.packed)
+    :param num_fields: number of fields (variables)
+    :return: 0x8000 repeated in each field
+    """
+    return int.from_bytes(b"\x80\x00" * num_fields, "big")
+
+
 @dataclass(slots=True, frozen=True)
 class State(object):
     """
@@ -36,22 +49,76 @@ class State(object):
     The domain has 11 variables [var0,...,var10].
     A possible partial state is when var2 has value Atom on(b1, b2) and rest of the variables' values are unknown.
     This state will have values [-1,...,2,...,-1] where 2 occurs at the position of var6.domain.
+
+    Values are kept in a compact array of 16-bit integers (lists given are converted). For the logic operators, the
+    values are also packed in an int, one 16-bit field per variable, so that they work on all variables at once with
+    int operations (see packed). The packing is computed once, the first time the state is compared, hashed or used
+    by a logic operator: values must not be changed after that (change the values of a copy instead, see __copy__).
     """
     variables: List[Variable]
-    values: List[int]
+    values: array
+    _packed: tuple = field(default=None, compare=False, repr=False)
+
+    def __post_init__(self):
+        if not isinstance(self.values, array):
+            object.__setattr__(self, "values", array("h", self.values))
+
+    @classmethod
+    def from_packed(cls, variables: List[Variable], bits: int, defined: int):
+        """
+        Builds a state from its packed values (see packed)
+        :param variables: variables of the state
+        :param bits: values packed, one 16-bit field per variable
+        :param defined: mask of the fields of the variables defined
+        :return: the state
+        """
+        values = array("h")
+        values.frombytes(bits.to_bytes(2 * len(variables), sys.byteorder))
+        # set the fields directly, the values need no conversion (this is on the path of every operator)
+        state = object.__new__(cls)
+        object.__setattr__(state, "variables", variables)
+        object.__setattr__(state, "values", values)
+        object.__setattr__(state, "_packed", (bits, defined))
+        return state
+
+    @classmethod
+    def from_facts(cls, variables: List[Variable], facts: List[tuple[int, int]]):
+        """
+        Builds a partial state from the values of its defined variables
+        :param variables: variables of the state
+        :param facts: (variable index, value) of the variables defined
+        :return: the state, with the other variables undefined (-1)
+        """
+        values = array("h", [-1]) * len(variables)
+        for var_idx, val in facts:
+            values[var_idx] = val
+        return cls(variables=variables, values=values)
+
+    def packed(self) -> tuple[int, int]:
+        """
+        Returns the values packed in an int, one 16-bit field per variable (in machine order, -1 being all ones), and
+        the mask with all ones in the fields of the variables defined (the top bit of a field is only set for -1)
+        :return: packed values and mask of defined variables
+        """
+        if self._packed is None:
+            bits = int.from_bytes(self.values.tobytes(), sys.byteorder)
+            defined = ((~bits & field_high_bits(len(self.values))) >> 15) * 0xFFFF
+            object.__setattr__(self, "_packed", (bits, defined))
+        return self._packed
 
     def is_partial(self) -> bool:
         return -1 in self.values
 
     def __eq__(self, state) -> bool:
-        return self.values == state.values
+        # packed values alone do not tell the number of variables (e.g., [0] and [0, 0])
+        return len(self.values) == len(state.values) and self.packed()[0] == state.packed()[0]
 
     def __copy__(self):
         state = State(variables=self.variables, values=self.values[:])
         return state
 
     def __hash__(self):
-        return hash(tuple(self.values))
+        return hash((len(self.values), self.packed()[0]))
 
     def __str__(self):
         """
@@ -114,8 +181,12 @@ class Action(object):
     name: put-on-block_DETDUP_1
     prefix_name: put-on-block
     arguments: [b1, b4]
-    preconditions: A partial state with values [-1, -1, -1, 0, -1, -1, 0, -1, ..., -1]
-    effects: [s1] where s1 is a partial state with values [0, -1, -1, -1, -1, 0, 6, -1, ..., -1]
+    preconditions: [(3, 0), (6, 0)]
+    effects: [[(0, 0), (5, 0), (6, 6)]]
+
+    Preconditions and effects are sparse: only the (variable index, value) pairs of the variables they define, sorted
+    by variable (actions mention a handful of the variables). The logic operators get them as partial states (see
+    precondition_state and effect_state), built when first needed.
 
     Note: The preconditions from effects are lifted to the preconditions for the action (see, e.g., effect 3 above).
     TODO: Add support for conditional effects.
@@ -123,11 +194,13 @@ class Action(object):
     name: str
     prefix_name: str
     arguments: List[str]
-    precondition: State
-    effects: List[State]
-    add = []
-    delete = []
+    variables: List[Variable]
+    precondition: List[tuple[int, int]]
+    effects: List[List[tuple[int, int]]]
+    add = []  # (variable index, value) pairs added, see generate_strips
+    delete = []  # (variable index, value) pairs deleted, see generate_strips
     cost: int = 1
+    _states: dict = field(default_factory=dict, compare=False, repr=False)
 
     def __hash__(self):
         return hash(f"{self.prefix_name}({','.join(self.arguments)})")
@@ -141,15 +214,30 @@ class Action(object):
     def __str_prefix__(self):
         return f"{self.prefix_name}({','.join(self.arguments)})"
 
+    def precondition_state(self) -> State:
+        """
+        Returns the precondition as a partial state (built once)
+        :return: partial state with the variables of the precondition defined
+        """
+        if "precondition" not in self._states:
+            self._states["precondition"] = State.from_facts(self.variables, self.precondition)
+        return self._states["precondition"]
+
+    def effect_state(self, effect_idx: int) -> State:
+        """
+        Returns an effect as a partial state (built once)
+        :param effect_idx: index of the effect
+        :return: partial state with the variables of the effect defined
+        """
+        if effect_idx not in self._states:
+            self._states[effect_idx] = State.from_facts(self.variables, self.effects[effect_idx])
+        return self._states[effect_idx]
+
     def strips_repr(self):
         action_name: str = self.__str__()
-        prec: str = self.precondition.str__prop()
-        add_list: [] = [f"(var{idx}={self.add[idx]})" for idx in range(len(self.add)) if self.add[idx] != -1]
-        del_list = []
-        for i in range(len(self.precondition.variables)):
-            dels = self.delete[i]
-            if len(dels) > 0:
-                del_list += [f"(var{i}={j})" for j in dels]
+        prec: str = ",".join(f"(var{idx}={val})" for idx, val in self.precondition)
+        add_list: [] = [f"(var{idx}={val})" for idx, val in self.add]
+        del_list = [f"(var{idx}={val})" for idx, val in self.delete]
         return f"name:{action_name}\nprec:{prec}\nadd:{add_list}\ndel:{del_list}"
 
     def __repr__(self):
@@ -162,26 +250,24 @@ class Action(object):
         """
         This assumes that the action is deterministic.
         The add list is directly generated from the effect.
-        Delete list is a list of values for each variable.
+        Delete list is a list of (variable index, value) pairs, for each variable of the effect:
          - If a variable is in the effect and precondition, then that value is added to the delete list.
          - If a variable is in the effect and not in precondition, then all other values are added to the delete list.
         :return: None
         """
         assert len(self.effects) == 1, "The action should have a single effect."
 
-        effect: State = self.effects[0]
-        self.add = effect.values  # add list is same as the effect
-
-        self.delete = [[]] * len(effect.variables)
-        for var_idx in range(len(effect.variables)):
-            var: Variable = effect.variables[var_idx]
-            val: int = effect.values[var_idx]
+        effect: List[tuple[int, int]] = self.effects[0]
+        self.add = effect  # add list is same as the effect
 
-            if val != -1 and self.precondition.variable_defined(var_idx):  # If a variable is in the effect and precondition, then that value is added to the delete list.
-                self.delete[var_idx] = [self.precondition.values[var_idx]]
-            elif val != -1 and not self.precondition.variable_defined(var_idx):  # If a variable is in the effect and not in precondition, then all other values are added to the delete list.
-                other_values = [i for i in range(len(var.domain)) if i != val]
-                self.delete[var_idx] = other_values
+        precondition = dict(self.precondition)
+        self.delete = []
+        for var_idx, val in effect:
+            if var_idx in precondition:  # If a variable is in the effect and precondition, then that value is added to the delete list.
+                self.delete.append((var_idx, precondition[var_idx]))
+            else:  # If a variable is in the effect and not in precondition, then all other values are added to the delete list.
+                var: Variable = self.variables[var_idx]
+                self.delete += [(var_idx, i) for i in range(len(var.domain)) if i != val]
 
 
 @dataclass(slots=True)
@@ -209,19 +295,31 @@ class FONDProblem(object):
     # systems properties
     clingo: str = CLINGO_BIN
     clingo_args: List[str] = ""
+    engine: str = "subprocess"  # subprocess (one clingo call per size), multishot or ground-once (clingo API)
     sas_translator: str = TRANSLATOR_BIN
     translator_args: str = ""
+    translator_worker: bool = False  # run the translator in a persistent worker process (see translator_worker.py)
     output_dir: str = "output"
+    cache_dir: str = None  # folder of the cache shared by runs (None: no cache)
+    cache_size: int = CACHE_SIZE  # maximum size of the cache (in MB)
     # solving contraints
     max_states: int = 1
     min_states: int = 1
     inc_states: int = 1
+    parallel_sizes: int = 1  # number of controller sizes solved at once
+    size_search: str = "linear"  # strategy to choose the controller sizes to try (linear, galloping, adaptive, optimize)
     time_limit: int = 300
+    memory_limit: int = None  # memory limit of each clingo/translator process tree (in MB), None: no limit
     # additional optimizations
     backbone : bool = False,
     filter_undo: bool = False
+    symmetry_breaking: bool = False  # break object symmetries with lex-leader constraints on the policy
     # domain to include control knowledge (e.g., tireworld)
     domain_knowledge: str = None
     # dict of extra ASP files (extra constraints to use)
     controller_constraints: dict[str: str] = None
     seq_kb: str = None # use for weak plans (sequential knowledge base)
+    instance_in_memory: bool = False  # in-process engines take the instance as clingo symbols (no instance_file)
+    instance_facts: tuple = None  # instance as clingo symbols and rules (see get_instance_facts), None: in instance_file
+    portfolio: List[str] = None  # controller models to race (e.g., fondsat, regression, strong), None: no portfolio
+    simplify: List[str] = None  # simplifications of the SAS model before encoding it (see simplify.py), None: none
@@ -1,5 +1,12 @@
-from copy import copy
-from cfondasp.base.elements import State
+"""
+Logic operators on (partial) states, as defined below for each operator.
+
+They work on the packed values of the states (see State.packed): each variable is a 16-bit field of an int, so an
+operator is a few int operations over all variables at once (e.g., entails is a masked comparison) instead of a loop
+over the variables, and the states built keep their packed values for the next operators. Action preconditions
+and effects are sparse (see Action): they are packed once, from the variables they define only.
+"""
+from cfondasp.base.elements import State, field_high_bits
 from cfondasp.base.elements import Action
 
 
@@ -14,17 +21,11 @@ def entails(state_1: State, state_2: State) -> bool:
     where vars(s) denotes the variables that are defined in state s (i.e., they are not -1).
     """
 
-    # get the indices of variables that are defined in state_2
-    defined_vars_idxs = [i for i, v in enumerate(state_2.values) if v >= 0]
+    bits_1, _ = state_1.packed()
+    bits_2, defined_2 = state_2.packed()
 
-    # check if state_1 agrees with state_2 on all these variables
-    _entails = True
-    for i in defined_vars_idxs:
-        if state_1.values[i] != state_2.values[i]:
-            _entails = False
-            return _entails
-
-    return _entails
+    # state_1 agrees with state_2 on the variables defined in state_2 (-1 in state_1 never agrees)
+    return bits_1 & defined_2 == bits_2 & defined_2
 
 
 def consistent(state_1: State, state_2: State) -> bool:
@@ -36,13 +37,11 @@ def consistent(state_1: State, state_2: State) -> bool:
 
     state_1 is consistent with state_2 (and vice versa) if ∀v∈V, state_1(v) = state_2(v) OR state_1(v) = -1 OR state_2(v) = -1.
     """
-    _consistent = True
-    for i, v in enumerate(state_1.values):
-        if not (v == state_2.values[i] or v == -1 or state_2.values[i] == -1):
-            _consistent = False
-            return _consistent
+    bits_1, defined_1 = state_1.packed()
+    bits_2, defined_2 = state_2.packed()
 
-    return _consistent
+    # no variable defined in both states with different values
+    return (bits_1 ^ bits_2) & defined_1 & defined_2 == 0
 
 
 def update(state_1: State, state_2: State) -> State:
@@ -55,14 +54,10 @@ def update(state_1: State, state_2: State) -> State:
     The updated state obtained by applying state state_2 to state state_1 is the state state_3, where
     if v is defined in state_2 (i.e., v is not -1) then state_3(v) = state_2(v), else state_3(v) = state_1(v).
     """
-    state_3 = copy(state_1)
-
-    # get the indices of variables that are defined in state_2
-    defined_vars_idxs = [i for i, v in enumerate(state_2.values) if v >= 0]
-    for i in defined_vars_idxs:
-        state_3.values[i] = state_2.values[i]
+    bits_1, defined_1 = state_1.packed()
+    bits_2, defined_2 = state_2.packed()
 
-    return state_3
+    return State.from_packed(state_1.variables, bits_1 & ~defined_2 | bits_2 & defined_2, defined_1 | defined_2)
 
 
 def progress(state: State, action: Action, effect_idx: int) -> State | None:
@@ -77,9 +72,14 @@ def progress(state: State, action: Action, effect_idx: int) -> State | None:
     state_2 = state_1 ⊕ A.precondition ⊕ A.effects[i] if state_1 ≈ A.precondition, state_2 is None (i.e., undefined) otherwise.
     """
 
-    if consistent(state, action.precondition):
-        effect = action.effects[effect_idx]
-        return update(update(state, action.precondition), effect)
+    precondition = action.precondition_state()
+    if consistent(state, precondition):
+        # both updates at once
+        bits, defined = state.packed()
+        bits_prec, defined_prec = precondition.packed()
+        bits_effect, defined_effect = action.effect_state(effect_idx).packed()
+        bits = (bits & ~defined_prec | bits_prec & defined_prec) & ~defined_effect | bits_effect & defined_effect
+        return State.from_packed(state.variables, bits, defined | defined_prec | defined_effect)
     else:
         return None
 
@@ -99,20 +99,25 @@ def regress(state: State, action: Action, effect_idx: int) -> State | None:
     - 3. state_2(v) = state_1(v) otherwise
     """
 
-    if consistent(state, action.effects[effect_idx]):
-        state_2 = copy(state)
+    effect = action.effect_state(effect_idx)
+    if consistent(state, effect):
+        bits, defined = state.packed()
+        bits_prec, defined_prec = action.precondition_state().packed()
+        bits_effect, _ = effect.packed()
 
-        # 1. state_2(v) = A.precondition(v) of v is defined in A.precondition
-        defined_vars_idxs = [i for i, v in enumerate(action.precondition.values) if v >= 0]
-        for i in defined_vars_idxs:
-            state_2.values[i] = action.precondition.values[i]
+        # fields where state_1 and the effect have the same value (including both -1): a field of the xor is not zero
+        # if its low 15 bits are not zero (adding 0x7FFF carries into the top bit) or its top bit is set
+        high = field_high_bits(len(state.values))
+        low = high - (high >> 15)  # 0x7FFF in each field
+        diff = bits ^ bits_effect
+        not_zero = ((diff & low) + low | diff) & high
+        same = ((~not_zero & high) >> 15) * 0xFFFF
 
+        # 1. state_2(v) = A.precondition(v) of v is defined in A.precondition
         # 2. state_2(v) = -1 if v is undefined in A.precondition and state_1(v) = A.effects(v)
-        undefined_vars_idxs = [i for i, v in enumerate(action.precondition.values) if v < 0]
-        for i in undefined_vars_idxs:
-            if action.effects[effect_idx].values[i] == state.values[i]:
-                state_2.values[i] = -1
-
-        return state_2
+        # 3. state_2(v) = state_1(v) otherwise
+        kept = ~defined_prec & ~same
+        bits_2 = bits_prec & defined_prec | same & ~defined_prec | bits & kept
+        return State.from_packed(state.variables, bits_2, defined_prec | defined & kept)
     else:
         return None
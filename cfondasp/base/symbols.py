@@ -0,0 +1,78 @@
+"""
+Integer ids of the (non-deterministic) actions and their effects.
+
+Actions are identified by their ASP name (e.g., pick-up(b1,b2), the keys given by organize_actions) and effects by
+their label (e.g., e2, the effect of the second deterministic action of a non-deterministic action), as strings in the
+ASP files and clingo output. Once read, the controller and its verification work with dense integer ids instead:
+action ids are the positions of the actions in organize_actions, and effect ids the positions of the deterministic
+actions (0 for e1). Names are only produced for files and display.
+
+The ids stop at the controller (see Controller): the ASP instance writer and the clingo output parser
+(asp_output.py) keep the names, as the ASP encodings (e.g., undo, backbone, symmetry and domain knowledge
+constraints) refer to actions by their quoted names, and controller.out is meant to be read. Effect labels are
+written and read with effect_name and effect_id only.
+
+Variable values need no table: they are (variable index, value index) integers everywhere already.
+"""
+from functools import lru_cache
+from typing import List
+
+from cfondasp.base.config import ASP_EFFECT_TERM
+from cfondasp.base.elements import Action
+
+
+@lru_cache
+def effect_name(effect_id: int) -> str:
+    """
+    Returns the label of an effect in the ASP files
+    :param effect_id: position of the effect (of its deterministic action) in the non-deterministic action
+    :return: effect label (e.g., e1 for 0)
+    """
+    return f"{ASP_EFFECT_TERM}{effect_id + 1}"
+
+
+def effect_id(name: str) -> int:
+    """
+    Returns the id of an effect from its label in the ASP files
+    :param name: effect label (e.g., e1)
+    :return: position of the effect (e.g., 0 for e1)
+    """
+    return int(name[len(ASP_EFFECT_TERM):]) - 1
+
+
+class SymbolTable(object):
+    """
+    Dense integer ids of the non-deterministic actions of a SAS model, in the order given by organize_actions
+    """
+
+    def __init__(self, nd_actions: dict[str, List[Action]]):
+        """
+        :param nd_actions: Dictionary mapping a non-deterministic action name to its deterministic actions
+        """
+        self._names: List[str] = list(nd_actions)
+        self._ids: dict[str, int] = {name: i for i, name in enumerate(self._names)}
+        self._actions: List[List[Action]] = list(nd_actions.values())
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def action_id(self, name: str) -> int:
+        """
+        :param name: ASP name of a non-deterministic action (e.g., pick-up(b1,b2))
+        :return: id of the action
+        """
+        return self._ids[name]
+
+    def action_name(self, action_id: int) -> str:
+        """
+        :param action_id: id of a non-deterministic action
+        :return: ASP name of the action
+        """
+        return self._names[action_id]
+
+    def det_actions(self, action_id: int) -> List[Action]:
+        """
+        :param action_id: id of a non-deterministic action
+        :return: its deterministic actions, one per effect (in effect id order)
+        """
+        return self._actions[action_id]
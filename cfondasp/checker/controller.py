@@ -6,6 +6,7 @@ import copy
 
 from cfondasp.base.config import ASP_OUT_LINE_END, ASP_OUT_DIVIDER
 from cfondasp.base.elements import State
+from cfondasp.base.symbols import SymbolTable, effect_id
 
 re_tx = r"(?P<from>[\d]+)--(?P<action>[a-z-A-Z\d_,\(\)]+),(?P<effect>e[\d]+)-->(?P<to>[\d]+)"
 re_pl = r"(?P<from>[\d]+)-->(?P<action>[a-z-A-Z-_\d,\(\)]+)"
@@ -15,10 +16,12 @@ class Controller(object):
     """
     A controller represents the solution for a Fond problem.
     The underlying structure is a graph whose nodes map to states of the controller and the edges represent the transitions.
+    Actions and effects are read by name and kept as their integer ids (see SymbolTable).
     """
-    def __init__(self, solution: str, state: State):
+    def __init__(self, solution: str, state: State, symbols: SymbolTable):
         self._states = {}
         self._state = state
+        self._symbols = symbols
         self._initial_state_num = None
         self._goal_state_num = None
         self._transitions = {}
@@ -37,14 +40,14 @@ class Controller(object):
     def goal_state(self) -> (int, State):
         return self._goal_state_num, self._states[self._goal_state_num]
 
-    def policy(self, node_num: int) -> str:
+    def policy(self, node_num: int) -> int:
         action = self._policy[node_num]
         return action
 
     def state(self, node_num: int) -> State:
         return self._states[node_num]
 
-    def transitions(self, node_num: int, action: str):
+    def transitions(self, node_num: int, action: int):
         _transitions = []
         for (_from, _to), txs in self._transitions.items():
             if node_num == _from:
@@ -106,7 +109,7 @@ class Controller(object):
         element = element[len("policy:"):]
         result = re.match(re_pl, element)
         from_state = int(result.group("from"))
-        action = result.group("action")
+        action = self._symbols.action_id(result.group("action"))
         self._policy[from_state] = action
 
     def _extract_transition(self, element):
@@ -118,8 +121,8 @@ class Controller(object):
         element = element[len("transition:"):]
         result = re.match(re_tx, element)
         from_state = int(result.group("from"))
-        action = result.group("action")
-        effect = result.group("effect")
+        action = self._symbols.action_id(result.group("action"))
+        effect = effect_id(result.group("effect"))
         to_state = int(result.group("to"))
         if (from_state, to_state) not in self._transitions:
             self._transitions[(from_state, to_state)] = []
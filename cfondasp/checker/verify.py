@@ -7,16 +7,16 @@ import queue
 import sys
 import coloredlogs
 import re
+from collections import deque
 import networkit as nk
 
 from cfondasp.base.config import (
     ASP_CLINGO_OUTPUT_PREFIX,
     ASP_OUT_LINE_END,
-    DETERMINISTIC_ACTION_SUFFIX,
-    ASP_EFFECT_TERM,
 )
 from cfondasp.base.elements import State, FONDProblem, Variable, Action
 from cfondasp.base.logic_operators import entails, progress
+from cfondasp.base.symbols import SymbolTable, effect_name
 from cfondasp.checker.controller import Controller
 from cfondasp.utils.asp_output import parse_clingo_output
 from cfondasp.utils.helper_sas import organize_actions
@@ -31,18 +31,18 @@ VERIFY_OUT = "verify.out"
 
 
 class SolutionSpace(object):
-    def __init__(self, controller_node, domain_state, nd_actions, controller):
+    def __init__(self, controller_node, domain_state, symbols: SymbolTable, controller):
         self._initial_controller_node = controller_node
         self._initial_planning_state = domain_state
         self._controller = controller
-        self._nd_actions = nd_actions
+        self._symbols = symbols
         self._controller_nodes = {}
         self._nodes_planning_states = {}
         self._planning_states_nodes = {}
         self._graph = nk.Graph(directed=True)
         self._initialise()
 
-    def progress(self, controller_node, nd_action, transitions):
+    def progress(self, controller_node, nd_action: int, transitions):
         # get the corresponding internal graph node
         node = self._controller_nodes[controller_node]
 
@@ -51,11 +51,9 @@ class SolutionSpace(object):
 
         new_nodes = []
 
-        # apply the action to planning state
-        actions = self._nd_actions[nd_action]
-        for action in actions:
-            effect = self.get_effect(action)
-
+        # apply the action to planning state (the effect id is the position of the deterministic action)
+        actions = self._symbols.det_actions(nd_action)
+        for effect, action in enumerate(actions):
             next_planning_state = progress(planning_state, action, 0)
             next_controller_node = self.get_next_controller_node(transitions, effect)
             next_controller_state = self._controller.state(next_controller_node)
@@ -74,16 +72,59 @@ class SolutionSpace(object):
 
         return new_nodes
 
-    def is_strong_cyclic(self, goal_node):
-        dg = nk.distance.APSP(self._graph)
-        max_nodes = self._graph.numberOfNodes()
-        dg.run()
-        target_node = self._controller_nodes[goal_node]
-        for node in self._graph.iterNodes():
-            distance_to_goal = dg.getDistance(node, target_node)
-            if distance_to_goal > max_nodes:
-                return False
-        return True
+    def nodes_not_reaching_goal(self, goal_node) -> list[int]:
+        """
+        Finds the controller nodes reached by the controller from which the goal node cannot be reached, with one
+        backward BFS from the goal (linear in the size of the solution space)
+        :param goal_node: goal node of the controller
+        :return: controller nodes that cannot reach the goal node, sorted
+        """
+        reaching = set()
+        if goal_node in self._controller_nodes:
+            target_node = self._controller_nodes[goal_node]
+            reaching.add(target_node)
+            open_nodes = deque([target_node])
+            while open_nodes:
+                node = open_nodes.popleft()
+                for previous_node in self._graph.iterInNeighbors(node):
+                    if previous_node not in reaching:
+                        reaching.add(previous_node)
+                        open_nodes.append(previous_node)
+
+        return sorted(c for c, node in self._controller_nodes.items() if node not in reaching)
+
+    def is_strong_cyclic(self, goal_node) -> bool:
+        """
+        :param goal_node: goal node of the controller
+        :return: whether the goal node can be reached from every node reached by the controller
+        """
+        return not self.nodes_not_reaching_goal(goal_node)
+
+    def is_acyclic(self) -> bool:
+        """
+        Checks the solution space has no cycles (including self-loops) by removing nodes without incoming edges
+        until none is left (Kahn's algorithm, linear in the size of the solution space)
+        :return: whether the solution space is acyclic
+        """
+        in_degree = {node: self._graph.degreeIn(node) for node in self._graph.iterNodes()}
+        open_nodes = deque(node for node, degree in in_degree.items() if degree == 0)
+        num_removed = 0
+        while open_nodes:
+            node = open_nodes.popleft()
+            num_removed += 1
+            for next_node in self._graph.iterNeighbors(node):
+                in_degree[next_node] -= 1
+                if in_degree[next_node] == 0:
+                    open_nodes.append(next_node)
+        return num_removed == self._graph.numberOfNodes()
+
+    def is_strong(self, goal_node) -> bool:
+        """
+        :param goal_node: goal node of the controller
+        :return: whether the controller is strong cyclic and acyclic, i.e., it reaches the goal in a bounded number
+        of steps whatever the effects of the actions
+        """
+        return self.is_strong_cyclic(goal_node) and self.is_acyclic()
 
     def _initialise(self):
         initial_node = self._graph.addNode()
@@ -91,16 +132,6 @@ class SolutionSpace(object):
         self._nodes_planning_states[initial_node] = self._initial_planning_state
         self._planning_states_nodes[self._initial_planning_state] = initial_node
 
-    @staticmethod
-    def get_effect(action):
-        if DETERMINISTIC_ACTION_SUFFIX.lower() not in action.name.lower():
-            return f"{ASP_EFFECT_TERM}1"
-        else:
-            effect_num = (
-                int(action.name.lower().split(DETERMINISTIC_ACTION_SUFFIX.lower())[1])
-            )
-            return f"{ASP_EFFECT_TERM}{effect_num}"
-
     @staticmethod
     def get_next_controller_node(transitions, effect):
         for _from, _to, _action, _effect in transitions:
@@ -118,11 +149,11 @@ class SolutionSpace(object):
     #     return action_name
 
 
-def execute_controller(controller: Controller, planning_state: State, nd_actions: dict):
+def execute_controller(controller: Controller, planning_state: State, symbols: SymbolTable):
     initial_node, initial_state = controller.initial_state()
     goal_node, goal_state = controller.goal_state()
     assert entails(planning_state, initial_state)
-    solution_space = SolutionSpace(initial_node, planning_state, nd_actions, controller)
+    solution_space = SolutionSpace(initial_node, planning_state, symbols, controller)
 
     open_nodes = queue.Queue()
     open_nodes.put(initial_node)
@@ -161,6 +192,7 @@ def add_variable_info(variables: list[Variable], solution_file: str):
 
 def save_controller(
     controller: Controller,
+    symbols: SymbolTable,
     state_variables: dict,
     variables: list[Variable],
     controller_file: str,
@@ -195,7 +227,7 @@ def save_controller(
         )
 
     for e, j in controller.graph().iterEdges():
-        action = controller.edge_action(e, j)
+        action = [(symbols.action_name(a), effect_name(i)) for a, i in controller.edge_action(e, j)]
         data["edges"].append({"source": str(e), "target": str(j), "label": action})
 
     with open(controller_file, "w+") as f:
@@ -209,7 +241,7 @@ def build_controller(output_dir: str):
         output_dir (str): output of a solver run
 
     Returns:
-        tuple: controller, initial state, and ND actions
+        tuple: controller, initial state, and symbol table of the ND actions
     """
     _logger = _get_logger()
     sas_file: str = os.path.join(output_dir, SAS_FILE)
@@ -229,6 +261,11 @@ def build_controller(output_dir: str):
             f"Solution timed out, cannot build controller: {last_clingo_out_file}"
         )
         return None, None, None
+    elif status == "MEMOUT":
+        _logger.warning(
+            f"Solution ran out of memory, cannot build controller: {last_clingo_out_file}"
+        )
+        return None, None, None
     elif status == "UNSOLVED":
         _logger.warning(f"Solution NOT found: {last_clingo_out_file}")
         return None, None, None
@@ -242,6 +279,7 @@ def build_controller(output_dir: str):
     # extract data from SAS file
     initial_state, goal_state, actions, variables, mutexs = parse_sas(sas_file)
     det_actions, nd_actions = organize_actions(actions)
+    symbols = SymbolTable(nd_actions)
 
     # add variable info to the solution controller file
     add_variable_info(variables, solution_file)
@@ -250,22 +288,30 @@ def build_controller(output_dir: str):
     for i in range(len(sample_state.values)):
         sample_state.values[i] = -1
 
-    controller: Controller = Controller(solution_file, sample_state)
+    controller: Controller = Controller(solution_file, sample_state, symbols)
 
     # save the graph into a controller JSON file
-    save_controller(controller, state_variables, variables, controller_file)
+    save_controller(controller, symbols, state_variables, variables, controller_file)
 
-    return controller, initial_state, nd_actions
+    return controller, initial_state, symbols
 
 
 def _get_last_output_file(output_dir) -> str | None:
+    """
+    Returns the clingo output file deciding the result of a run: the one of the smallest size solved, if any (a size
+    search may stop, e.g., on a time limit, after probing sizes above and below it), otherwise the one of the largest
+    size tried
+    :param output_dir: output of a solver run
+    :return: name of the clingo output file, None if there is none
+    """
     files = os.listdir(output_dir)
-    clingo_output_files = [f for f in files if ASP_CLINGO_OUTPUT_PREFIX in f]
-    ids = [_get_file_id(f) for f in clingo_output_files]
-    if not ids:
+    clingo_output_files = sorted((f for f in files if ASP_CLINGO_OUTPUT_PREFIX in f), key=_get_file_id)
+    if not clingo_output_files:
         return None
-    last_id = ids.index(max(ids))
-    return clingo_output_files[last_id]
+    for f in clingo_output_files:
+        if _get_status(os.path.join(output_dir, f)) == "SOLVED":
+            return f
+    return clingo_output_files[-1]
 
 
 def _get_file_id(f: str) -> int:
@@ -281,13 +327,21 @@ def _get_status(output_file: str) -> bool:
     for line in info:
         if "timed out" in line.lower():
             return "TIMEOUT"
+        elif "exceeded memory limit" in line.lower():
+            return "MEMOUT"
         elif "UNSATISFIABLE" in line:
             return "UNSOLVED"
-        elif "SATISFIABLE" in line: # has to come after UNSAT eh! ;-)
+        elif "SATISFIABLE" in line or "OPTIMUM FOUND" in line: # has to come after UNSAT eh! ;-)
             return "SOLVED"
     return "UNKNOWN"
 
-def verify(output_dir: str):
+def verify(output_dir: str, strong: bool = False):
+    """
+    Verifies the controller of a solution already computed is strong cyclic (or strong)
+    :param output_dir: output of a solver run
+    :param strong: also check the controller is acyclic (a strong solution)
+    :return: whether the controller is sound, None if the problem was not solved
+    """
     _logger = _get_logger()
     last_output_file = _get_last_output_file(output_dir)
     if last_output_file is None:
@@ -300,11 +354,18 @@ def verify(output_dir: str):
     logging.debug(f"Status of run found: {status}")
     if status == "SOLVED":
         # build controller from ASP model and SAS file (write controller to txt and json files)
-        controller, initial_state, nd_actions = build_controller(output_dir)
+        controller, initial_state, symbols = build_controller(output_dir)
         goal_node, _ = controller.goal_state()
 
-        solution_space = execute_controller(controller, initial_state, nd_actions)
-        sound = solution_space.is_strong_cyclic(goal_node)
+        solution_space = execute_controller(controller, initial_state, symbols)
+        dead_ends = solution_space.nodes_not_reaching_goal(goal_node)
+        if dead_ends:
+            _logger.warning(f"Controller nodes that cannot reach the goal: {', '.join(map(str, dead_ends))}")
+        sound = not dead_ends
+        if strong and sound:
+            sound = solution_space.is_acyclic()
+            if not sound:
+                _logger.warning("Controller has cycles, so it is not a strong solution")
         _logger.info(f"Solution is sound? {sound}")
 
         return sound
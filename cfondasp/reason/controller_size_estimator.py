@@ -239,13 +239,9 @@ def get_action_name(action_label: str):
 
 
 def add_action_prec(controller_state: ControllerState, action: Action):
-    variables = action.precondition.variables
-
-    for var_idx, var in enumerate(variables):
-        val = action.precondition.values[var_idx]
-        if val != -1:
-            # assert controller_state.values[var_idx][val] == 0
-            controller_state.values[var_idx][val] = 1
+    for var_idx, val in action.precondition:
+        # assert controller_state.values[var_idx][val] == 0
+        controller_state.values[var_idx][val] = 1
 
     return controller_state
 
@@ -268,11 +264,8 @@ def apply_action_effect(previous_state: ControllerState, action: Action):
     #             if var_values[i] != -1:
     #                 var_values[i] = 0
 
-    for var_idx in range(len(action.delete)):
-        vals = action.delete[var_idx]
-        if len(vals) > 0:
-            for v in vals:
-                vars_values[var_idx][v] = -1
+    for var_idx, v in action.delete:
+        vars_values[var_idx][v] = -1
 
     next_state: ControllerState = ControllerState(previous_state.variables, vars_values)
     return next_state
@@ -0,0 +1,259 @@
+"""
+Object symmetries of the grounded (SAS) problem, broken with lex-leader constraints on the controller policy.
+
+Two objects are interchangeable if swapping their names everywhere maps the encoded problem onto itself: every
+variable value to a variable value, the initial state and goal to themselves, every mutex group to a mutex group, and
+every action to an action with the same (renamed) precondition and effects, in the same order. Swapping the objects
+in a controller (policy actions and state values) then gives another controller of the same size, so one of them
+can be ruled out.
+
+For a swap σ, the policy is read as the sequence of actions done in states 0, 1, 2, ... and the controller must not
+be bigger than its swapped version, in the order the actions are encoded (lex-leader): at the first state whose
+action is changed by σ, the action must come before its swapped one. As all swaps are compared with the same order,
+the smallest controller among all the swapped versions of a controller meets all the constraints.
+
+Objects appearing in a precondition or effect of an action without being one of its arguments (i.e., domain
+constants) are never considered interchangeable.
+"""
+import logging
+import re
+from collections import defaultdict
+from typing import List
+
+import coloredlogs
+
+from cfondasp.base.elements import State, Variable
+from cfondasp.utils.helper_sas import get_action_key
+
+LOG_LEVEL = "INFO"
+
+# value of a SAS variable: Atom on(b1, b2), NegatedAtom on(b1, b2) (or <none of those>, not matched)
+re_atom = r"(?P<kind>Atom|NegatedAtom) (?P<predicate>[^(]*)\((?P<arguments>.*)\)"
+
+
+class ObjectSymmetries(object):
+    def __init__(self, initial_state: State, goal_state: State, nd_actions, variables: List[Variable], mutexs: List[State], domains: dict[int, List[int]] = None):
+        """
+        Indexes the encoded problem by object, so that checking a swap only looks at the values and actions
+        mentioning the objects swapped
+        :param initial_state: Initial state
+        :param goal_state: Goal state
+        :param nd_actions: Dictionary mapping a non-deterministic action name to its deterministic actions
+        :param variables: Variables
+        :param mutexs: Mutually exclusive variable values (encoded as a state)
+        :param domains: variable index -> values encoded (see simplify.py), None: all variables and values
+        """
+        if domains is None:
+            domains = {var_idx: list(range(len(var.domain))) for var_idx, var in enumerate(variables)}
+        self._initial = {var_idx: initial_state.values[var_idx] for var_idx in domains}
+        self._goal = {var_idx: goal_state.values[var_idx] for var_idx in domains if goal_state.values[var_idx] != -1}
+        self._nd_actions = nd_actions
+
+        # values: (kind, predicate, arguments) -> (variable, value), and the values mentioning each object
+        self._values = {}
+        self._atoms = {}  # (variable, value) -> (kind, predicate, arguments), None for <none of those>
+        self._object_variables = defaultdict(set)
+        for var_idx, values in domains.items():
+            for val in values:
+                match = re.match(re_atom, variables[var_idx].domain[val])
+                if match is None:
+                    self._atoms[(var_idx, val)] = None
+                    continue
+                arguments = tuple(a.strip() for a in match.group("arguments").split(",") if a.strip())
+                atom = (match.group("kind"), match.group("predicate"), arguments)
+                self._atoms[(var_idx, val)] = atom
+                self._values[atom] = (var_idx, val)
+                for obj in arguments:
+                    self._object_variables[obj].add(var_idx)
+        self._domains = domains
+
+        # mutex groups as sets of values (as encoded, see write_mutex)
+        self._mutexs = set()
+        for state in mutexs:
+            group = frozenset(
+                (var_idx, val)
+                for var_idx, val in enumerate(state.values)
+                if val != -1 and var_idx in domains and val in domains[var_idx]
+            )
+            if len(group) > 1:
+                self._mutexs.add(group)
+
+        # actions: precondition and effects as sets of values, and the actions with each object as argument
+        self._actions = {}
+        self._object_actions = defaultdict(list)
+        self.constants = set()
+        for name, det_actions in nd_actions.items():
+            precondition = self._encoded(det_actions[0].precondition)
+            effects = [
+                (action.name, self._encoded(action.add), self._encoded(action.delete))
+                for action in det_actions
+            ]
+            self._actions[name] = (precondition, effects)
+            arguments = set(det_actions[0].arguments)
+            for obj in arguments:
+                self._object_actions[obj].append(name)
+            values = precondition.union(*[add | delete for _, add, delete in effects])
+            for value in values:
+                if self._atoms[value] is not None:
+                    self.constants.update(set(self._atoms[value][2]).difference(arguments))
+
+    def _encoded(self, values) -> frozenset:
+        return frozenset(
+            (var_idx, val)
+            for var_idx, val in values
+            if val != -1 and var_idx in self._domains and val in self._domains[var_idx]
+        )
+
+    def get_objects(self) -> List[str]:
+        """
+        Returns the objects that may be interchangeable: arguments of some action that are not domain constants
+        :return: list of objects, sorted
+        """
+        return sorted(set(self._object_actions).difference(self.constants))
+
+    def swap(self, obj1: str, obj2: str) -> dict[str, str] | None:
+        """
+        Checks whether swapping two objects maps the encoded problem onto itself
+        :param obj1: an object
+        :param obj2: another object
+        :return: mapping of each action changed by the swap to its swapped action, or None if it is not a symmetry
+        """
+        renaming = {obj1: obj2, obj2: obj1}
+
+        # values of the variables mentioning the objects; a variable maps to a single variable
+        value_map = {}
+        for var_idx in self._object_variables[obj1] | self._object_variables[obj2]:
+            image_var, none_vals = None, []
+            for val in self._domains[var_idx]:
+                atom = self._atoms[(var_idx, val)]
+                if atom is None:
+                    none_vals.append(val)
+                    continue
+                image = self._values.get((atom[0], atom[1], tuple(renaming.get(a, a) for a in atom[2])))
+                if image is None or image_var not in [None, image[0]]:
+                    return None
+                image_var = image[0]
+                value_map[(var_idx, val)] = image
+            image_none = [val for val in self._domains[image_var] if self._atoms[(image_var, val)] is None]
+            if len(none_vals) != len(image_none):
+                return None
+            for val, image_val in zip(none_vals, image_none):
+                value_map[(var_idx, val)] = (image_var, image_val)
+
+        def rename_values(values: frozenset) -> frozenset:
+            return frozenset(value_map.get(value, value) for value in values)
+
+        # initial state and goal are kept, and mutex groups mapped to mutex groups
+        for (var_idx, val), (image_var, image_val) in value_map.items():
+            if (self._initial[var_idx] == val) != (self._initial[image_var] == image_val):
+                return None
+            if (self._goal.get(var_idx) == val) != (self._goal.get(image_var) == image_val):
+                return None
+        for group in self._mutexs:
+            if not group.isdisjoint(value_map) and rename_values(group) not in self._mutexs:
+                return None
+
+        # actions with the objects as arguments map to actions with the same precondition and effects (in order);
+        # sorted, so that the mapping (and the constraints written from it) does not depend on the hash seed
+        action_map = {}
+        for name in sorted(set(self._object_actions[obj1] + self._object_actions[obj2])):
+            first_action = self._nd_actions[name][0]
+            image_name = get_action_key(first_action.prefix_name, [renaming.get(a, a) for a in first_action.arguments])
+            if image_name not in self._actions:
+                return None
+            precondition, effects = self._actions[name]
+            image_precondition, image_effects = self._actions[image_name]
+            if rename_values(precondition) != image_precondition or len(effects) != len(image_effects):
+                return None
+            for (det_name, add, delete), (image_det_name, image_add, image_delete) in zip(effects, image_effects):
+                if det_name != image_det_name or rename_values(add) != image_add or rename_values(delete) != image_delete:
+                    return None
+            if image_name != name:
+                action_map[name] = image_name
+        return action_map
+
+
+def get_symmetries(symmetries: ObjectSymmetries) -> list[tuple[List[str], list[dict[str, str]]]]:
+    """
+    Finds the classes of interchangeable objects. Each object is only checked against one object of each class
+    found so far, since swaps within a class are symmetries if the swaps with one of its objects are.
+    :param symmetries: indexed problem
+    :return: list of classes of interchangeable objects (2 or more), each with the action mappings of the swaps of
+        its first object with each of the others
+    """
+    classes = []  # (objects, action mappings)
+    for obj in symmetries.get_objects():
+        for objects, action_maps in classes:
+            action_map = symmetries.swap(objects[0], obj)
+            if action_map is not None:
+                objects.append(obj)
+                action_maps.append(action_map)
+                break
+        else:
+            classes.append(([obj], []))
+    return [(objects, action_maps) for objects, action_maps in classes if len(objects) > 1]
+
+
+def create_symmetry_constraints(
+    initial_state: State,
+    goal_state: State,
+    nd_actions,
+    variables: List[Variable],
+    mutexs: List[State],
+    file: str,
+    domains: dict[int, List[int]] = None,
+) -> int:
+    """
+    Writes the lex-leader constraints breaking the object symmetries of the problem (see module doc)
+    :param initial_state: Initial state
+    :param goal_state: Goal state
+    :param nd_actions: Dictionary mapping a non-deterministic action name to its deterministic actions (as encoded)
+    :param variables: Variables
+    :param mutexs: Mutually exclusive variable values (encoded as a state)
+    :param file: file to write the constraints to
+    :param domains: variable index -> values encoded (see simplify.py), None: all variables and values
+    :return: number of symmetries (swaps) broken
+    """
+    _logger: logging.Logger = _get_logger()
+    classes = get_symmetries(ObjectSymmetries(initial_state, goal_state, nd_actions, variables, mutexs, domains))
+    for objects, _ in classes:
+        _logger.info(f"Interchangeable objects: {', '.join(objects)}")
+
+    # order of the actions in the instance (their names are the ASP ones, see organize_actions)
+    order = {name: i for i, name in enumerate(nd_actions)}
+
+    lines = [
+        "% Lex-leader constraints for object symmetries: policy actions up to the first state whose action changes\n",
+        "% by a swap of objects must not come after their swapped actions in the instance order.\n",
+    ]
+    num_symmetries = 0
+    for objects, action_maps in classes:
+        for obj, action_map in zip(objects[1:], action_maps):
+            num_symmetries += 1
+            lines.append(f"\n% swap {objects[0]} <-> {obj}\n")
+            lines.append(f"symmetry({num_symmetries}).\n")
+            for name, image_name in action_map.items():
+                lines.append(f'symMoved({num_symmetries}, "{name}").\n')
+                if order[image_name] < order[name]:
+                    lines.append(f'symGreater({num_symmetries}, "{name}").\n')
+
+    lines += [
+        "\n",
+        "symEqual(Sym, 0) :- symmetry(Sym).\n",
+        "symEqual(Sym, S+1) :- symEqual(Sym, S), state(S+1), policy(S, A), not symMoved(Sym, A).\n",
+        "symEqual(Sym, S+1) :- symEqual(Sym, S), state(S+1), goalState(S).\n",
+        ":- symEqual(Sym, S), policy(S, A), symGreater(Sym, A).\n",
+        "\n",
+        "#defined symmetry/1.\n",
+        "#defined symMoved/2.\n",
+        "#defined symGreater/2.\n",
+    ]
+    with open(file, "w") as f:
+        f.writelines(lines)
+    return num_symmetries
+
+
+def _get_logger() -> logging.Logger:
+    logger = logging.getLogger(__name__)
+    coloredlogs.install(level=LOG_LEVEL, logger=logger)
+    return logger
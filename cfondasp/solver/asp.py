@@ -1,30 +1,44 @@
 import asyncio
+from importlib.metadata import version
+import math
+import re
 from pathlib import Path
 import shutil
 import subprocess
+import threading
 import time
 from typing import List
 import logging
 import coloredlogs
 from async_timeout import timeout
 
-from cfondasp.utils.system_utils import get_now, get_pkg_root
+from cfondasp.utils.system_utils import MemoryLimitExceeded, MemoryWatcher, get_now, get_pkg_root
 
 
 from cfondasp.base.config import (
     ASP_CLINGO_OUTPUT_PREFIX,
     DETERMINISTIC_ACTION_SUFFIX,
     FILE_BACKBONE,
+    FILE_CLINGO_STATS,
+    FILE_CONTROLLER_OPTIMIZE,
+    FILE_GROUND_PROGRAM,
     FILE_INSTANCE_WEAK,
+    FILE_SYMMETRY,
     FILE_UNDO_ACTIONS,
     FILE_WEAK_PLAN_OUT,
+    OPTIMIZE_STRATEGY,
 )
 from cfondasp.base.elements import FONDProblem, Action, Variable, State
 from cfondasp.base.logic_operators import entails
 from cfondasp.utils.system_utils import remove_files
-from cfondasp.utils.backbone import get_backbone_asp, create_backbone_constraint
+from cfondasp.utils.metrics import record_peak_rss, record_phase, record_size, timed
+from cfondasp.utils.cache import cache_entry_file, cache_lookup, cache_store, get_content_hash
+from cfondasp.utils.asp_output import keep_smallest_sat_output, save_clingo_stats
+from cfondasp.utils.backbone import get_backbone_asp, create_backbone_constraint, create_backbone_heuristics
 from cfondasp.utils.helper_asp import (
+    get_instance_facts,
     write_goal,
+    write_instance,
     write_variables,
     write_mutex,
     write_goal_state,
@@ -33,7 +47,11 @@ from cfondasp.utils.helper_asp import (
     write_undo_actions,
 )
 from cfondasp.utils.helper_sas import organize_actions
-from cfondasp.utils.translators import execute_sas_translator, parse_sas
+from cfondasp.utils.simplify import goal_in_domains, simplify
+from cfondasp.reason.symmetry import create_symmetry_constraints
+from cfondasp.solver.multishot import solve_asp_ground_once, solve_asp_multishot, supports_multishot
+from cfondasp.solver.portfolio import solve_asp_portfolio
+from cfondasp.utils.translators import execute_sas_translator, get_translator_sources, parse_sas
 from cfondasp.knowledge.blocksworld import BlocksworldKnowledge
 from cfondasp.knowledge.tireworld import TireworldKnowledge
 from cfondasp.knowledge.miner import MinerKnowledge
@@ -49,22 +67,38 @@ import os
 #     Said so, subprocess.run() is enough for our needs as we only need timeout to external process
 #       and we don't need multiple async calls at all (one clingo at a time)
 #    subprocess.run() does timeout (albeit busy-waiting, but that's OK as clingo runs for minutes)
+#  Clingo output is now streamed to the output file as it comes (see _run_clingo), and the time limit is
+#    enforced by waiting on the streaming thread (no busy-waiting)
 USE_ASYNCIO = False
 
+# result lines printed by clingo
+CLINGO_RESULTS = ["SATISFIABLE", "UNSATISFIABLE", "UNKNOWN", "OPTIMUM FOUND"]
+
+# how often (in seconds) the parallel size solver checks on its clingo processes
+PARALLEL_POLL_INTERVAL = 0.1
+# extra time (in seconds) given to clingo over the time limit to stop by itself when optimizing the controller size
+OPTIMIZE_KILL_GRACE = 10
+# first bound on the number of controller states when optimizing the controller size (doubled while UNSAT)
+OPTIMIZE_FIRST_BOUND = 8
+
+# UNSAT answers faster than this (in seconds) make the adaptive size search take bigger steps
+ADAPTIVE_FAST_PROBE = 2.0
+
 logger: logging.Logger = None
 DEBUG_LEVEL = "INFO"
 # DEBUG_LEVEL = "DEBUG"
 
 
-def solve(fond_problem: FONDProblem, back_bone=False, only_size=False):
+def solve(fond_problem: FONDProblem, back_bone=False, only_size=False, heuristic=False):
     """
     MAIN SOLVER FUNCTION FOR FONDPorblem
 
     1. Determinize
     2. Check if trivially solved.
-    3. Generate ASP instance encoding.
-    4. Handle backbone to estimate min number of controller states (if requested).
-    5. Add opitmizations: filter undo, domain kb
+    3. Simplify the SAS model (if requested).
+    4. Generate ASP instance encoding.
+    5. Handle backbone to estimate min number of controller states (if requested).
+    6. Add opitmizations: filter undo, domain kb, symmetry breaking
     7. SOLVE!
 
     First we generate a backbone using classical planner and then use that to constrain the controller.
@@ -72,6 +106,7 @@ def solve(fond_problem: FONDProblem, back_bone=False, only_size=False):
     :param fond_problem: FOND problem with all the info needed
     :param back_bone: Use backbone technique
     :param only_size: Only the size of the backbone is considered as a lower bound to the controller
+    :param heuristic: The backbone guides the search as Clingo heuristics (instead of constraining the controller)
     :return:
     """
     _logger: logging.Logger = _get_logger()
@@ -82,9 +117,13 @@ def solve(fond_problem: FONDProblem, back_bone=False, only_size=False):
     # 1. determinise, translate to SAS and parse the SAS file
     initial_state: State = None
     goal_state: State = None
-    initial_state, goal_state, det_actions, nd_actions, variables, mutexs = (
-        parse_and_translate(fond_problem)
-    )
+    try:
+        initial_state, goal_state, det_actions, nd_actions, variables, mutexs = (
+            parse_and_translate(fond_problem)
+        )
+    except MemoryLimitExceeded as e:
+        _logger.error(f"Memory limit reached in the SAS translation: {e}")
+        return
 
     # 2. check if initial state is the goal state
     if entails(initial_state, goal_state):
@@ -93,24 +132,52 @@ def solve(fond_problem: FONDProblem, back_bone=False, only_size=False):
         _logger.info(f"Number of states in controller: 1")
         return
 
-    # 3. generate ASP instance
-    generate_asp_instance(
-        fond_problem.instance_file,
-        initial_state,
-        goal_state,
-        variables,
-        mutexs,
-        nd_actions,
-        initial_state_encoding="both",
-        action_var_affects=False,
-    )
+    # 3. simplify the SAS model: actions and variable values that cannot be part of a controller are not encoded
+    domains = None
+    if fond_problem.simplify:
+        nd_actions, domains = simplify(fond_problem.simplify, initial_state, goal_state, nd_actions, variables)
+        if not goal_in_domains(goal_state, domains):
+            _logger.info("Problem does not have a solution, since the goal is not reachable (even ignoring deletes)!")
+            with open(os.path.join(fond_problem.output_dir, "unsat.out"), "w+") as f:
+                f.write("Unsat")
+            return
+
+    # 4. generate ASP instance
+    with timed("asp_instance"):
+        if fond_problem.engine == "subprocess" or not fond_problem.instance_in_memory:
+            generate_asp_instance(
+                fond_problem.instance_file,
+                initial_state,
+                goal_state,
+                variables,
+                mutexs,
+                nd_actions,
+                initial_state_encoding="both",
+                action_var_affects=False,
+                domains=domains,
+            )
+        else:
+            # in-process engines get the instance straight as clingo symbols (no file to write and parse back)
+            fond_problem.instance_facts = get_instance_facts(
+                initial_state,
+                goal_state,
+                variables,
+                mutexs,
+                nd_actions,
+                initial_state_encoding="both",
+                action_var_affects=False,
+                domains=domains,
+            )
+            if os.path.exists(fond_problem.instance_file):
+                os.remove(fond_problem.instance_file)  # from a previous run, written on demand (see get_instance_file)
 
     min_controller_size = fond_problem.min_states
-    # 4. generate weak plan for backbone if requested
+    # 5. generate weak plan for backbone if requested
     if back_bone:
+        backbone_start = time.perf_counter()
         file_weak_plan: str = os.path.join(fond_problem.output_dir, FILE_INSTANCE_WEAK)
         generate_asp_instance_inc(
-            file_weak_plan, initial_state, goal_state, variables, mutexs, nd_actions
+            file_weak_plan, initial_state, goal_state, variables, mutexs, nd_actions, domains=domains
         )
 
         clingo_inputs = [file_weak_plan, fond_problem.classical_planner]
@@ -129,18 +196,25 @@ def solve(fond_problem: FONDProblem, back_bone=False, only_size=False):
             file_out.write(" ".join(cmd_executable))
             file_out.write("\n")
 
-            return_code, stdout = _run_clingo(cmd_executable, fond_problem.output_dir)
-
-            # save the ASP run output to the ouput file (already opened above)
-            file_out.write(stdout)
+            # run clingo, its output goes to the ouput file (already opened above)
+            try:
+                return_code, _, peak_rss = _run_clingo(
+                    cmd_executable, fond_problem.output_dir, file_out, memory_limit=fond_problem.memory_limit
+                )
+            except MemoryLimitExceeded as e:
+                file_out.close()
+                _logger.error(f"Memory limit reached computing the backbone: {e}")
+                return
             file_out.write("\n\n")
             file_out.write(f"Time end: {get_now()}\n")
             file_out.write(f"Clingo return code: {return_code}\n")
             file_out.close()
+            record_peak_rss("backbone", peak_rss)
 
             # get the backbone
             backbone: List[tuple[str, str]] = get_backbone_asp(asp_output_file)
             backbone_size = len(backbone)
+        record_phase("backbone", time.perf_counter() - backbone_start)
 
         if backbone_size == 0:
             # problem is unsatisfiable
@@ -156,39 +230,109 @@ def solve(fond_problem: FONDProblem, back_bone=False, only_size=False):
         _logger.info(f"Backbone is of size {backbone_size}.")
 
         # we want to use the backbone itself too: the actions in the weak plan must be in the controller
-        if not only_size:
+        if heuristic:
+            # or just prefer controllers extending the weak plan (Clingo domain heuristics, search stays complete)
+            heuristic_file = os.path.join(fond_problem.output_dir, FILE_BACKBONE)
+            create_backbone_heuristics(backbone, heuristic_file)
+            fond_problem.controller_constraints["backbone"] = heuristic_file
+            if not any(arg.startswith("--heuristic") for arg in fond_problem.clingo_args):
+                fond_problem.clingo_args = fond_problem.clingo_args + ["--heuristic=Domain"]
+        elif not only_size:
             constraint_file = os.path.join(fond_problem.output_dir, FILE_BACKBONE)
             create_backbone_constraint(backbone, constraint_file, strict=True)
             fond_problem.controller_constraints["backbone"] = constraint_file
-            shutil.copy(constraint_file, fond_problem.output_dir)
 
-    # 5. Filter undo actions and include domain knowledge (if requested)
+    # 6. Filter undo actions and include domain knowledge (if requested)
     if fond_problem.filter_undo:
-        compile_undo_actions(fond_problem)
+        try:
+            with timed("undo_compilation"):
+                compile_undo_actions(fond_problem)
+        except MemoryLimitExceeded as e:
+            _logger.error(f"Memory limit reached compiling the undo actions: {e}")
+            return
     if fond_problem.domain_knowledge:
-        generate_knowledge(
-            fond_problem,
-            initial_state,
-            goal_state,
-            nd_actions,
-            variables,
-            fond_problem.domain_knowledge,
-        )
+        with timed("knowledge"):
+            generate_knowledge(
+                fond_problem,
+                initial_state,
+                goal_state,
+                nd_actions,
+                variables,
+                fond_problem.domain_knowledge,
+            )
+
+    if fond_problem.symmetry_breaking:
+        if fond_problem.domain_knowledge or "extra" in fond_problem.controller_constraints or (
+            back_bone and not only_size and not heuristic
+        ):
+            # these constraints may not be preserved by swapping objects
+            _logger.warning("Symmetry breaking skipped: not compatible with extra constraints, domain knowledge or a strict backbone.")
+        else:
+            with timed("symmetry"):
+                symmetry_file = os.path.join(fond_problem.output_dir, FILE_SYMMETRY)
+                num_symmetries = create_symmetry_constraints(
+                    initial_state, goal_state, nd_actions, variables, mutexs, symmetry_file, domains=domains
+                )
+            _logger.info(f"Symmetries broken: {num_symmetries}")
+            if num_symmetries > 0:
+                fond_problem.controller_constraints["symmetry"] = symmetry_file
+
+    # 7. time to SOLVE the problem by the iterative process
+    if fond_problem.portfolio:
+        # race the controller models, the first one to find a controller wins
+        solve_asp_portfolio(fond_problem, min_controller_size, solve_sizes)
+    else:
+        solve_sizes(fond_problem, min_controller_size)
 
-    # 6. time to SOLVE the problem by the iterative process
-    if fond_problem.time_limit and USE_ASYNCIO:
+    # collect the clingo statistics (if clingo was run with --stats)
+    if save_clingo_stats(fond_problem.output_dir) > 0:
+        _logger.info(f"Clingo statistics saved in {FILE_CLINGO_STATS}")
+    return
+
+
+def solve_sizes(fond_problem: FONDProblem, min_states: int):
+    """
+    Solves the controller-size loop with the engine and size search strategy chosen
+    :param fond_problem: FOND problem with all the info needed
+    :param min_states: minimum number of controller states to try
+    """
+    _logger: logging.Logger = _get_logger()
+    if fond_problem.size_search == "optimize":
+        # a clingo call minimizing the number of states (up to a bound, doubled up to max_states while UNSAT)
+        if fond_problem.engine != "subprocess" or fond_problem.parallel_sizes > 1:
+            _logger.warning("Size search optimize uses a single clingo process for all sizes up to a bound.")
+        solve_asp_optimize(fond_problem, min_states=min_states)
+    elif fond_problem.engine == "ground-once":
+        # one grounding for the largest size, sizes probed via assumptions (any size search strategy)
+        if fond_problem.parallel_sizes > 1:
+            _logger.warning("Engine ground-once probes one controller size at a time.")
+        strategy = SIZE_SEARCH_STRATEGIES[fond_problem.size_search](
+            min_states, fond_problem.max_states, fond_problem.inc_states
+        )
+        solve_asp_ground_once(fond_problem, strategy)
+    elif fond_problem.size_search != "linear":
+        # sizes are probed out of order, one clingo process at a time
+        if fond_problem.engine != "subprocess" or fond_problem.parallel_sizes > 1:
+            _logger.warning(f"Size search {fond_problem.size_search} uses one clingo process per size, one at a time.")
+        solve_asp_iteratively(fond_problem, min_states=min_states)
+    elif fond_problem.engine == "multishot" and supports_multishot(fond_problem):
+        # one clingo process, grounding one more controller state per iteration
+        solve_asp_multishot(fond_problem, min_states=min_states)
+    elif fond_problem.parallel_sizes > 1:
+        # many controller sizes at once, smallest solution wins
+        solve_asp_parallel(fond_problem, min_states=min_states)
+    elif fond_problem.time_limit and USE_ASYNCIO:
         # this version leaves an unhandle exception behind on the event loop!
         # https://github.com/ssardina-research/cfond-asp-private/issues/83
-        # asyncio.run(solve_asp_iteratively_async(fond_problem, min_controller_size))
+        # asyncio.run(solve_asp_iteratively_async(fond_problem, min_states))
 
         # this one does not leave the hanging exception, but why?
         # https://stackoverflow.com/questions/65682221/runtimeerror-exception-ignored-in-function-proactorbasepipetransport
         asyncio.get_event_loop().run_until_complete(
-            solve_asp_iteratively_async(fond_problem, min_controller_size)
+            solve_asp_iteratively_async(fond_problem, min_states)
         )
     else:
-        solve_asp_iteratively(fond_problem, min_states=min_controller_size)
-    return
+        solve_asp_iteratively(fond_problem, min_states=min_states)
 
 
 async def solve_asp_iteratively_async(fond_problem, min_states):
@@ -212,14 +356,17 @@ async def solve_asp_iteratively_async(fond_problem, min_states):
             asp_output_file = os.path.join(
                 fond_problem.output_dir, f"{ASP_CLINGO_OUTPUT_PREFIX}{num_states}.out"
             )
+            cmd = get_size_command(fond_problem, cmd_executable, num_states, time_limit=time_left)
+            # grounding for the cache (if done) used part of the time left
+            solve_time_left = max(time_left - (time.time() - start_time), 0.1)
             with open(asp_output_file, "w") as file_out:
                 file_out = open(asp_output_file, "a")
                 file_out.write(f"Time start: {get_now()}\n\n")
-                file_out.write(" ".join(cmd_executable))
+                file_out.write(" ".join(cmd))
                 file_out.write("\n")
 
                 # now do the async run with a time limit - USE ASYNCIO!!
-                return_code, stdout = await run_subprocess(cmd_executable + [f"-c numStates={num_states}"], time_left)
+                return_code, stdout = await run_subprocess(cmd, solve_time_left)
 
                 # save the ASP run output to the ouput file (already opened above)
                 file_out.write(stdout)
@@ -233,7 +380,9 @@ async def solve_asp_iteratively_async(fond_problem, min_states):
                     f"No output on ASP run with {num_states} controller states?"
                 )
                 continue
-            if "SATISFIABLE" in stdout and "UNSATISFIABLE" not in stdout:
+            satisfiable = "SATISFIABLE" in stdout and "UNSATISFIABLE" not in stdout
+            record_size(num_states, "SAT" if satisfiable else "UNSAT", time.time() - start_time)
+            if satisfiable:
                 _logger.info("Solution found!")
                 _logger.info(f"Number of states in controller: {num_states+1}")
                 return True  # yes, found solution!
@@ -245,20 +394,8 @@ async def solve_asp_iteratively_async(fond_problem, min_states):
                 time_left = 0.1
 
     # main process
-    # ASP input files for Clingo
-    input_files = [fond_problem.instance_file, fond_problem.controller_model]
-    if fond_problem.domain_knowledge is not None:
-        input_files.append(fond_problem.domain_knowledge)
-    input_files += [
-        fond_problem.controller_constraints[k]
-        for k in fond_problem.controller_constraints
-    ]
-    # copy all ASP files to be used in the output directory (instance already there!    )
-    for f in input_files[1:]:
-        shutil.copy(f, fond_problem.output_dir, follow_symlinks=True)
-
     # build executable command and arguments (which contains number of controller states)
-    cmd_executable = [fond_problem.clingo] + input_files + fond_problem.clingo_args
+    cmd_executable = get_clingo_command(fond_problem)
 
     try:
         await asyncio.wait_for(run_with_time_limit(), timeout=time_limit)
@@ -285,28 +422,55 @@ async def run_subprocess(args, time_left):
     return process.returncode, stdout
 
 
-def _run_clingo(cmd_executable, cwd, time_limit=float("inf")):
-    """Runs an external program using asyncio.
+def _run_clingo(cmd_executable, cwd, file_out, time_limit=float("inf"), memory_limit=None):
+    """Runs clingo as an external process, streaming its output line by line to file_out
     Integrate stderr into stdout
 
-    return both process return code and stdout
+    The result line (e.g., SATISFIABLE) is picked up as soon as clingo prints it. The time limit is enforced by
+    blocking (not polling) on the thread that streams the output, which finishes when clingo closes its output.
+    Meanwhile, the memory used by clingo (and any process it starts) is sampled, to enforce the memory limit.
+
+    return process return code, clingo result line (None if there was none) and peak memory used (in MB)
+    raise subprocess.TimeoutExpired if the time limit is reached (clingo is killed)
+    raise MemoryLimitExceeded if the memory limit (in MB) is exceeded (clingo is killed)
     """
-    process = subprocess.run(
+    process = subprocess.Popen(
         cmd_executable,
         cwd=cwd,
-        # capture_output=True,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        timeout=time_limit if time_limit < float("inf") else None,
+        text=True,
     )
-    return_code = process.returncode
-    stdout = process.stdout.decode()
-
-    return return_code, stdout
+    results = []
+
+    def stream_output():
+        for line in process.stdout:
+            file_out.write(line)
+            if line.strip() in CLINGO_RESULTS:
+                results.append(line.strip())
+                file_out.flush()
+                _get_logger().debug(f"Clingo result: {line.strip()}")
+
+    streamer = threading.Thread(target=stream_output, daemon=True)
+    streamer.start()
+    with MemoryWatcher(process.pid, memory_limit) as watcher:
+        streamer.join(timeout=time_limit if time_limit < float("inf") else None)
+        if streamer.is_alive():
+            process.kill()
+            streamer.join()
+            process.wait()
+            file_out.write("\nClingo run timed out\n")
+            raise subprocess.TimeoutExpired(cmd_executable, time_limit)
+    if watcher.exceeded and not results:  # killed before giving a result
+        process.wait()
+        file_out.write(f"\nClingo run exceeded memory limit ({memory_limit} MB)\n")
+        raise MemoryLimitExceeded(cmd_executable, memory_limit, watcher.peak_rss)
+
+    return process.wait(), results[-1] if results else None, watcher.peak_rss
 
 
 def solve_asp_iteratively(fond_problem : FONDProblem, min_states):
-    """Runs the function `n` times with an overall timeout of `timeout` seconds."""
+    """Runs clingo on the controller sizes chosen by the size search strategy, with an overall timeout of `timeout` seconds."""
     _logger: logging.Logger = _get_logger()
 
     # a local function to run the function with a time limit
@@ -314,77 +478,579 @@ def solve_asp_iteratively(fond_problem : FONDProblem, min_states):
         time_left = float("inf")  # default
         if fond_problem.time_limit is not None:
             time_left = fond_problem.time_limit
-        for num_states in range(
-            min_states, fond_problem.max_states + 1, fond_problem.inc_states
-        ):
-            start_time = time.time()
+
+        strategy = SIZE_SEARCH_STRATEGIES[fond_problem.size_search](
+            min_states, fond_problem.max_states, fond_problem.inc_states
+        )
+        probes = []  # (size, SAT/UNSAT/UNKNOWN, time) of each clingo call, in order
+        solution_size = None
+        try:
+            num_states = next(strategy)
+            while True:
+                start_time = time.time()
+                _logger.info(
+                    f"Solving with number of controller states={num_states} - Time left: {time_left:.2f}"
+                )
+                asp_output_file = os.path.join(
+                    fond_problem.output_dir, f"{ASP_CLINGO_OUTPUT_PREFIX}{num_states}.out"
+                )
+                cmd = get_size_command(fond_problem, cmd_executable, num_states, time_limit=time_left)
+                # grounding for the cache (if done) used part of the time left
+                solve_time_left = max(time_left - (time.time() - start_time), 0.1)
+                with open(asp_output_file, "w") as file_out:
+                    # write start info on the output file for this run
+                    file_out = open(asp_output_file, "a")
+                    file_out.write(f"Time start: {get_now()}\n\n")
+                    file_out.write(" ".join(cmd))
+                    file_out.write("\n")
+
+                    # now run clingo!  - USE SUBPROCESS (not ASYNCIO!), output goes to the output file
+                    try:
+                        return_code, result, peak_rss = _run_clingo(
+                            cmd,
+                            cwd=fond_problem.output_dir,
+                            file_out=file_out,
+                            time_limit=solve_time_left,
+                            memory_limit=fond_problem.memory_limit,
+                        )
+                    except MemoryLimitExceeded as e:
+                        record_size(num_states, "MEMOUT", time.time() - start_time, e.peak_rss)
+                        raise
+                    file_out.write("\n\n")
+                    file_out.write(f"Time end: {get_now()}\n")
+                    file_out.write(f"Clingo return code: {return_code}\n")
+                    file_out.close()
+
+                satisfiable = result in ["SATISFIABLE", "OPTIMUM FOUND"]
+                status = "SAT" if satisfiable else "UNSAT" if result == "UNSATISFIABLE" else "UNKNOWN"
+                probe_time = time.time() - start_time
+                probes.append((num_states, status, probe_time))
+                record_size(num_states, status, probe_time, peak_rss)
+                _logger.info(f"Controller states={num_states} is {status} ({probe_time:.2f}s)")
+                if status == "UNKNOWN":
+                    # only a proven UNSAT size can be skipped: the strategy would take it as UNSAT and could
+                    # report a larger size as minimal, so the search stops here
+                    _logger.error(
+                        f"No result on ASP run with {num_states} controller states (result: {result}, "
+                        f"return code: {return_code}), size search stopped"
+                    )
+                    return False
+
+                # if < 0, just set a minimal timeout for the next cycle
+                time_left -= probe_time
+                if time_left <= 0:
+                    time_left = 0.1
+
+                # ask the strategy for the next size to try
+                num_states = strategy.send((satisfiable, probe_time))
+        except StopIteration as e:
+            solution_size = e.value
+        finally:
             _logger.info(
-                f"Solving with number of controller states={num_states} - Time left: {time_left:.2f}"
+                f"Sizes probed ({fond_problem.size_search}): "
+                + ", ".join(f"{n} ({status}, {t:.2f}s)" for n, status, t in probes)
             )
-            asp_output_file = os.path.join(
-                fond_problem.output_dir, f"{ASP_CLINGO_OUTPUT_PREFIX}{num_states}.out"
+            # drop output of larger (SAT) sizes probed on the way, also when the search stopped early (time or memory
+            # limit, no result): the smallest controller found is then the only one left
+            smallest_sat = keep_smallest_sat_output(
+                fond_problem.output_dir, [n for n, status, _ in probes if status == "SAT"]
             )
-            with open(asp_output_file, "w") as file_out:
-                # write start info on the output file for this run
-                file_out = open(asp_output_file, "a")
-                file_out.write(f"Time start: {get_now()}\n\n")
-                file_out.write(" ".join(cmd_executable))
-                file_out.write("\n")
-
-                # now run clingo!  - USE SUBPROCESS.RUN (not ASYNCIO!)
-                return_code, stdout = _run_clingo(
-                    cmd_executable + [f"-c numStates={num_states}"],
-                    cwd=fond_problem.output_dir,
-                    time_limit=time_left,
+            if solution_size is None and smallest_sat is not None:
+                _logger.warning(
+                    f"Size search stopped before the controller found with {smallest_sat+1} states was proven minimal."
                 )
 
-                # save the ASP run output to the ouput file (already opened above)
-                file_out.write(stdout)
-                file_out.write("\n\n")
-                file_out.write(f"Time end: {get_now()}\n")
-                file_out.write(f"Clingo return code: {return_code}\n")
-                file_out.close()
+        if solution_size is None:
+            return False  # have tried all sizes and no solution found!
 
-            if stdout is None:
-                _logger.warning(
-                    f"No output on ASP run with {num_states} controller states?"
-                )
+        _logger.info("Solution found!")
+        _logger.info(f"Number of states in controller: {solution_size+1}")
+        return True  # yes, found solution!
+
+    # MAIN PROCESS
+    # build executable command and arguments (which contains number of controller states)
+    cmd_executable = get_clingo_command(fond_problem)
+
+    try:
+        return run_with_time_limit()
+    except subprocess.TimeoutExpired as e:
+        _logger.error(f"Time limit reached: {e}")
+        return False
+    except MemoryLimitExceeded as e:
+        _logger.error(f"Memory limit reached: {e}")
+        return False
+
+
+def solve_asp_parallel(fond_problem: FONDProblem, min_states: int):
+    """
+    Runs up to `fond_problem.parallel_sizes` clingo processes at once, each on a different number of controller states.
+
+    The smallest size still wins: when size k is found SAT, all runs for sizes above k are cancelled (and their output
+    files removed), and k is only reported once every size below k has been proven UNSAT.
+
+    :param fond_problem: FOND problem with all the info needed
+    :param min_states: minimum number of controller states to try
+    :return: True if a (minimal) solution was found, False otherwise
+    """
+    _logger: logging.Logger = _get_logger()
+
+    cmd_executable = get_clingo_command(fond_problem)
+    pending = list(range(min_states, fond_problem.max_states + 1, fond_problem.inc_states))
+    sizes = pending[:]
+    running = {}  # size -> (process, output file, output file name, memory watcher)
+    started = {}  # size -> time its run was launched
+    peaks = {}  # size -> peak memory of its run (in MB)
+    results = {}  # size -> True (SAT), False (UNSAT) or None (unknown)
+    best_size = None
+
+    def launch(num_states):
+        _logger.info(f"Solving with number of controller states={num_states} ({len(running) + 1} runs in parallel)")
+        asp_output_file = os.path.join(
+            fond_problem.output_dir, f"{ASP_CLINGO_OUTPUT_PREFIX}{num_states}.out"
+        )
+        # grounded programs are used if cached, but not grounded here (it would hold up the other runs)
+        cmd = get_size_command(fond_problem, cmd_executable, num_states, ground=False)
+        file_out = open(asp_output_file, "w")
+        file_out.write(f"Time start: {get_now()}\n\n")
+        file_out.write(" ".join(cmd))
+        file_out.write("\n")
+        file_out.flush()
+        process = subprocess.Popen(
+            cmd, cwd=fond_problem.output_dir, stdout=file_out, stderr=subprocess.STDOUT
+        )
+        watcher = MemoryWatcher(process.pid, fond_problem.memory_limit)
+        watcher.start()
+        running[num_states] = (process, file_out, asp_output_file, watcher)
+        started[num_states] = time.time()
+
+    def finish(num_states, message=None):
+        process, file_out, asp_output_file, watcher = running.pop(num_states)
+        watcher.stop()
+        peaks[num_states] = watcher.peak_rss
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        if message is not None:
+            file_out.write(f"\n{message}\n")
+        file_out.write("\n\n")
+        file_out.write(f"Time end: {get_now()}\n")
+        file_out.write(f"Clingo return code: {process.returncode}\n")
+        file_out.close()
+        return asp_output_file
+
+    def is_minimal(size):
+        return all(results.get(s) is False for s in sizes if s < size)
+
+    start_time = time.time()
+    while True:
+        # keep the pool full, never launching sizes above the best solution so far
+        while (
+            pending
+            and len(running) < fond_problem.parallel_sizes
+            and (best_size is None or pending[0] < best_size)
+        ):
+            launch(pending.pop(0))
+        if not running or (best_size is not None and is_minimal(best_size)):
+            break
+
+        for num_states in sorted(running.keys()):
+            if num_states not in running or running[num_states][0].poll() is None:
                 continue
-            if "SATISFIABLE" in stdout and "UNSATISFIABLE" not in stdout:
-                _logger.info("Solution found!")
-                _logger.info(f"Number of states in controller: {num_states+1}")
-                return True  # yes, found solution!
+            if running[num_states][3].exceeded and is_satisfiable(running[num_states][2]) is None:
+                # killed by its memory watcher before giving a result
+                finish(num_states, message=f"Clingo run exceeded memory limit ({fond_problem.memory_limit} MB)")
+                record_size(num_states, "MEMOUT", time.time() - started[num_states], peaks[num_states])
+                _logger.error(f"Memory limit reached with {num_states} controller states: {fond_problem.memory_limit} MB")
+                for other in list(running.keys()):
+                    finish(other, message="Clingo run cancelled")
+                    record_size(other, "CANCELLED", time.time() - started[other], peaks[other])
+                return False
+            results[num_states] = is_satisfiable(finish(num_states))
+            record_size(
+                num_states,
+                {True: "SAT", False: "UNSAT", None: "UNKNOWN"}[results[num_states]],
+                time.time() - started[num_states],
+                peaks[num_states],
+            )
+            if results[num_states] is None:
+                _logger.warning(f"No result on ASP run with {num_states} controller states?")
+            elif results[num_states] and (best_size is None or num_states < best_size):
+                best_size = num_states
+                # cancel all runs above the new best size; they cannot be the minimal solution
+                for larger in [s for s in running if s > best_size]:
+                    os.remove(finish(larger))
+                    record_size(larger, "CANCELLED", time.time() - started[larger], peaks[larger])
+                _logger.info(f"Solution found with {best_size} controller states, waiting for smaller sizes")
+
+        if fond_problem.time_limit is not None and time.time() - start_time > fond_problem.time_limit:
+            _logger.error(f"Time limit reached: {fond_problem.time_limit} seconds")
+            for num_states in list(running.keys()):
+                finish(num_states, message="Clingo run timed out")
+                record_size(num_states, "TIMEOUT", time.time() - started[num_states], peaks[num_states])
+            return False
+        time.sleep(PARALLEL_POLL_INTERVAL)
 
-            # not a solution yet, keep looping with more controller states
-            # if < 0, just set a minimal timeout for the next cycle
-            time_left -= time.time() - start_time
-            if time_left <= 0:
-                time_left = 0.1
+    # clean up output of larger sizes that were solved before the minimal one
+    for num_states in [s for s in results if best_size is not None and s > best_size]:
+        os.remove(os.path.join(fond_problem.output_dir, f"{ASP_CLINGO_OUTPUT_PREFIX}{num_states}.out"))
 
+    if best_size is None:
         return False  # have tried all sizes and no solution found!
+    if not is_minimal(best_size):
+        _logger.error(f"Solution found with {best_size} controller states, but smaller sizes could not be proven UNSAT")
+        return False
 
-    # MAIN PROCESS
-    # ASP input files for Clingo
-    input_files = [fond_problem.instance_file, fond_problem.controller_model]
+    _logger.info("Solution found!")
+    _logger.info(f"Number of states in controller: {best_size+1}")
+    return True
+
+
+def solve_asp_optimize(fond_problem: FONDProblem, min_states: int):
+    """
+    Solves for a minimal controller with a single clingo call per bound on its size: the program is grounded for up
+    to `bound` controller states, and clingo chooses the states used and minimizes their number (see
+    controller-optimize.lp).
+
+    The bound starts at OPTIMIZE_FIRST_BOUND (or min_states) and is doubled, up to max_states, while there is no
+    controller within it: grounding for max_states at once can take far more time and memory than the problem
+    needs. The minimum found under the first bound with a controller is the overall minimum.
+
+    Clingo reports better controllers as it finds them (the last one is used). If the time limit is reached before
+    the minimum is proven, clingo stops with the best controller found so far, which may not be minimal.
+
+    :param fond_problem: FOND problem with all the info needed
+    :param min_states: minimum number of controller states
+    :return: True if a solution was found, False otherwise
+    """
+    _logger: logging.Logger = _get_logger()
+
+    optimize_file = os.path.join(get_pkg_root(), "asp", FILE_CONTROLLER_OPTIMIZE)
+    shutil.copy(optimize_file, fond_problem.output_dir)
+    cmd_executable = get_clingo_command(fond_problem)
+    cmd_executable.insert(len(get_clingo_inputs(fond_problem)) + 1, optimize_file)
+    cmd_executable += ["-c boundedStates=2", f"-c minStates={min_states}"]
+    if not any(arg.startswith("--opt-strategy") for arg in fond_problem.clingo_args):
+        cmd_executable.append(f"--opt-strategy={OPTIMIZE_STRATEGY}")
+
+    time_left = float("inf")  # default
+    if fond_problem.time_limit is not None:
+        time_left = fond_problem.time_limit
+
+    bound = min(fond_problem.max_states, max(min_states, OPTIMIZE_FIRST_BOUND))
+    while True:
+        # clingo itself stops at the time limit, printing the best controller so far (killed if it does not stop)
+        cmd = cmd_executable + [f"-c numStates={bound}"]
+        time_limit = float("inf")
+        if fond_problem.time_limit is not None:
+            cmd.append(f"--time-limit={max(1, math.ceil(time_left))}")
+            time_limit = time_left + OPTIMIZE_KILL_GRACE
+
+        _logger.info(
+            f"Minimizing number of controller states from {min_states} to {bound} - Time left: {time_left:.2f}"
+        )
+        start_time = time.time()
+        asp_output_file = os.path.join(fond_problem.output_dir, f"{ASP_CLINGO_OUTPUT_PREFIX}{bound}.out")
+        with open(asp_output_file, "w") as file_out:
+            file_out.write(f"Time start: {get_now()}\n\n")
+            file_out.write(" ".join(cmd))
+            file_out.write("\n")
+            try:
+                return_code, result, peak_rss = _run_clingo(
+                    cmd,
+                    cwd=fond_problem.output_dir,
+                    file_out=file_out,
+                    time_limit=time_limit,
+                    memory_limit=fond_problem.memory_limit,
+                )
+            except subprocess.TimeoutExpired as e:
+                record_size(bound, "TIMEOUT", time.time() - start_time)
+                _logger.error(f"Time limit reached: {e}")
+                return False
+            except MemoryLimitExceeded as e:
+                record_size(bound, "MEMOUT", time.time() - start_time, e.peak_rss)
+                _logger.error(f"Memory limit reached: {e}")
+                return False
+            if result == "UNKNOWN" and fond_problem.time_limit is not None:
+                file_out.write("\nClingo run timed out\n")  # stopped by its own time limit, before any model
+            file_out.write("\n\n")
+            file_out.write(f"Time end: {get_now()}\n")
+            file_out.write(f"Clingo return code: {return_code}\n")
+        time_left -= time.time() - start_time
+
+        if result == "UNSATISFIABLE":
+            record_size(bound, "UNSAT", time.time() - start_time, peak_rss)
+            if bound >= fond_problem.max_states:
+                _logger.info(f"No controller found with up to {bound} controller states")
+                return False
+            if time_left <= 0:
+                _logger.error(f"Time limit reached: {fond_problem.time_limit} seconds")
+                return False
+            _logger.info(f"No controller found with up to {bound} controller states, doubling the bound")
+            bound = min(fond_problem.max_states, 2 * bound)
+            continue
+        if result not in ["SATISFIABLE", "OPTIMUM FOUND"]:
+            timed_out = result == "UNKNOWN" and fond_problem.time_limit is not None
+            if return_code < 0:
+                # e.g., killed by the system for running out of memory
+                record_size(bound, "ERROR", time.time() - start_time, peak_rss)
+                _logger.error(f"Clingo was killed (signal {-return_code}) with up to {bound} controller states")
+            elif timed_out:
+                record_size(bound, "TIMEOUT", time.time() - start_time, peak_rss)
+                _logger.error(f"Time limit reached: {fond_problem.time_limit} seconds")
+            else:
+                record_size(bound, "UNKNOWN", time.time() - start_time, peak_rss)
+                _logger.error(
+                    f"No result on ASP run with up to {bound} controller states (return code: {return_code})"
+                )
+            return False
+        break
+
+    # the cost of the last (best) model is the number of states used besides the initial one, i.e., numStates
+    with open(asp_output_file) as f:
+        costs = [int(line.split(":")[1]) for line in f if line.startswith("Optimization:")]
+    solution_size = costs[-1]
+    record_size(solution_size, "OPTIMUM" if result == "OPTIMUM FOUND" else "SAT", time.time() - start_time, peak_rss)
+    _logger.info(f"Controller costs found: {', '.join(str(c) for c in costs)} ({time.time() - start_time:.2f}s)")
+
+    # name the output after the controller size, like the other engines
+    os.rename(
+        asp_output_file, os.path.join(fond_problem.output_dir, f"{ASP_CLINGO_OUTPUT_PREFIX}{solution_size}.out")
+    )
+    if result != "OPTIMUM FOUND":
+        _logger.warning("Time limit reached before proving the controller minimal.")
+    _logger.info("Solution found!")
+    _logger.info(f"Number of states in controller: {solution_size+1}")
+    return True
+
+
+def get_clingo_command(fond_problem: FONDProblem) -> List[str]:
+    """
+    Builds the clingo command (without the number of controller states) and copies the ASP files used to the output directory
+    :param fond_problem: FOND problem with all the info needed
+    :return: clingo executable, input files and arguments
+    """
+    input_files = get_clingo_inputs(fond_problem)
+
+    # copy all ASP files to be used in the output directory (instance already there!    )
+    for f in input_files[1:]:
+        if os.path.dirname(os.path.abspath(f)) != os.path.abspath(fond_problem.output_dir):  # e.g., backbone.lp
+            shutil.copy(f, fond_problem.output_dir, follow_symlinks=True)
+
+    return [fond_problem.clingo] + input_files + fond_problem.clingo_args
+
+
+def get_instance_file(fond_problem: FONDProblem) -> str:
+    """
+    Returns the ASP instance file, to be read by the clingo binary. If the instance was only kept in memory (for an
+    in-process engine), the file is written now, atomically (e.g., portfolio models may need it at the same time).
+    :param fond_problem: FOND problem with all the info needed
+    :return: path to the instance file
+    """
+    if not os.path.exists(fond_problem.instance_file):
+        with timed("asp_instance"):
+            tmp_file = f"{fond_problem.instance_file}.{os.getpid()}"
+            write_instance(tmp_file, *fond_problem.instance_facts)
+            os.replace(tmp_file, fond_problem.instance_file)
+    return fond_problem.instance_file
+
+
+def get_clingo_inputs(fond_problem: FONDProblem) -> List[str]:
+    """
+    Returns the ASP input files for Clingo
+    :param fond_problem: FOND problem with all the info needed
+    :return: instance, controller model and extra constraint files
+    """
+    input_files = [get_instance_file(fond_problem), fond_problem.controller_model]
     if fond_problem.domain_knowledge is not None:
         input_files.append(fond_problem.domain_knowledge)
     input_files += [
         fond_problem.controller_constraints[k]
         for k in fond_problem.controller_constraints
     ]
+    return input_files
 
-    # copy all ASP files to be used in the output directory (instance already there!    )
-    for f in input_files[1:]:
-        shutil.copy(f, fond_problem.output_dir, follow_symlinks=True)
 
-    # build executable command and arguments (which contains number of controller states)
-    cmd_executable = [fond_problem.clingo] + input_files + fond_problem.clingo_args
+def get_size_command(fond_problem: FONDProblem, cmd_executable: List[str], num_states: int, ground: bool = True, time_limit=float("inf")) -> List[str]:
+    """
+    Returns the clingo command to solve with num_states controller states.
+
+    If a cache is used, the program grounded for this size (clingo intermediate format, aspif) is solved directly.
+    It is grounded and stored first if it is not in the cache yet and ground is True: the time this takes is part of
+    the time limit of the size. Without a cache, the plain command is returned (clingo grounds the program itself,
+    in a single pass).
+
+    :param fond_problem: FOND problem with all the info needed
+    :param cmd_executable: clingo command for all sizes (see get_clingo_command)
+    :param num_states: number of controller states
+    :param ground: whether to ground the program (if not cached) or just use the plain command
+    :param time_limit: time limit to ground the program (in seconds)
+    :return: clingo command
+    """
+    cmd = cmd_executable + [f"-c numStates={num_states}"]
+    if fond_problem.cache_dir is None:
+        return cmd
+
+    # only constants (-c/--const) of the Clingo arguments change the grounded program
+    grounding_args = []
+    for i, arg in enumerate(fond_problem.clingo_args):
+        if arg in ["-c", "--const"]:
+            grounding_args += fond_problem.clingo_args[i : i + 2]
+        elif arg.startswith("-c") or arg.startswith("--const="):
+            grounding_args.append(arg)
+    grounding_args.append(f"-c numStates={num_states}")
+
+    input_files = get_clingo_inputs(fond_problem)
+    included_files = [f for input_file in input_files for f in _get_included_files(input_file)]
+    cache_key = get_content_hash(["grounding"] + input_files + included_files + grounding_args)
+
+    ground_file = cache_entry_file(fond_problem.cache_dir, cache_key, FILE_GROUND_PROGRAM)
+    if ground_file is None and ground:
+        # ground program goes to stdout (messages, e.g. infos about undefined atoms, to stderr)
+        tmp_file = os.path.join(fond_problem.output_dir, FILE_GROUND_PROGRAM)
+        with open(tmp_file, "w") as f:
+            process = subprocess.Popen(
+                [fond_problem.clingo] + input_files + grounding_args + ["--mode=gringo", "--output=intermediate"],
+                cwd=fond_problem.output_dir,
+                stdout=f,
+                stderr=subprocess.DEVNULL,
+            )
+            with MemoryWatcher(process.pid, fond_problem.memory_limit) as watcher:
+                try:
+                    process.wait(timeout=time_limit if time_limit < float("inf") else None)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+                    raise
+        record_peak_rss("grounding", watcher.peak_rss)
+        if watcher.exceeded:
+            # the program is then grounded again by clingo itself (with the same memory limit) when solving
+            _get_logger().warning(f"Grounding exceeded the memory limit with {num_states} controller states")
+            os.remove(tmp_file)
+            return cmd
+        if process.returncode != 0:
+            _get_logger().warning(f"Grounding failed with {num_states} controller states (return code: {process.returncode})")
+            os.remove(tmp_file)
+            return cmd
+        cache_store(fond_problem.cache_dir, cache_key, {FILE_GROUND_PROGRAM: tmp_file}, fond_problem.cache_size * 1024**2)
+        os.remove(tmp_file)
+        ground_file = cache_entry_file(fond_problem.cache_dir, cache_key, FILE_GROUND_PROGRAM)
+    if ground_file is None:
+        return cmd
+
+    return [fond_problem.clingo, ground_file] + fond_problem.clingo_args
+
+
+def _get_included_files(asp_file: str) -> List[str]:
+    """
+    Returns the files included (#include directive) by an ASP file, recursively
+    :param asp_file: path to the ASP file
+    :return: paths of all files included
+    """
+    if not os.path.isfile(asp_file):
+        return []
+    with open(asp_file) as f:
+        included = re.findall(r'^\s*#include\s+"([^"]+)"\s*\.', f.read(), flags=re.MULTILINE)
+    included = [os.path.join(os.path.dirname(asp_file), f) for f in included]
+    return included + [g for f in included for g in _get_included_files(f)]
+
+
+def linear_sizes(min_states: int, max_states: int, inc_states: int):
+    """
+    Linear sweep of controller sizes min_states, min_states + inc_states, ..., up to max_states.
+
+    Size strategies are generators: they yield the next number of controller states to try, are sent back
+    (satisfiable, time taken) for it, and return the minimal SAT size (or None if there is none).
+    :param min_states: minimum number of controller states
+    :param max_states: maximum number of controller states
+    :param inc_states: step between sizes
+    :return: the smallest SAT size tried, or None
+    """
+    for num_states in range(min_states, max_states + 1, inc_states):
+        satisfiable, _ = yield num_states
+        if satisfiable:
+            return num_states
+    return None
 
-    try:
-        return run_with_time_limit()
-    except subprocess.TimeoutExpired as e:
-        _logger.error(f"Time limit reached: {e}")
-        return False
+
+def galloping_sizes(min_states: int, max_states: int, inc_states: int):
+    """
+    Exponential galloping then binary search: try min_states, then grow the step (starting at inc_states) by
+    doubling it after every UNSAT size until a SAT size is found; then binary search the gap left behind.
+    :param min_states: minimum number of controller states
+    :param max_states: maximum number of controller states
+    :param inc_states: first step between sizes
+    :return: the minimal SAT size, or None
+    """
+    last_unsat = min_states - 1
+    num_states = min_states
+    step = inc_states
+    while True:
+        satisfiable, _ = yield num_states
+        if satisfiable:
+            break
+        last_unsat = num_states
+        if num_states >= max_states:
+            return None
+        num_states = min(num_states + step, max_states)
+        step *= 2
+
+    return (yield from _binary_sizes(last_unsat, num_states))
+
+
+def adaptive_sizes(min_states: int, max_states: int, inc_states: int):
+    """
+    Adaptive step: the step between sizes (starting at inc_states) doubles while UNSAT answers come back
+    fast (under ADAPTIVE_FAST_PROBE seconds) and halves when they get slow; once a SAT size is found,
+    binary search the gap left behind.
+    :param min_states: minimum number of controller states
+    :param max_states: maximum number of controller states
+    :param inc_states: first (and smallest) step between sizes
+    :return: the minimal SAT size, or None
+    """
+    last_unsat = min_states - 1
+    num_states = min_states
+    step = inc_states
+    while True:
+        satisfiable, probe_time = yield num_states
+        if satisfiable:
+            break
+        last_unsat = num_states
+        if num_states >= max_states:
+            return None
+        if probe_time < ADAPTIVE_FAST_PROBE:
+            step *= 2
+        else:
+            step = max(inc_states, step // 2)
+        num_states = min(num_states + step, max_states)
+
+    return (yield from _binary_sizes(last_unsat, num_states))
+
+
+def _binary_sizes(unsat_size: int, sat_size: int):
+    """
+    Binary search for the smallest SAT size in (unsat_size, sat_size], given sat_size is SAT.
+
+    Sizes are monotone: a controller can always be padded with unreachable copies of its initial state,
+    so if size k is UNSAT then so is every size below k, and finding k-1 UNSAT proves k minimal.
+    :param unsat_size: largest size known to be UNSAT (or min_states - 1)
+    :param sat_size: smallest size known to be SAT
+    :return: the minimal SAT size
+    """
+    while sat_size - unsat_size > 1:
+        num_states = (unsat_size + sat_size) // 2
+        satisfiable, _ = yield num_states
+        if satisfiable:
+            sat_size = num_states
+        else:
+            unsat_size = num_states
+    return sat_size
+
+
+SIZE_SEARCH_STRATEGIES = {
+    "linear": linear_sizes,
+    "galloping": galloping_sizes,
+    "adaptive": adaptive_sizes,
+}
 
 
 def is_satisfiable(clingo_output_file: str):
@@ -408,6 +1074,7 @@ def generate_asp_instance_inc(
     nd_actions,
     initial_state_encoding="both",
     action_var_affects=False,
+    domains=None,
 ):
     """
     Write planning instance to a logic programming as an input to Clingo for incremental solving. This is currently to generate a weak plan.
@@ -419,14 +1086,15 @@ def generate_asp_instance_inc(
     :param nd_actions: Dictionary mapping a non-deterministic action name to its deterministic actions
     :param initial_state_encoding: Encoding for the initial state (negative, positive, or both)
     :param action_var_affects: Mapping of action name to variables it affects in add or del effects
+    :param domains: variable index -> values to encode (see simplify.py), None: all variables and values
     :return:
     """
 
-    write_variables(file, variables)
-    write_mutex(file, mutexs)
-    write_initial_state(file, initial_state, encoding=initial_state_encoding)
-    write_goal(file, goal_state)
-    write_actions(file, nd_actions, variables, variable_mapping=action_var_affects)
+    write_variables(file, variables, domains)
+    write_mutex(file, mutexs, domains)
+    write_initial_state(file, initial_state, encoding=initial_state_encoding, domains=domains)
+    write_goal(file, goal_state, domains)
+    write_actions(file, nd_actions, variables, variable_mapping=action_var_affects, domains=domains)
 
 
 def generate_asp_instance(
@@ -438,6 +1106,7 @@ def generate_asp_instance(
     nd_actions,
     initial_state_encoding="both",
     action_var_affects=False,
+    domains=None,
 ):
     """
     Write planning instance to a logic programming as an input to Clingo
@@ -449,14 +1118,15 @@ def generate_asp_instance(
     :param nd_actions: Dictionary mapping a non-deterministic action name to its deterministic actions
     :param initial_state_encoding: Encoding for the initial state (negative, positive, or both)
     :param action_var_affects: Mapping of action name to variables it affects in add or del effects
+    :param domains: variable index -> values to encode (see simplify.py), None: all variables and values
     :return:
     """
 
-    write_variables(file, variables)
-    write_mutex(file, mutexs)
-    write_initial_state(file, initial_state, encoding=initial_state_encoding)
-    write_goal_state(file, goal_state)
-    write_actions(file, nd_actions, variables, variable_mapping=action_var_affects)
+    write_variables(file, variables, domains)
+    write_mutex(file, mutexs, domains)
+    write_initial_state(file, initial_state, encoding=initial_state_encoding, domains=domains)
+    write_goal_state(file, goal_state, domains)
+    write_actions(file, nd_actions, variables, variable_mapping=action_var_affects, domains=domains)
 
 
 def parse_and_translate(
@@ -481,33 +1151,61 @@ def parse_and_translate(
     from pddl.formatter import domain_to_string
     from fondutils.determizer import determinize
 
-    # step 1. Do the all outcomes determinisation at the lifted level (will produce all outcomes domain file)
-    domain_file = fond_problem.domain
     all_outcomes_domain_file = os.path.join(
-        fond_problem.output_dir, f"{Path(domain_file).stem}_all_outcomes.pddl"
-    )
-    domain = parse_domain(domain_file)
-
-    domain_det = determinize(
-        domain, dom_suffix="", op_prefix=DETERMINISTIC_ACTION_SUFFIX
+        fond_problem.output_dir, f"{Path(fond_problem.domain).stem}_all_outcomes.pddl"
     )
-    with open(all_outcomes_domain_file, "w") as f:
-        f.write(domain_to_string(domain_det))
-
-    # step 2. Use the FD SAS translator (will produce output.sas)
     sas_file = os.path.join(fond_problem.output_dir, "output.sas")
-    execute_sas_translator(
-        fond_problem.sas_translator,
-        all_outcomes_domain_file,
-        fond_problem.problem,
-        fond_problem.translator_args,
-        fond_problem.output_dir,
-        sas_file,
-        os.path.join(fond_problem.output_dir, "sas_stats.txt"),
-    )
+    stats_file = os.path.join(fond_problem.output_dir, "sas_stats.txt")
+
+    # translation results are reused from the cache if the same inputs were translated before
+    cached_files = {"all_outcomes.pddl": all_outcomes_domain_file, "output.sas": sas_file, "sas_stats.txt": stats_file}
+    cache_key = None
+    if fond_problem.cache_dir is not None:
+        cache_key = get_content_hash(
+            [
+                "translation",
+                fond_problem.domain,
+                fond_problem.problem,
+                *get_translator_sources(fond_problem.sas_translator),
+                fond_problem.translator_args,
+                DETERMINISTIC_ACTION_SUFFIX,
+                version("fond-utils"),
+                version("pddl"),
+            ]
+        )
+    if cache_key is None or not cache_lookup(fond_problem.cache_dir, cache_key, cached_files):
+        # step 1. Do the all outcomes determinisation at the lifted level (will produce all outcomes domain file)
+        with timed("pddl_parse"):
+            domain = parse_domain(fond_problem.domain)
+
+        with timed("determinization"):
+            domain_det = determinize(
+                domain, dom_suffix="", op_prefix=DETERMINISTIC_ACTION_SUFFIX
+            )
+            with open(all_outcomes_domain_file, "w") as f:
+                f.write(domain_to_string(domain_det))
+
+        # step 2. Use the FD SAS translator (will produce output.sas)
+        with timed("sas_translation"):
+            peak_rss = execute_sas_translator(
+                fond_problem.sas_translator,
+                all_outcomes_domain_file,
+                fond_problem.problem,
+                fond_problem.translator_args,
+                fond_problem.output_dir,
+                sas_file,
+                stats_file,
+                memory_limit=fond_problem.memory_limit,
+                worker=fond_problem.translator_worker,
+            )
+        record_peak_rss("sas_translation", peak_rss)
 
-    initial_state, goal_state, actions, variables, mutexs = parse_sas(sas_file)
-    det_actions, nd_actions = organize_actions(actions)
+        if cache_key is not None:
+            cache_store(fond_problem.cache_dir, cache_key, cached_files, fond_problem.cache_size * 1024**2)
+
+    with timed("parse_sas"):
+        initial_state, goal_state, actions, variables, mutexs = parse_sas(sas_file)
+        det_actions, nd_actions = organize_actions(actions)
 
     return initial_state, goal_state, det_actions, nd_actions, variables, mutexs
 
@@ -516,16 +1214,17 @@ def compile_undo_actions(fond_problem: FONDProblem):
     undo_controller = fond_problem.controller_constraints["undo"]
     executable_list = [
         fond_problem.clingo,
-        fond_problem.instance_file,
+        get_instance_file(fond_problem),
         undo_controller,
         "--stats",
     ]
-    return_code, stdout = _run_clingo(executable_list, cwd=fond_problem.output_dir)
-
-    # save output
+    # run clingo and save output
     output_file = os.path.join(fond_problem.output_dir, FILE_UNDO_ACTIONS)
     with open(output_file, "w") as f:
-        f.write(stdout)
+        _, _, peak_rss = _run_clingo(
+            executable_list, cwd=fond_problem.output_dir, file_out=f, memory_limit=fond_problem.memory_limit
+        )
+    record_peak_rss("undo_compilation", peak_rss)
 
     # create grounded file
     grounded_undo_file = os.path.join(fond_problem.output_dir, "undo_actions.lp")
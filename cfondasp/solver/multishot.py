@@ -0,0 +1,431 @@
+"""
+In-process multi-shot solving of the controller-size loop via the clingo Python API.
+
+Instead of calling the clingo binary once per number of controller states (which re-parses and re-grounds
+the instance and the controller model every time), one clingo.Control object is kept alive and the
+incremental encoding (e.g., controller-fondsat-inc.lp) is grounded one controller state at a time.
+See controller-common-inc.lp for the program parts used.
+
+Alternatively, solve_asp_ground_once() grounds the (single-shot) controller model once for a bound on the size
+(numStates = bound, with boundedStates=1, see controller-common.lp; the bound is doubled when a larger size is
+needed) and probes each size by solving under assumptions on the externals activeState/1 and goalAt/1. Any size
+up to the bound can then be probed in any order, and the unsatisfiable cores found along the way are reused to
+discard later probes without calling the solver.
+"""
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Generator, Sequence
+
+import clingo
+import coloredlogs
+
+from cfondasp.base.config import ASP_CLINGO_OUTPUT_PREFIX
+from cfondasp.base.elements import FONDProblem
+from cfondasp.utils.asp_output import keep_smallest_sat_output
+from cfondasp.utils.helper_asp import add_instance
+from cfondasp.utils.metrics import record_size, timed
+from cfondasp.utils.system_utils import get_now
+
+DEBUG_LEVEL = "INFO"
+
+# first number of controller states the ground-once engine grounds for (doubled when a larger size is probed)
+GROUND_ONCE_FIRST_BOUND = 8
+
+# clingo command-line options that make no sense for an in-process multi-shot run
+UNSUPPORTED_CLINGO_ARGS = ["--single-shot"]
+
+# result of a solve call -> result of a controller size in the run metrics
+_SIZE_RESULTS = {"SATISFIABLE": "SAT", "UNSATISFIABLE": "UNSAT", "TIMEOUT": "TIMEOUT"}
+
+
+def get_incremental_model(controller_model: str) -> str | None:
+    """
+    Returns the incremental (multi-shot) version of a controller model, if there is one.
+    For example, controller-fondsat.lp -> controller-fondsat-inc.lp
+    :param controller_model: path to the controller model (single-shot version)
+    :return: path to the incremental controller model, or None if the model has no incremental version
+    """
+    model = Path(controller_model)
+    inc_model = model.with_name(f"{model.stem}-inc{model.suffix}")
+    if not inc_model.exists():
+        return None
+    return str(inc_model)
+
+
+def supports_multishot(fond_problem: FONDProblem) -> bool:
+    """
+    Checks whether the problem can be solved with the multi-shot engine.
+    Extra constraint files (undo, backbone, domain knowledge, user constraints) are written for the single-shot
+    encoding and cannot be grounded state-by-state, so they are not supported.
+    :param fond_problem: FOND problem to solve
+    :return: True if the multi-shot engine can be used
+    """
+    _logger: logging.Logger = _get_logger()
+    if get_incremental_model(fond_problem.controller_model) is None:
+        _logger.warning(
+            f"No incremental version of {os.path.basename(fond_problem.controller_model)} available for multi-shot solving."
+        )
+        return False
+    if fond_problem.controller_constraints:
+        _logger.warning(
+            f"Multi-shot solving does not support extra constraints: {list(fond_problem.controller_constraints.keys())}"
+        )
+        return False
+    return True
+
+
+def solve_asp_multishot(fond_problem: FONDProblem, min_states: int) -> bool:
+    """
+    Solves the controller-size loop (numStates = min_states, ..., max_states) within one clingo process,
+    grounding only the rules for the new controller state(s) at each iteration.
+
+    One clingo output file per controller size is written (like the subprocess solver does), so that
+    the controller can be built and verified afterwards.
+
+    :param fond_problem: FOND problem with all the info needed
+    :param min_states: minimum number of controller states to try
+    :return: True if a solution was found, False otherwise
+    """
+    _logger: logging.Logger = _get_logger()
+    _warn_memory_limit(fond_problem)
+    inc_model = get_incremental_model(fond_problem.controller_model)
+
+    clingo_args = [a for a in fond_problem.clingo_args if a not in UNSUPPORTED_CLINGO_ARGS]
+    ctl = clingo.Control(clingo_args, logger=_clingo_logger)
+    load_instance(ctl, fond_problem)
+    ctl.load(inc_model)
+
+    # copy the ASP files used to the output directory (instance already there!)
+    for f in [inc_model, os.path.join(os.path.dirname(inc_model), "controller-common-inc.lp")]:
+        shutil.copy(f, fond_problem.output_dir, follow_symlinks=True)
+
+    time_left = float("inf")  # default
+    if fond_problem.time_limit is not None:
+        time_left = fond_problem.time_limit
+
+    # base program: instance and initial controller state 0
+    start_time = time.time()
+    with timed("grounding"):
+        ctl.ground([("base", []), ("step", [clingo.Number(0)])])
+    time_left -= time.time() - start_time
+
+    sizes = set(range(min_states, fond_problem.max_states + 1, fond_problem.inc_states))
+    for num_states in range(1, fond_problem.max_states + 1):
+        start_time = time.time()
+        num_states_sym = clingo.Number(num_states)
+        if num_states not in sizes:
+            with timed("grounding"):
+                ctl.ground([("step", [num_states_sym])])
+            ctl.release_external(clingo.Function("goalState", [num_states_sym]))
+            time_left -= time.time() - start_time
+            continue
+
+        _logger.info(
+            f"Solving with number of controller states={num_states} - Time left: {time_left:.2f}"
+        )
+        with timed("grounding"):
+            ctl.ground([("step", [num_states_sym]), ("check", [num_states_sym])])
+        ctl.assign_external(clingo.Function("goalState", [num_states_sym]), True)
+        ctl.assign_external(clingo.Function("query", [num_states_sym]), True)
+
+        asp_output_file = os.path.join(
+            fond_problem.output_dir, f"{ASP_CLINGO_OUTPUT_PREFIX}{num_states}.out"
+        )
+        # grounding this size used part of the time left (charged with the solving time below)
+        solve_time_left = max(time_left - (time.time() - start_time), 0.1)
+        status = _solve_and_save(
+            ctl, num_states, inc_model, asp_output_file, solve_time_left, stats="--stats" in clingo_args
+        )
+        record_size(num_states, _SIZE_RESULTS[status], time.time() - start_time)
+
+        if status == "SATISFIABLE":
+            _logger.info("Solution found!")
+            _logger.info(f"Number of states in controller: {num_states+1}")
+            return True  # yes, found solution!
+        elif status == "TIMEOUT":
+            _logger.error(f"Time limit reached with {num_states} controller states")
+            return False
+
+        # not a solution yet: state num_states will not be the goal state again
+        ctl.release_external(clingo.Function("query", [num_states_sym]))
+        ctl.release_external(clingo.Function("goalState", [num_states_sym]))
+        time_left -= time.time() - start_time
+
+    return False  # have tried all sizes and no solution found!
+
+
+def solve_asp_ground_once(fond_problem: FONDProblem, strategy: Generator[int, tuple[bool, float], int | None]) -> bool:
+    """
+    Solves the controller-size loop by grounding the controller model once for a bound on the number of controller
+    states and probing each size with assumptions on the externals activeState/1 and goalAt/1 (see
+    controller-common.lp).
+
+    The bound starts at GROUND_ONCE_FIRST_BOUND and is doubled (up to max_states) whenever the strategy asks for a
+    larger size, so a problem with a small controller is not grounded for max_states. The sizes to probe are given
+    by a size search strategy (see SIZE_SEARCH_STRATEGIES in asp.py). Unsatisfiable cores are recorded: a later
+    probe (under the same grounding) whose assumptions contain a recorded core is unsatisfiable as well, and is
+    not solved again. One clingo output file per size solved is written, so that the controller can be built and
+    verified afterwards.
+
+    :param fond_problem: FOND problem with all the info needed
+    :param strategy: size search strategy (generator), already initialised with the sizes to consider
+    :return: True if a solution was found, False otherwise
+    """
+    _logger: logging.Logger = _get_logger()
+    _warn_memory_limit(fond_problem)
+    input_files = [fond_problem.controller_model] + list(fond_problem.controller_constraints.values())
+
+    # copy the ASP files used to the output directory (instance and e.g. backbone.lp already there!)
+    for f in input_files:
+        if os.path.dirname(os.path.abspath(f)) != os.path.abspath(fond_problem.output_dir):
+            shutil.copy(f, fond_problem.output_dir, follow_symlinks=True)
+
+    time_left = float("inf")  # default
+    if fond_problem.time_limit is not None:
+        time_left = fond_problem.time_limit
+
+    bound = 0  # number of controller states grounded for
+    probes = []  # (size, satisfiable, time) of each probe, in order
+    solution_size = None
+    try:
+        num_states = next(strategy)
+        while True:
+            start_time = time.time()
+            if num_states > bound:
+                bound = min(fond_problem.max_states, max(num_states, 2 * bound, GROUND_ONCE_FIRST_BOUND))
+                _logger.info(f"Grounding controller model once for {bound+1} controller states")
+                with timed("grounding"):
+                    ctl, active_lits, goal_lits = _ground_bounded(fond_problem, input_files, bound)
+                cores = []  # unsatisfiable cores found so far (sets of assumption literals of this grounding)
+                _logger.info(
+                    f"Grounding done in {time.time() - start_time:.2f}s - "
+                    f"Time left: {time_left - (time.time() - start_time):.2f}"
+                )
+
+            assumptions = [active_lits[s] if s <= num_states else -active_lits[s] for s in active_lits]
+            assumptions += [goal_lits[s] if s == num_states else -goal_lits[s] for s in goal_lits]
+
+            if any(core <= set(assumptions) for core in cores):
+                _logger.info(f"Controller states={num_states} is UNSAT (by a previous unsatisfiable core)")
+                status = "UNSATISFIABLE"
+            else:
+                _logger.info(
+                    f"Solving with number of controller states={num_states} - Time left: {time_left:.2f}"
+                )
+                asp_output_file = os.path.join(
+                    fond_problem.output_dir, f"{ASP_CLINGO_OUTPUT_PREFIX}{num_states}.out"
+                )
+                # grounding (if done for this size) used part of the time left, charged with the probe time below
+                status = _solve_and_save(
+                    ctl,
+                    num_states,
+                    fond_problem.controller_model,
+                    asp_output_file,
+                    max(time_left - (time.time() - start_time), 0.1),
+                    assumptions=assumptions,
+                    on_core=lambda core: cores.append(set(core)),
+                    stats="--stats" in fond_problem.clingo_args,
+                )
+                if status == "TIMEOUT":
+                    record_size(num_states, _SIZE_RESULTS[status], time.time() - start_time)
+                    _logger.error(f"Time limit reached with {num_states} controller states")
+                    return False
+
+            satisfiable = status == "SATISFIABLE"
+            probe_time = time.time() - start_time
+            record_size(num_states, _SIZE_RESULTS[status], probe_time)
+            probes.append((num_states, satisfiable, probe_time))
+            _logger.info(
+                f"Controller states={num_states} is {'SAT' if satisfiable else 'UNSAT'} ({probe_time:.2f}s)"
+            )
+            time_left -= probe_time
+
+            # ask the strategy for the next size to try
+            num_states = strategy.send((satisfiable, probe_time))
+    except StopIteration as e:
+        solution_size = e.value
+    finally:
+        _logger.info(
+            "Sizes probed (ground once): "
+            + ", ".join(f"{n} ({'SAT' if sat else 'UNSAT'}, {t:.2f}s)" for n, sat, t in probes)
+        )
+        # drop output of larger (SAT) sizes probed on the way, also when the search stopped early (time limit): the
+        # smallest controller found is then the only one left
+        smallest_sat = keep_smallest_sat_output(fond_problem.output_dir, [n for n, sat, _ in probes if sat])
+        if solution_size is None and smallest_sat is not None:
+            _logger.warning(
+                f"Size search stopped before the controller found with {smallest_sat+1} states was proven minimal."
+            )
+
+    if solution_size is None:
+        return False  # have tried all sizes and no solution found!
+
+    _logger.info("Solution found!")
+    _logger.info(f"Number of states in controller: {solution_size+1}")
+    return True  # yes, found solution!
+
+
+def _ground_bounded(
+    fond_problem: FONDProblem, input_files: list[str], bound: int
+) -> tuple[clingo.Control, dict[int, int], dict[int, int]]:
+    """
+    Grounds the controller model for up to bound controller states (numStates = bound, with boundedStates=1)
+    :param fond_problem: FOND problem with all the info needed
+    :param input_files: controller model and extra constraint files
+    :param bound: number of controller states to ground for
+    :return: clingo control, and the program literals of the externals activeState/1 and goalAt/1 of each state
+    """
+    clingo_args = [a for a in fond_problem.clingo_args if a not in UNSUPPORTED_CLINGO_ARGS]
+    clingo_args += ["-c", f"numStates={bound}", "-c", "boundedStates=1"]
+    ctl = clingo.Control(clingo_args, logger=_clingo_logger)
+    load_instance(ctl, fond_problem)
+    for f in input_files:
+        ctl.load(f)
+    ctl.ground([("base", [])])
+
+    # program literals of the externals, to tell which recorded cores apply to a probe
+    active_lits = {s: _external_literal(ctl, "activeState", s) for s in range(1, bound + 1)}
+    goal_lits = {s: _external_literal(ctl, "goalAt", s) for s in range(1, bound + 1)}
+    for lit in list(active_lits.values()) + list(goal_lits.values()):
+        ctl.assign_external(lit, None)  # free (not false), so that assumptions decide their value
+    return ctl, active_lits, goal_lits
+
+
+def _warn_memory_limit(fond_problem: FONDProblem):
+    # the memory limit is enforced by watching external processes, and clingo runs within the planner process here
+    if fond_problem.memory_limit is not None:
+        _get_logger().warning(
+            f"Memory limit ({fond_problem.memory_limit} MB) not applied to Clingo with engine {fond_problem.engine} "
+            f"(in-process)."
+        )
+
+
+def load_instance(ctl: clingo.Control, fond_problem: FONDProblem):
+    """
+    Adds the planning instance to a clingo control: straight from memory if kept there (see get_instance_facts),
+    or from the instance file otherwise
+    :param ctl: clingo control
+    :param fond_problem: FOND problem with all the info needed
+    """
+    if fond_problem.instance_facts is not None:
+        add_instance(ctl, *fond_problem.instance_facts)
+    else:
+        ctl.load(fond_problem.instance_file)
+
+
+def _external_literal(ctl: clingo.Control, name: str, state: int) -> int:
+    """
+    Returns the program literal of a ground external atom name(state)
+    :param ctl: clingo control with the program already grounded
+    :param name: name of the external (e.g., activeState)
+    :param state: controller state
+    :return: solver literal of the atom
+    """
+    return ctl.symbolic_atoms[clingo.Function(name, [clingo.Number(state)])].literal
+
+
+def _solve_and_save(
+    ctl: clingo.Control,
+    num_states: int,
+    model: str,
+    output_file: str,
+    time_limit: float,
+    assumptions: Sequence[int] = (),
+    on_core: Callable[[Sequence[int]], None] | None = None,
+    stats: bool = False,
+) -> str:
+    """
+    Solves the current program and saves the result as a clingo output file (same format as the clingo binary)
+    :param ctl: clingo control with the program grounded up to num_states
+    :param num_states: number of controller states being probed
+    :param model: model used (for the record)
+    :param output_file: clingo output file for this size
+    :param time_limit: time limit for the solve call (in seconds)
+    :param assumptions: solver literals assumed true for this solve call
+    :param on_core: called with the unsatisfiable core (subset of assumptions) if the call is unsatisfiable
+    :param stats: also save the statistics of the solve call (as clingo --stats prints them)
+    :return: SATISFIABLE, UNSATISFIABLE or TIMEOUT
+    """
+    answer = []
+
+    def on_model(model: clingo.Model):
+        answer.clear()
+        answer.extend(str(s) for s in model.symbols(shown=True))
+
+    with open(output_file, "w") as file_out:
+        file_out.write(f"Time start: {get_now()}\n\n")
+        file_out.write(f"clingo (multi-shot) {model} -c numStates={num_states}\n")
+        file_out.write("Solving...\n")
+
+        start_time = time.time()
+        with ctl.solve(assumptions=list(assumptions), on_model=on_model, on_core=on_core, async_=True) as handle:
+            finished = handle.wait(time_limit if time_limit < float("inf") else None)
+            if not finished:
+                handle.cancel()
+                file_out.write(f"Solving timed out after {time_limit:.2f} seconds\n")
+                status = "TIMEOUT"
+            else:
+                result = handle.get()
+                if result.satisfiable:
+                    file_out.write("Answer: 1\n")
+                    file_out.write(" ".join(answer))
+                    file_out.write("\n")
+                    status = "SATISFIABLE"
+                else:
+                    status = "UNSATISFIABLE"
+                file_out.write(f"{status}\n")
+                if stats:
+                    _write_stats(file_out, ctl.statistics)
+
+        file_out.write(f"\nTime: {time.time() - start_time:.3f}s\n")
+        file_out.write(f"\nTime end: {get_now()}\n")
+
+    return status
+
+
+def _write_stats(file_out, statistics: dict):
+    """
+    Writes the top-level statistics of the last solve call in the format of clingo --stats, to be collected by
+    parse_clingo_stats like those of the clingo binary. Times are those of the solve call: the grounding of the size
+    is done before it (and is in the run metrics).
+    :param file_out: clingo output file, open for writing
+    :param statistics: statistics of the clingo control (ctl.statistics)
+    """
+    summary = statistics["summary"]
+    solvers = statistics["solving"]["solvers"]
+    lp = statistics["problem"]["lp"]
+    generator = statistics["problem"]["generator"]
+    models = int(summary["models"]["enumerated"])
+    more = "+" if models > 0 and not summary["exhausted"] else ""
+    times = summary["times"]
+    constraints = generator["constraints"] + generator["constraints_binary"] + generator["constraints_ternary"]
+    file_out.write("\n")
+    file_out.write(f"Models       : {models}{more}\n")
+    file_out.write(f"Calls        : {int(summary['call']) + 1}\n")
+    file_out.write(
+        f"Time         : {times['total']:.3f}s (Solving: {times['solve']:.2f}s 1st Model: {times['sat']:.2f}s "
+        f"Unsat: {times['unsat']:.2f}s)\n"
+    )
+    file_out.write(f"CPU Time     : {times['cpu']:.3f}s\n\n")
+    file_out.write(f"Choices      : {int(solvers['choices'])}\n")
+    file_out.write(f"Conflicts    : {int(solvers['conflicts'])}\n")
+    file_out.write(f"Restarts     : {int(solvers['restarts'])}\n\n")
+    file_out.write(f"Rules        : {int(lp['rules_tr'])}\n")
+    file_out.write(f"Atoms        : {int(lp['atoms'] + lp['atoms_aux'])}\n")
+    file_out.write(f"Bodies       : {int(lp['bodies_tr'])}\n")
+    file_out.write(f"Variables    : {int(generator['vars'])}\n")
+    file_out.write(f"Constraints  : {int(constraints)}\n")
+
+
+def _clingo_logger(code: clingo.MessageCode, message: str):
+    # atoms that are only defined in later steps (e.g., goalState/1) trigger info messages
+    _get_logger().debug(f"clingo: {message}")
+
+
+def _get_logger() -> logging.Logger:
+    logger = logging.getLogger(__name__)
+    coloredlogs.install(level=DEBUG_LEVEL, logger=logger)
+    return logger
@@ -0,0 +1,134 @@
+"""
+Portfolio solving: races several controller models (e.g., fondsat, regression and strong) on the same translated
+instance, and keeps the controller of the first one to find a solution.
+
+Each model runs the whole controller-size loop in a forked process with its own output folder
+(OUTPUT/portfolio/<model>, with a log file). Once a model finds a controller, the other ones are killed (together
+with their clingo processes) and the winner's clingo output files are copied to the main output folder, so the
+controller can be built and verified as usual. The winner is recorded in file portfolio.out.
+"""
+import dataclasses
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Callable
+
+import coloredlogs
+
+from cfondasp.base.config import FILE_PORTFOLIO
+from cfondasp.base.elements import FONDProblem
+from cfondasp.checker.verify import _get_file_id, _get_last_output_file, _get_status
+from cfondasp.utils.metrics import record_phase, save_metrics
+from cfondasp.utils.system_utils import get_now, kill_process_tree
+
+DEBUG_LEVEL = "INFO"
+
+# extra time (in seconds) given to the models over the time limit before they are killed
+PORTFOLIO_KILL_GRACE = 10
+
+
+def solve_asp_portfolio(fond_problem: FONDProblem, min_states: int, solve_sizes: Callable[[FONDProblem, int], None]) -> bool:
+    """
+    Races the controller models in fond_problem.portfolio, and keeps the controller of the first one to find one
+    :param fond_problem: FOND problem with all the info needed (instance already generated)
+    :param min_states: minimum number of controller states to try
+    :param solve_sizes: function solving the controller-size loop for a problem (see asp.py)
+    :return: True if a solution was found, False otherwise
+    """
+    _logger: logging.Logger = _get_logger()
+    context = multiprocessing.get_context("fork")
+    start_time = time.time()
+
+    racers = {}  # sentinel -> (model, process, output folder)
+    for model in fond_problem.portfolio:
+        model_file = os.path.join(os.path.dirname(fond_problem.controller_model), f"controller-{model}.lp")
+        output_dir = os.path.join(fond_problem.output_dir, "portfolio", model)
+        os.makedirs(output_dir)
+        racer_problem = dataclasses.replace(
+            fond_problem,
+            controller_model=model_file,
+            output_dir=output_dir,
+            controller_constraints=dict(fond_problem.controller_constraints),
+            portfolio=None,
+        )
+        process = context.Process(target=_race, args=(racer_problem, min_states, solve_sizes), name=model)
+        process.start()
+        racers[process.sentinel] = (model, process, output_dir)
+    _logger.info(f"Racing controller models: {', '.join(fond_problem.portfolio)}")
+
+    deadline = None
+    if fond_problem.time_limit is not None:
+        deadline = start_time + fond_problem.time_limit + PORTFOLIO_KILL_GRACE
+
+    winner = None
+    while racers and winner is None:
+        ready = wait(racers.keys(), timeout=max(0, deadline - time.time()) if deadline is not None else None)
+        if not ready:
+            _logger.error(f"Time limit reached: {fond_problem.time_limit} seconds")
+            break
+        for sentinel in ready:
+            model, process, output_dir = racers.pop(sentinel)
+            process.join()
+            if process.exitcode == 0 and winner is None:
+                winner = (model, output_dir)
+            else:
+                _logger.info(f"Model {model} finished without a controller (exit code {process.exitcode})")
+
+    # kill the models still running
+    for model, process, _ in racers.values():
+        kill_process_tree(process.pid)
+        process.join()
+        _logger.info(f"Model {model} stopped")
+
+    record_phase("portfolio", time.time() - start_time)
+    with open(os.path.join(fond_problem.output_dir, FILE_PORTFOLIO), "w") as f:
+        f.write(f"Models: {' '.join(fond_problem.portfolio)}\n")
+        f.write(f"Winner: {winner[0] if winner is not None else None}\n")
+        f.write(f"Time: {time.time() - start_time:.3f}s\n")
+        f.write(f"Time end: {get_now()}\n")
+
+    if winner is None:
+        return False
+
+    # the winner's clingo output (and ASP files used) become the output of the whole run
+    model, output_dir = winner
+    for f in os.listdir(output_dir):
+        if os.path.isfile(os.path.join(output_dir, f)) and Path(f).suffix in [".out", ".lp"]:
+            shutil.copy(os.path.join(output_dir, f), fond_problem.output_dir)
+
+    _logger.info(f"Model {model} won the race ({time.time() - start_time:.2f}s)")
+    _logger.info("Solution found!")
+    _logger.info(f"Number of states in controller: {_get_file_id(_get_last_output_file(output_dir)) + 1}")
+    return True
+
+
+def _race(fond_problem: FONDProblem, min_states: int, solve_sizes: Callable[[FONDProblem, int], None]):
+    """
+    Solves the controller-size loop for one model of the portfolio (in a forked process), with its output going to
+    a log file in its output folder. Exits with code 0 if a controller was found, 1 otherwise.
+    :param fond_problem: FOND problem for this model
+    :param min_states: minimum number of controller states to try
+    :param solve_sizes: function solving the controller-size loop for a problem (see asp.py)
+    """
+    log = os.open(os.path.join(fond_problem.output_dir, "portfolio.log"), os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+    os.dup2(log, sys.stdout.fileno())
+    os.dup2(log, sys.stderr.fileno())
+
+    start_time = time.time()
+    solve_sizes(fond_problem, min_states)
+    save_metrics(fond_problem.output_dir, time.time() - start_time)
+
+    last_output_file = _get_last_output_file(fond_problem.output_dir)
+    solved = last_output_file is not None and _get_status(os.path.join(fond_problem.output_dir, last_output_file)) == "SOLVED"
+    sys.exit(0 if solved else 1)
+
+
+def _get_logger() -> logging.Logger:
+    logger = logging.getLogger(__name__)
+    coloredlogs.install(level=DEBUG_LEVEL, logger=logger)
+    return logger
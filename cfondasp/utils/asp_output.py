@@ -1,6 +1,9 @@
+import json
 import os
 import re
 from cfondasp.base.config import (
+    ASP_CLINGO_OUTPUT_PREFIX,
+    FILE_CLINGO_STATS,
     DETERMINISTIC_ACTION_SUFFIX,
     ASP_OUT_LINE_END,
     ASP_OUT_DIVIDER,
@@ -10,6 +13,24 @@ re_holds = r"holds\((?P<state>[\d]+),(?P<variable>[\d]+),(?P<value>[\d]+)\)"
 re_transition = r"transition\((?P<from>[\d]+),\"(?P<action>[\a-z-\(\d\,\)]+)\",(?P<to>[\d]+)\)"
 re_policy = r"policy\((?P<from>[\d]+),\"(?P<action>[\a-z-\(\d\,\)]+)\"\)"
 re_action = rf"(?P<action>[a-z-\d]+){DETERMINISTIC_ACTION_SUFFIX}[\d]+(?P<arguments>\([a-z-\d,]+\))"
+re_clingo_out_file = rf"{ASP_CLINGO_OUTPUT_PREFIX}(?P<num_states>[\d]+)\.out"
+re_stats_time = r"Time\s*:\s*(?P<time>[\d.]+)s \(Solving: (?P<solving>[\d.]+)s 1st Model: (?P<first_model>[\d.]+)s Unsat: (?P<unsat>[\d.]+)s\)"
+re_stats_line = r"(?P<key>[A-Z][A-Za-z ]*?)\s*:\s*(?P<value>[\d.]+)(?P<more>\+?)"
+
+# clingo --stats summary lines kept (top-level ones only) -> name of the field in the stats record
+CLINGO_STATS_FIELDS = {
+    "Models": "models",
+    "Calls": "calls",
+    "CPU Time": "cpu_time",
+    "Choices": "choices",
+    "Conflicts": "conflicts",
+    "Restarts": "restarts",
+    "Rules": "rules",
+    "Atoms": "atoms",
+    "Bodies": "bodies",
+    "Variables": "variables",
+    "Constraints": "constraints",
+}
 
 
 def parse_undo_actions(clingo_output_file: str):
@@ -26,12 +47,90 @@ def parse_undo_actions(clingo_output_file: str):
     return undo_actions
 
 
+def parse_clingo_stats(clingo_output_file: str) -> dict | None:
+    """
+    Parses the statistics printed by clingo --stats in a clingo output file
+    Grounding time is not reported by clingo on its own: it is taken as the total time minus the solving time.
+    :param clingo_output_file: clingo output file (e.g., clingo_out_5.out)
+    :return: dictionary with the statistics (times in seconds), or None if there are no statistics in the file
+    """
+    with open(clingo_output_file) as f:
+        data = f.readlines()
+
+    stats = {}
+    for line in data:
+        if line.startswith(" "):
+            continue  # detail lines (e.g., "  Binary : ...")
+        result = re.match(re_stats_time, line)
+        if result is not None:
+            stats["time"] = float(result.group("time"))
+            stats["solving_time"] = float(result.group("solving"))
+            stats["grounding_time"] = round(stats["time"] - stats["solving_time"], 3)
+            stats["first_model_time"] = float(result.group("first_model"))
+            stats["unsat_time"] = float(result.group("unsat"))
+            continue
+        result = re.match(re_stats_line, line)
+        if result is not None and result.group("key") in CLINGO_STATS_FIELDS:
+            value = result.group("value")
+            field = CLINGO_STATS_FIELDS[result.group("key")]
+            stats[field] = float(value.rstrip("s")) if "." in value else int(value)
+            if field == "models":
+                stats["more_models"] = result.group("more") == "+"
+        elif line.strip() in ["SATISFIABLE", "UNSATISFIABLE", "UNKNOWN", "OPTIMUM FOUND"]:
+            stats["result"] = line.strip()
+
+    if "choices" not in stats:
+        return None
+    return stats
+
+
+def save_clingo_stats(output_dir: str) -> int:
+    """
+    Collects the clingo statistics of every controller size tried into a JSONL file (one record per size, in order)
+    :param output_dir: output folder of the run
+    :return: number of records saved (clingo output files with statistics)
+    """
+    records = []
+    for f in os.listdir(output_dir):
+        result = re.match(re_clingo_out_file, f)
+        if result is None:
+            continue
+        stats = parse_clingo_stats(os.path.join(output_dir, f))
+        if stats is not None:
+            records.append({"num_states": int(result.group("num_states")), **stats})
+
+    if records:
+        with open(os.path.join(output_dir, FILE_CLINGO_STATS), "w") as f:
+            for record in sorted(records, key=lambda r: r["num_states"]):
+                f.write(json.dumps(record) + "\n")
+    return len(records)
+
+
+def keep_smallest_sat_output(output_dir: str, sat_sizes: list[int]) -> int | None:
+    """
+    Removes the clingo output files of the SAT sizes probed but the smallest one, so that no larger controller is
+    reported for the run, also when the size search stopped before proving the smallest one minimal
+    :param output_dir: output folder of the run
+    :param sat_sizes: controller sizes (numStates) found SAT
+    :return: smallest SAT size, None if there is none
+    """
+    if not sat_sizes:
+        return None
+    smallest = min(sat_sizes)
+    for num_states in set(sat_sizes):
+        output_file = os.path.join(output_dir, f"{ASP_CLINGO_OUTPUT_PREFIX}{num_states}.out")
+        if num_states > smallest and os.path.exists(output_file):
+            os.remove(output_file)
+    return smallest
+
+
 def parse_clingo_output(log_file: str, out_file: str):
     """Parse a Clingo output answer model and produce corresponding controller solution file"""
     if os.path.exists(out_file):
         os.remove(out_file)
     atoms_dict = get_atoms(log_file)
-    for answer, atoms in atoms_dict.items():
+    # the last answer is the best one (e.g., when minimizing the number of controller states)
+    for answer, atoms in list(atoms_dict.items())[-1:]:
         transitions = {}
         state_variables = {}
         policy = {}
@@ -48,6 +48,34 @@ def write_strict_constraints(backbone, constraint_file):
         f.writelines(backbone_constraints)
 
 
+def create_backbone_heuristics(backbone: List[tuple[str, str]], heuristic_file: str):
+    """
+    Backbone heuristics make Clingo (with --heuristic=Domain) prefer to follow the backbone in the controller: when
+    it decides on a backbone atom, it tries it true first (sign modifier). No other controller is forbidden, so the
+    search stays complete; and the order of decisions is left to Clingo, so UNSAT sizes are not slowed down. The
+    backbone is laid out as in the strict constraints: the i-th action of the weak plan at controller state i, and
+    its effect leading to state i+1 (to the goal state for the last action). For example,
+    #heuristic policy(0, "climb(p0)") : state(0). [1, sign]
+    #heuristic transition(0, "e1", 1) : state(0), state(1). [1, sign]
+
+    :param backbone: list of (action, effect) of the weak plan, in order
+    :param heuristic_file: file where to write the heuristic directives
+    :return:
+    """
+    directives = []
+    for state, (action, effect) in enumerate(backbone):
+        directives.append(f'#heuristic policy({state}, "{action}") : state({state}). [1, sign]\n')
+        if state + 1 == len(backbone):
+            directives.append(f'#heuristic transition({state}, "{effect}", X) : state({state}), goalState(X). [1, sign]\n')
+        else:
+            directives.append(
+                f'#heuristic transition({state}, "{effect}", {state + 1}) : state({state}), state({state + 1}). [1, sign]\n'
+            )
+
+    with open(heuristic_file, "w") as f:
+        f.writelines(directives)
+
+
 def write_loose_constraints(backbone, constraint_file):
     policy_constraints = []
     num_actions = len(backbone)
@@ -124,12 +152,13 @@ def get_backbone_asp(clingo_output: str) -> List[tuple[str, str]]:
     if not policy_str:
         return backbone
 
-    policy_tuples = policy_str.split(" ")
-    policy_tuples.remove(DUMMY_POLICY)
+    policy_tuples = [p for p in policy_str.split() if p != DUMMY_POLICY]
+    steps = []
     for _p in policy_tuples:
         result = re.match(re_policy_effect, _p)
-        action = result.group("action")
-        effect = result.group("effect")
+        steps.append((int(result.group("from")), result.group("action"), result.group("effect")))
+    # clingo does not show the atoms of a model in any particular order
+    for _, action, effect in sorted(steps):
         backbone.append((action, effect))
 
     return backbone
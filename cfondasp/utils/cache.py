@@ -0,0 +1,133 @@
+"""
+A small content-addressed file cache on disk, shared by runs of the planner.
+
+Each entry is a folder named after a hash of everything its files depend on (e.g., input file contents, binaries
+and arguments used to produce them), so an entry never needs invalidating: different inputs give a different key.
+The cache is kept under a size budget by evicting the least recently used entries (last use = folder mtime).
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+
+import coloredlogs
+
+LOG_LEVEL = "INFO"
+
+
+def get_content_hash(parts: list[str | bytes]) -> str:
+    """
+    Returns a hash of the given parts. Strings that are paths to existing files are hashed by their content.
+    :param parts: file paths, strings or bytes the cached files depend on
+    :return: hex digest to be used as cache key
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str) and os.path.isfile(part):
+            with open(part, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        elif isinstance(part, str):
+            digest.update(part.encode())
+        else:
+            digest.update(part)
+        digest.update(b"\0")  # separator, so that ("ab", "c") and ("a", "bc") differ
+    return digest.hexdigest()
+
+
+def cache_lookup(cache_dir: str, key: str, files: dict[str, str]) -> bool:
+    """
+    Copies the files of a cache entry to their destinations, if the entry exists.
+    :param cache_dir: root folder of the cache
+    :param key: key of the entry (see get_content_hash)
+    :param files: name of each file in the entry -> destination path
+    :return: True if the entry was found (and all its files copied), False otherwise
+    """
+    entry_dir = os.path.join(cache_dir, key)
+    if not all(os.path.isfile(os.path.join(entry_dir, name)) for name in files):
+        _get_logger().info(f"Cache miss: {key[:12]} in {cache_dir}")
+        return False
+
+    for name, dest in files.items():
+        shutil.copyfile(os.path.join(entry_dir, name), dest)
+    os.utime(entry_dir)  # mark as recently used
+    _get_logger().info(f"Cache hit: {key[:12]} in {cache_dir}")
+    return True
+
+
+def cache_entry_file(cache_dir: str, key: str, name: str) -> str | None:
+    """
+    Returns the path of a file in a cache entry, to be read in place (i.e., without copying it out of the cache).
+    :param cache_dir: root folder of the cache
+    :param key: key of the entry (see get_content_hash)
+    :param name: name of the file in the entry
+    :return: path to the file, or None if the entry or file does not exist
+    """
+    entry_dir = os.path.join(cache_dir, key)
+    if not os.path.isfile(os.path.join(entry_dir, name)):
+        _get_logger().info(f"Cache miss: {key[:12]} in {cache_dir}")
+        return None
+
+    os.utime(entry_dir)  # mark as recently used
+    _get_logger().info(f"Cache hit: {key[:12]} in {cache_dir}")
+    return os.path.join(entry_dir, name)
+
+
+def cache_store(cache_dir: str, key: str, files: dict[str, str], max_size: int):
+    """
+    Stores files as a cache entry, and then evicts least recently used entries (but the new one) while the cache is
+    over budget. The entry is written to a temporary folder first and renamed, so concurrent runs never see partial
+    entries.
+    :param cache_dir: root folder of the cache
+    :param key: key of the entry (see get_content_hash)
+    :param files: name of each file in the entry -> source path
+    :param max_size: maximum size of the whole cache (in bytes)
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    entry_dir = os.path.join(cache_dir, key)
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=cache_dir)
+    for name, src in files.items():
+        shutil.copyfile(src, os.path.join(tmp_dir, name))
+    try:
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        # another run stored the same entry meanwhile
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    _get_logger().debug(f"Cache store: {key[:12]} in {cache_dir}")
+
+    evict_entries(cache_dir, max_size, keep=key)
+
+
+def evict_entries(cache_dir: str, max_size: int, keep: str | None = None):
+    """
+    Removes least recently used entries until the cache takes at most max_size bytes.
+    :param cache_dir: root folder of the cache
+    :param max_size: maximum size of the whole cache (in bytes)
+    :param keep: key of an entry that must not be removed (e.g., the one just stored, about to be used)
+    """
+    entries = []  # (last use, size, path)
+    for entry in os.scandir(cache_dir):
+        if not entry.is_dir() or entry.name.startswith(".tmp-"):
+            continue
+        try:
+            size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+            entries.append((entry.stat().st_mtime, size, entry.path))
+        except FileNotFoundError:
+            continue  # evicted by another run meanwhile
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= max_size:
+            break
+        if os.path.basename(path) == keep:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total_size -= size
+        _get_logger().debug(f"Cache evicted: {os.path.basename(path)[:12]} ({size} bytes)")
+
+
+def _get_logger() -> logging.Logger:
+    logger = logging.getLogger(__name__)
+    coloredlogs.install(level=LOG_LEVEL, logger=logger)
+    return logger
@@ -1,5 +1,6 @@
 from typing import List
 from itertools import combinations
+import clingo
 import numpy as np
 
 from cfondasp.utils.asp_output import parse_undo_actions
@@ -10,7 +11,6 @@ from cfondasp.base.config import (
     ASP_AFFECTS_TERM,
     ASP_DEL_TERM,
     ASP_EFFECT_COUNT_TERM,
-    ASP_EFFECT_TERM,
     ASP_GOAL_STATE_TERM,
     ASP_GOAL_TERM,
     ASP_NDSIZE_TERM,
@@ -25,57 +25,70 @@ from cfondasp.base.config import (
     ASP_ACTION_TYPE_TERM,
 )
 from cfondasp.base.elements import Variable, State, Action
+from cfondasp.base.symbols import effect_name
 
 
-def write_variables(file, variables: List[Variable]):
+def write_variables(file, variables: List[Variable], domains: dict[int, List[int]] = None):
     with open(file, "w+") as f:
-        f.write(f"{ASP_VARIABLE_TERM}(0..{len(variables) - 1}).\n")
-        for var_id in range(len(variables)):
-            var = variables[var_id]
-            f.write(f"{ASP_VARIABLE_ATOM_TERM}({var_id}, 0..{len(var.domain) - 1}).\n")
+        if domains is None:
+            f.write(f"{ASP_VARIABLE_TERM}(0..{len(variables) - 1}).\n")
+            for var_id in range(len(variables)):
+                var = variables[var_id]
+                f.write(f"{ASP_VARIABLE_ATOM_TERM}({var_id}, 0..{len(var.domain) - 1}).\n")
+        else:
+            # only the variables and values left by the simplifications (see simplify.py)
+            for var_id, values in domains.items():
+                f.write(f"{ASP_VARIABLE_TERM}({var_id}).\n")
+                for val in values:
+                    f.write(f"{ASP_VARIABLE_ATOM_TERM}({var_id}, {val}).\n")
         f.write("\n")
 
 
-def write_mutex(file, mutexs: List[State]):
+def write_mutex(file, mutexs: List[State], domains: dict[int, List[int]] = None):
     if len(mutexs) == 0:
         return
 
     variables: List[Variable] = mutexs[0].variables
+    if domains is None:
+        domains = {var_id: list(range(len(var.domain))) for var_id, var in enumerate(variables)}
     counter = 0
     with open(file, "a") as f:
         for idx in range(len(mutexs)):
             state: State = mutexs[idx]
-            count = np.count_nonzero(np.array(state.values) != -1)
-            if count > 1:
+            group = [
+                (var_id, val)
+                for var_id, val in enumerate(state.values)
+                if val != -1 and var_id in domains and val in domains[var_id]
+            ]
+            if len(group) > 1:
                 counter += 1
                 f.write(f"{ASP_MUTEX_GROUP_TERM}({counter}).\n")
-                for var_id in range(len(state.variables)):
-                    val = state.values[var_id]
-                    if val != -1:
-                        f.write(f"{ASP_MUTEX_TERM}({counter}, {var_id}, {val}).\n")
+                for var_id, val in group:
+                    f.write(f"{ASP_MUTEX_TERM}({counter}, {var_id}, {val}).\n")
 
-        for var_id in range(len(variables)):
-            variable = variables[var_id]
+        for var_id, values in domains.items():
             counter += 1
             f.write(f"{ASP_MUTEX_GROUP_TERM}({counter}).\n")
-            for i in range(len(variable.domain)):
+            for i in values:
                 f.write(f"{ASP_MUTEX_TERM}({counter}, {var_id}, {i}).\n")
         f.write("\n")
 
 
-def write_initial_state(file, state: State, encoding="both"):
+def write_initial_state(file, state: State, encoding="both", domains: dict[int, List[int]] = None):
     if encoding == "pos":
-        write_initial_state_positive(file, state)
+        write_initial_state_positive(file, state, domains)
     elif encoding == "neg":
-        write_initial_state_negated(file, state)
+        write_initial_state_negated(file, state, domains)
     else:
-        write_initial_state_positive(file, state)
-        write_initial_state_negated(file, state)
+        write_initial_state_positive(file, state, domains)
+        write_initial_state_negated(file, state, domains)
 
 
-def write_initial_state_positive(file, state: State):
+def write_initial_state_positive(file, state: State, domains: dict[int, List[int]] = None):
     with open(file, "a") as f:
         for var_idx, var in enumerate(state.variables):
+            if domains is not None and var_idx not in domains:
+                continue
             val = state.values[var_idx]
             f.write(
                 f"{ASP_HOLDS_TERM}(X, {var_idx}, {val}):- {ASP_INITIAL_STATE_TERM}(X).\n"
@@ -84,12 +97,15 @@ def write_initial_state_positive(file, state: State):
         f.write("\n")
 
 
-def write_initial_state_negated(file, state: State):
+def write_initial_state_negated(file, state: State, domains: dict[int, List[int]] = None):
     with open(file, "a") as f:
         for var_idx, var in enumerate(state.variables):
+            if domains is not None and var_idx not in domains:
+                continue
             val = state.values[var_idx]
             # f.write(f"{ASP_HOLDS_TERM}(X, {var_idx}, {val}):- {ASP_INITIAL_STATE_TERM}(X).\n")
-            other_values = [i for i in range(len(var.domain)) if i != val]
+            values = domains[var_idx] if domains is not None else range(len(var.domain))
+            other_values = [i for i in values if i != val]
             for other_val in other_values:
                 f.write(
                     f"-{ASP_HOLDS_TERM}(X, {var_idx}, {other_val}):- {ASP_INITIAL_STATE_TERM}(X).\n"
@@ -98,11 +114,11 @@ def write_initial_state_negated(file, state: State):
         f.write("\n")
 
 
-def write_goal_state(file, state: State):
+def write_goal_state(file, state: State, domains: dict[int, List[int]] = None):
     with open(file, "a") as f:
         for var_idx, var in enumerate(state.variables):
             val = state.values[var_idx]
-            if val != -1:
+            if val != -1 and (domains is None or var_idx in domains):
                 f.write(
                     f"{ASP_HOLDS_TERM}(X, {var_idx}, {val}):- {ASP_GOAL_STATE_TERM}(X).\n"
                 )
@@ -111,18 +127,20 @@ def write_goal_state(file, state: State):
         f.write("\n")
 
 
-def write_goal(file, state: State):
+def write_goal(file, state: State, domains: dict[int, List[int]] = None):
     with open(file, "a") as f:
         for var_idx, var in enumerate(state.variables):
             val = state.values[var_idx]
-            if val != -1:
+            if val != -1 and (domains is None or var_idx in domains):
                 f.write(f"{ASP_GOAL_TERM}({var_idx}, {val}).\n")
 
         f.write("\n")
 
 
-def write_actions(file, nd_actions, variables, variable_mapping=False, precedence=True):
-    total_variables = set(range(len(variables)))
+def write_actions(file, nd_actions, variables, variable_mapping=False, precedence=True, domains: dict[int, List[int]] = None):
+    if domains is None:
+        domains = {var_idx: range(len(var.domain)) for var_idx, var in enumerate(variables)}
+    total_variables = set(domains)
     action_types = []
     max_nd_effect = 1
     with open(file, "a") as f:
@@ -136,16 +154,14 @@ def write_actions(file, nd_actions, variables, variable_mapping=False, precedenc
 
             # associate action type with action
             first_action: Action = det_actions[0]
-            _name = get_ndet_action_string(first_action)
+            _name = action_name  # the ASP name (see organize_actions)
 
             f.write(f'{ASP_ACTION_TYPE_TERM}("{action_type}", "{_name}"). \n')
             f.write(f'{ASP_ACTION_TERM}("{_name}"). \n')
 
             # precondition
-            prec: State = first_action.precondition
-            for var_idx, var in enumerate(prec.variables):
-                val = prec.values[var_idx]
-                if val != -1:
+            for var_idx, val in first_action.precondition:
+                if var_idx in domains:
                     f.write(f'{ASP_PREC_TERM}("{_name}", {var_idx}, {val}). \n')
 
             # effects
@@ -159,31 +175,25 @@ def write_actions(file, nd_actions, variables, variable_mapping=False, precedenc
                 affected_vars = set()
                 action: Action = det_actions[i]
 
-                # if num_effects == 1:
-                #     effect = f"{ASP_EFFECT_TERM}0"
-                # else:
-                effect = f"{ASP_EFFECT_TERM}{i+1}"
+                effect = effect_name(i)
 
                 f.write(f'{ASP_ACTION_EFFECT_TERM}("{_name}", "{effect}"). \n')
 
                 # add
-                for var_idx in range(len(action.add)):
-                    val = action.add[var_idx]
-                    if val != -1:
+                for var_idx, val in action.add:
+                    if var_idx in domains:
                         affected_vars.add(var_idx)
                         f.write(
                             f'{ASP_ADD_TERM}("{_name}", "{effect}", {var_idx}, {val}). \n'
                         )
 
                 # del
-                for var_idx in range(len(action.delete)):
-                    vals = action.delete[var_idx]
-                    if len(vals) > 0:
-                        for val in vals:
-                            affected_vars.add(var_idx)
-                            f.write(
-                                f'{ASP_DEL_TERM}("{_name}", "{effect}", {var_idx}, {val}). \n'
-                            )
+                for var_idx, val in action.delete:
+                    if var_idx in domains and val in domains[var_idx]:
+                        affected_vars.add(var_idx)
+                        f.write(
+                            f'{ASP_DEL_TERM}("{_name}", "{effect}", {var_idx}, {val}). \n'
+                        )
 
                 # affects
                 if variable_mapping:
@@ -198,13 +208,172 @@ def write_actions(file, nd_actions, variables, variable_mapping=False, precedenc
         if precedence and max_nd_effect > 1:
             for i in range(1, max_nd_effect):
                 f.write(
-                    f'precedence("{ASP_EFFECT_TERM}{i}", "{ASP_EFFECT_TERM}{i+1}"). \n'
+                    f'precedence("{effect_name(i - 1)}", "{effect_name(i)}"). \n'
                 )
 
         f.write(f"{ASP_NDSIZE_TERM}({max_nd_effect}).\n")
         f.write("\n")
 
 
+def get_instance_facts(
+    initial_state: State,
+    goal_state: State,
+    variables: List[Variable],
+    mutexs: List[State],
+    nd_actions,
+    initial_state_encoding="both",
+    action_var_affects=False,
+    precedence=True,
+    domains: dict[int, List[int]] = None,
+) -> tuple[List[clingo.Symbol], str]:
+    """
+    Builds the planning instance as clingo symbols, to be passed to a clingo.Control directly (see add_instance)
+    instead of being written to and parsed back from a file. Same encoding as write_variables, write_mutex,
+    write_initial_state, write_goal_state and write_actions: the (many) facts are symbols, and only the few rules
+    with variables (initial and goal states) are kept as text.
+    :param initial_state: Initial state
+    :param goal_state: Goal state
+    :param variables: Variables
+    :param mutexs: Mutually exclusive variable values (encoded as a state)
+    :param nd_actions: Dictionary mapping a non-deterministic action name to its deterministic actions
+    :param initial_state_encoding: Encoding for the initial state (neg, pos, or both)
+    :param action_var_affects: Whether to add the variables not affected by each action effect
+    :param precedence: Whether to add the precedence between effects
+    :param domains: variable index -> values to encode (see simplify.py), None: all variables and values
+    :return: list of facts and text of the rules
+    """
+    Function, String = clingo.Function, clingo.String
+    # symbols of the (small) integers used, created once: creating symbols dominates the time taken. The largest ones
+    # are variable indexes and values, mutex group counters (up to one group per mutex and per variable) and effect
+    # counts of the actions
+    max_number = max(
+        [len(variables), len(mutexs)]
+        + [len(var.domain) for var in variables]
+        + [len(det_actions) for det_actions in nd_actions.values()]
+    ) + len(variables) + 1
+    numbers = [clingo.Number(i) for i in range(max_number)]
+    Number = numbers.__getitem__
+    facts: List[clingo.Symbol] = []
+    if domains is None:
+        domains = {var_id: range(len(var.domain)) for var_id, var in enumerate(variables)}
+
+    # variables
+    for var_id, values in domains.items():
+        facts.append(Function(ASP_VARIABLE_TERM, [Number(var_id)]))
+        for val in values:
+            facts.append(Function(ASP_VARIABLE_ATOM_TERM, [Number(var_id), Number(val)]))
+
+    # mutexes, explicit ones first and then one per variable (as write_mutex)
+    counter = 0
+    if len(mutexs) > 0:
+        for state in mutexs:
+            group = [
+                (var_id, val)
+                for var_id, val in enumerate(state.values)
+                if val != -1 and var_id in domains and val in domains[var_id]
+            ]
+            if len(group) > 1:
+                counter += 1
+                facts.append(Function(ASP_MUTEX_GROUP_TERM, [Number(counter)]))
+                for var_id, val in group:
+                    facts.append(Function(ASP_MUTEX_TERM, [Number(counter), Number(var_id), Number(val)]))
+        for var_id, values in domains.items():
+            counter += 1
+            facts.append(Function(ASP_MUTEX_GROUP_TERM, [Number(counter)]))
+            for val in values:
+                facts.append(Function(ASP_MUTEX_TERM, [Number(counter), Number(var_id), Number(val)]))
+
+    # initial and goal states
+    rules = []
+    for var_idx, values in domains.items():
+        val = initial_state.values[var_idx]
+        if initial_state_encoding != "neg":
+            rules.append(f"{ASP_HOLDS_TERM}(X, {var_idx}, {val}) :- {ASP_INITIAL_STATE_TERM}(X).")
+        if initial_state_encoding != "pos":
+            for other_val in values:
+                if other_val != val:
+                    rules.append(f"-{ASP_HOLDS_TERM}(X, {var_idx}, {other_val}) :- {ASP_INITIAL_STATE_TERM}(X).")
+    for var_idx, val in enumerate(goal_state.values):
+        if val != -1 and var_idx in domains:
+            rules.append(f"{ASP_HOLDS_TERM}(X, {var_idx}, {val}) :- {ASP_GOAL_STATE_TERM}(X).")
+            facts.append(Function(ASP_GOAL_TERM, [Number(var_idx), Number(val)]))
+
+    # actions
+    total_variables = set(domains)
+    action_types = set()
+    max_nd_effect = 1
+    for action_name, det_actions in nd_actions.items():
+        first_action: Action = det_actions[0]
+        action_type = String(first_action.prefix_name)
+        if action_type not in action_types:
+            action_types.add(action_type)
+            facts.append(Function(ASP_ACTION_TYPE_TERM, [action_type]))
+
+        name = String(action_name)
+        facts.append(Function(ASP_ACTION_TYPE_TERM, [action_type, name]))
+        facts.append(Function(ASP_ACTION_TERM, [name]))
+
+        for var_idx, val in first_action.precondition:
+            if var_idx in domains:
+                facts.append(Function(ASP_PREC_TERM, [name, Number(var_idx), Number(val)]))
+
+        num_effects = len(det_actions)
+        facts.append(Function(ASP_EFFECT_COUNT_TERM, [name, Number(num_effects)]))
+        max_nd_effect = max(max_nd_effect, num_effects)
+
+        for i, action in enumerate(det_actions):
+            affected_vars = set()
+            effect = String(effect_name(i))
+            facts.append(Function(ASP_ACTION_EFFECT_TERM, [name, effect]))
+            for var_idx, val in action.add:
+                if var_idx in domains:
+                    affected_vars.add(var_idx)
+                    facts.append(Function(ASP_ADD_TERM, [name, effect, Number(var_idx), Number(val)]))
+            for var_idx, val in action.delete:
+                if var_idx in domains and val in domains[var_idx]:
+                    affected_vars.add(var_idx)
+                    facts.append(Function(ASP_DEL_TERM, [name, effect, Number(var_idx), Number(val)]))
+            if action_var_affects:
+                for var_idx in total_variables.difference(affected_vars):
+                    facts.append(Function(f"not{ASP_AFFECTS_TERM}", [name, effect, Number(var_idx)]))
+
+    if precedence and max_nd_effect > 1:
+        for i in range(1, max_nd_effect):
+            facts.append(Function("precedence", [String(effect_name(i - 1)), String(effect_name(i))]))
+    facts.append(Function(ASP_NDSIZE_TERM, [Number(max_nd_effect)]))
+
+    return facts, "\n".join(rules)
+
+
+def add_instance(ctl: clingo.Control, facts: List[clingo.Symbol], rules: str):
+    """
+    Adds the planning instance (see get_instance_facts) to the base program of a clingo.Control: the facts
+    straight into the backend (no parsing) and the rules as text. To be called before grounding the base program.
+    :param ctl: clingo control
+    :param facts: facts of the instance
+    :param rules: rules of the instance
+    """
+    with ctl.backend() as backend:
+        for fact in facts:
+            backend.add_rule([backend.add_atom(fact)])
+    ctl.add("base", [], rules)
+
+
+def write_instance(file, facts: List[clingo.Symbol], rules: str):
+    """
+    Writes the planning instance (see get_instance_facts) to a file, e.g., to be read by the clingo binary
+    :param file: File to save the encoding
+    :param facts: facts of the instance
+    :param rules: rules of the instance
+    """
+    with open(file, "w") as f:
+        for fact in facts:
+            f.write(f"{fact}.\n")
+        f.write("\n")
+        f.write(rules)
+        f.write("\n")
+
+
 def write_siblings(file, nd_actions, precedence=True):
     num_effects = {}
     max_nd_effect = 1
@@ -1,5 +1,5 @@
 import re
-from typing import List
+from typing import Iterable, Iterator, List
 from cfondasp.base.config import DETERMINISTIC_ACTION_SUFFIX
 from cfondasp.base.elements import Variable, Action, State
 from cfondasp.utils.helper_str import get_indices_between
@@ -7,6 +7,33 @@ from cfondasp.utils.helper_str import get_indices_between
 RE_ACTION_NAME = rf"(?P<prefix>[a-zA-z-_\d]+){DETERMINISTIC_ACTION_SUFFIX}[\d]+"
 
 
+def read_sas_blocks(lines: Iterable[str]) -> Iterator[tuple[str, List[str]]]:
+    """
+    Reads the blocks of a SAS file in a single pass, as the lines are read (e.g., from the file object).
+    A block is enclosed by "begin_<name>" and "end_<name>" lines, for example:
+        begin_goal
+        1
+        3 0
+        end_goal
+    is the block ("goal", ["1", "3 0"]). Lines outside blocks (e.g., the number of variables) are skipped.
+    :param lines: lines of the SAS file
+    :return: generator of block names and their (stripped) lines, in the order of the file
+    """
+    name = None
+    block: List[str] = []
+    for line in lines:
+        line = line.strip()
+        if name is None:
+            if line.startswith("begin_"):
+                name = line[len("begin_"):]
+                block = []
+        elif line == f"end_{name}":
+            yield name, block
+            name = None
+        else:
+            block.append(line)
+
+
 def get_indices_initial_state(sas_info: List[str]) -> tuple[int, int]:
     """
     Returns the indices corresponding to the start and end of information encoding the initial state of the planning problem
@@ -122,14 +149,14 @@ def get_action(op_info: List[str], variables: List[Variable]) -> Action:
 
     num_preconditions: int = int(op_info[1])
     num_effects_vars: int = int(op_info[2 + num_preconditions])
-    precondition: State = State(variables, [-1] * len(variables))
-    effect: State = State(variables, [-1] * len(variables))
+    precondition: dict[int, int] = {}  # variable index -> value (only the variables defined)
+    effect: dict[int, int] = {}
 
     # preconditions
     start = 2
     for i in range(start, start + num_preconditions):
         [var_idx, val_idx] = map(int, op_info[i].split())
-        precondition.values[var_idx] = val_idx
+        precondition[var_idx] = val_idx
 
     # effect
     start = 3 + num_preconditions
@@ -138,15 +165,16 @@ def get_action(op_info: List[str], variables: List[Variable]) -> Action:
         if (
             prev_val != -1
         ):  # lift the precondition of the variable to the precondition of the action
-            precondition.values[var_idx] = prev_val
-        effect.values[var_idx] = next_val
+            precondition[var_idx] = prev_val
+        effect[var_idx] = next_val
 
     action = Action(
         name=action_name,
         prefix_name=prefix_name,
         arguments=op_args,
-        precondition=precondition,
-        effects=[effect],
+        variables=variables,
+        precondition=sorted(precondition.items()),
+        effects=[sorted(effect.items())],
         cost=cost,
     )
 
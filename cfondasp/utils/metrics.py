@@ -0,0 +1,105 @@
+"""
+Timing metrics of a solver run, saved as metrics.json in the output folder.
+
+Metrics are kept per process (one planner run at a time): the time spent in each phase of the run (e.g.,
+sas_translation, backbone), the peak memory of the external processes (translator, clingo) run in each phase, and
+the result, time and peak memory of each controller size tried, and what the simplifications of the SAS model
+removed.
+"""
+import json
+import os
+import resource
+import time
+from contextlib import contextmanager
+
+from cfondasp.base.config import FILE_METRICS
+
+_phases: dict[str, float] = {}  # phase -> seconds (accumulated if the phase runs more than once)
+_sizes: list[dict] = []  # one entry per controller size tried, in order
+_peak_rss: dict[str, float] = {}  # phase -> peak memory (in MB) of the external processes run in the phase
+_simplifications: dict[str, dict] = {}  # simplification -> number of actions, variables and values removed
+
+
+def reset_metrics():
+    """
+    Clears all metrics recorded so far (at the start of a run)
+    """
+    _phases.clear()
+    _sizes.clear()
+    _peak_rss.clear()
+    _simplifications.clear()
+
+
+def record_phase(phase: str, seconds: float):
+    """
+    Adds time spent in a phase of the run
+    :param phase: name of the phase (e.g., sas_translation)
+    :param seconds: time spent
+    """
+    _phases[phase] = _phases.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase: str):
+    """
+    Context manager recording the time spent in its block as a phase of the run
+    :param phase: name of the phase (e.g., parse_sas)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - start)
+
+
+def record_peak_rss(phase: str, peak_rss: float):
+    """
+    Records the peak memory of an external process run in a phase of the run (the maximum is kept)
+    :param phase: name of the phase (e.g., sas_translation)
+    :param peak_rss: peak memory of the process and its descendants (in MB)
+    """
+    _peak_rss[phase] = max(_peak_rss.get(phase, 0.0), peak_rss)
+
+
+def record_size(num_states: int, result: str, seconds: float, peak_rss: float = None):
+    """
+    Records the outcome of trying a controller size
+    :param num_states: numStates value tried (the controller has one more state)
+    :param result: SAT, UNSAT, OPTIMUM (SAT and proven minimal), TIMEOUT, MEMOUT, UNKNOWN or ERROR (e.g., clingo killed)
+    :param seconds: time taken
+    :param peak_rss: peak memory of the clingo process (in MB), if known
+    """
+    size = {"num_states": num_states, "result": result, "time": seconds}
+    if peak_rss is not None:
+        size["peak_rss"] = peak_rss
+        record_peak_rss("solving", peak_rss)
+    _sizes.append(size)
+
+
+def record_simplification(name: str, removed: dict[str, int]):
+    """
+    Records what a simplification of the SAS model removed
+    :param name: name of the simplification (e.g., reachability)
+    :param removed: number of items removed (e.g., actions, variables, values)
+    """
+    _simplifications[name] = removed
+
+
+def save_metrics(output_dir: str, total_time: float):
+    """
+    Saves the metrics recorded to the metrics file of the output folder
+    :param output_dir: output folder of the run
+    :param total_time: total time of the run (in seconds)
+    """
+    metrics = {
+        "phases": _phases,
+        "sizes": _sizes,
+        "size_iterations": sum(s["time"] for s in _sizes),
+        "total": total_time,
+        "peak_rss": _peak_rss,
+        "simplifications": _simplifications,
+        # the planner itself (e.g., parsing, multishot solving), ru_maxrss is in KB in Linux
+        "planner_peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    with open(os.path.join(output_dir, FILE_METRICS), "w") as f:
+        json.dump(metrics, f, indent=2)
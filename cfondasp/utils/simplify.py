@@ -0,0 +1,245 @@
+"""
+Simplifications of the SAS model (as parsed by parse_sas and organize_actions) before it is encoded in ASP.
+
+Variables keep their SAS index (the controller and its verification refer to variables by index), so a
+simplification does not rewrite the model: it drops non-deterministic actions and narrows the "domains" to encode,
+a dict mapping each variable index to encode to the list of its values to encode (see get_domains). The instance
+writers in helper_asp leave out whatever is not in the domains.
+
+Simplifications (run in this order by simplify):
+    static: variables no action changes are folded into the initial state (checked against the preconditions here)
+    reachability: delete-relaxed reachability from the initial state, under all effects of the actions
+    relevance: backward relevance from the goal, over the variables changed and required by the actions
+
+Simplifications removing whole variables (static and relevance) are not run by default, as extra constraints and domain
+knowledge may refer to any SAS variable.
+"""
+import logging
+from collections import defaultdict
+from typing import List
+
+import coloredlogs
+
+from cfondasp.base.elements import State, Variable
+from cfondasp.utils.metrics import record_simplification, timed
+
+LOG_LEVEL = "INFO"
+
+SIMPLIFICATIONS = ["static", "reachability", "relevance"]
+
+
+def get_domains(variables: List[Variable]) -> dict[int, List[int]]:
+    """
+    Returns the domains to encode for a SAS model without simplifications: all variables with all their values
+    :param variables: Variables
+    :return: variable index -> values to encode
+    """
+    return {var_idx: list(range(len(var.domain))) for var_idx, var in enumerate(variables)}
+
+
+def simplify(
+    simplifications: List[str], initial_state: State, goal_state: State, nd_actions, variables: List[Variable]
+) -> tuple[dict, dict[int, List[int]]]:
+    """
+    Runs the simplifications requested on the SAS model, logging (and recording in the metrics) what each removed.
+    The goal may be left out of the domains if it cannot be reached, see goal_in_domains.
+    :param simplifications: names of the simplifications to run (see SIMPLIFICATIONS)
+    :param initial_state: Initial state
+    :param goal_state: Goal state
+    :param nd_actions: Dictionary mapping a non-deterministic action name to its deterministic actions
+    :param variables: Variables
+    :return: non-deterministic actions and domains to encode
+    """
+    _logger: logging.Logger = _get_logger()
+    for name in simplifications:
+        if name not in SIMPLIFICATIONS:
+            _logger.warning(f"Unknown simplification {name} (known: {', '.join(SIMPLIFICATIONS)}), skipped.")
+
+    domains = get_domains(variables)
+    for name in SIMPLIFICATIONS:
+        if name not in simplifications:
+            continue
+        with timed(f"simplify_{name}"):
+            if name == "static":
+                kept_actions, kept_domains = fold_static(initial_state, goal_state, nd_actions, domains)
+            elif name == "reachability":
+                kept_actions, kept_domains = prune_unreachable(initial_state, nd_actions, domains)
+            elif name == "relevance":
+                kept_actions, kept_domains = prune_irrelevant(goal_state, nd_actions, domains)
+
+        removed = {
+            "actions": len(nd_actions) - len(kept_actions),
+            "variables": len(domains) - len(kept_domains),
+            "values": sum(len(values) for values in domains.values())
+            - sum(len(values) for values in kept_domains.values()),
+        }
+        record_simplification(name, removed)
+        _logger.info(
+            f"Simplification {name} removed {removed['actions']} of {len(nd_actions)} actions, "
+            f"{removed['variables']} of {len(domains)} variables and {removed['values']} variable values."
+        )
+        nd_actions, domains = kept_actions, kept_domains
+
+    return nd_actions, domains
+
+
+def goal_in_domains(goal_state: State, domains: dict[int, List[int]]) -> bool:
+    """
+    Checks whether all goal values are still encoded (e.g., a goal value not reachable is dropped). Goal variables
+    left out of the domains are satisfied by the initial state (see fold_static).
+    :param goal_state: Goal state
+    :param domains: variable index -> values to encode
+    :return: True if every goal value is in the domains
+    """
+    return all(
+        val == -1 or var_idx not in domains or val in domains[var_idx]
+        for var_idx, val in enumerate(goal_state.values)
+    )
+
+
+def fold_static(
+    initial_state: State, goal_state: State, nd_actions, domains: dict[int, List[int]]
+) -> tuple[dict, dict[int, List[int]]]:
+    """
+    Static variables: a variable no action changes (adds a value other than the initial one, or deletes the initial
+    one) keeps its initial value in every state. The preconditions on static variables are checked here once: actions
+    requiring another value are removed, and the others need not mention them. Static variables are then removed
+    (the instance writers leave their preconditions and effects out), except the ones the goal requires with another
+    value, which keep only the initial value, so that goal_in_domains tells the goal cannot be reached.
+    :param initial_state: Initial state
+    :param goal_state: Goal state
+    :param nd_actions: Dictionary mapping a non-deterministic action name to its deterministic actions
+    :param domains: variable index -> values to encode
+    :return: actions applicable in the static part of the initial state, and domains of the variables changed
+    """
+    changed = set()
+    for det_actions in nd_actions.values():
+        for action in det_actions:
+            for var_idx, val in action.add:
+                if val != initial_state.values[var_idx]:
+                    changed.add(var_idx)
+            for var_idx, val in action.delete:
+                if val == initial_state.values[var_idx]:
+                    changed.add(var_idx)
+    static = set(domains).difference(changed)
+
+    kept_actions = {
+        name: det_actions
+        for name, det_actions in nd_actions.items()
+        if all(
+            var_idx not in static or val == initial_state.values[var_idx]
+            for var_idx, val in det_actions[0].precondition
+        )
+    }
+    kept_domains = {var_idx: values for var_idx, values in domains.items() if var_idx not in static}
+    for var_idx in static:
+        if goal_state.values[var_idx] not in [-1, initial_state.values[var_idx]]:
+            kept_domains[var_idx] = [initial_state.values[var_idx]]
+    return kept_actions, dict(sorted(kept_domains.items()))
+
+
+def prune_unreachable(
+    initial_state: State, nd_actions, domains: dict[int, List[int]]
+) -> tuple[dict, dict[int, List[int]]]:
+    """
+    Delete-relaxed reachability: starting from the initial state values, an action becomes applicable once all its
+    precondition values are reached, and then all values added by any of its effects are reached. Actions never
+    applicable and values never reached are removed (no controller executing from the initial state can use them).
+    Each action is processed once: it waits on a counter of precondition values not reached yet.
+    :param initial_state: Initial state
+    :param nd_actions: Dictionary mapping a non-deterministic action name to its deterministic actions
+    :param domains: variable index -> values to encode
+    :return: actions applicable and values reached (same format as the inputs)
+    """
+    reached = set()
+    queue = []
+
+    def reach(var_idx: int, val: int):
+        if (var_idx, val) not in reached and val in domains.get(var_idx, ()):
+            reached.add((var_idx, val))
+            queue.append((var_idx, val))
+
+    for var_idx, val in enumerate(initial_state.values):
+        reach(var_idx, val)
+
+    missing = {}  # action name -> number of precondition values not reached yet
+    waiting = defaultdict(list)  # (variable, value) -> actions with it in their precondition
+    applicable = []
+    for name, det_actions in nd_actions.items():
+        precondition = [
+            (var_idx, val)
+            for var_idx, val in det_actions[0].precondition
+            if var_idx in domains  # variables not encoded were checked already (see fold_static)
+        ]
+        missing[name] = len(precondition)
+        for fact in precondition:
+            waiting[fact].append(name)
+        if len(precondition) == 0:
+            applicable.append(name)
+
+    while applicable or queue:
+        for name in applicable:
+            for action in nd_actions[name]:
+                for var_idx, val in action.add:
+                    reach(var_idx, val)
+        applicable = []
+        for fact in queue:
+            for name in waiting.pop(fact, ()):
+                missing[name] -= 1
+                if missing[name] == 0:
+                    applicable.append(name)
+        queue = []
+
+    kept_actions = {name: det_actions for name, det_actions in nd_actions.items() if missing[name] == 0}
+    kept_domains = {
+        var_idx: [val for val in values if (var_idx, val) in reached] for var_idx, values in domains.items()
+    }
+    return kept_actions, kept_domains
+
+
+def prune_irrelevant(
+    goal_state: State, nd_actions, domains: dict[int, List[int]]
+) -> tuple[dict, dict[int, List[int]]]:
+    """
+    Backward relevance: the goal variables are relevant, an action is relevant if some of its effects changes (adds or
+    deletes a value of) a relevant variable, and then the variables in its precondition are relevant too. Actions not
+    relevant (they only change variables the goal does not depend on) and variables not relevant are removed: the
+    values of the relevant variables, and so the goal and the relevant actions that can be applied, never depend on
+    them. Each variable is processed once, with the actions changing it indexed beforehand.
+    :param goal_state: Goal state
+    :param nd_actions: Dictionary mapping a non-deterministic action name to its deterministic actions
+    :param domains: variable index -> values to encode
+    :return: actions relevant and domains of the variables relevant (same format as the inputs)
+    """
+    changing = defaultdict(list)  # variable -> actions changing it
+    for name, det_actions in nd_actions.items():
+        changed = set()
+        for action in det_actions:
+            changed.update(var_idx for var_idx, _ in action.add)
+            changed.update(var_idx for var_idx, _ in action.delete)
+        for var_idx in changed:
+            changing[var_idx].append(name)
+
+    relevant_variables = set()
+    relevant_actions = set()
+    queue = [var_idx for var_idx, val in enumerate(goal_state.values) if val != -1 and var_idx in domains]
+    while queue:
+        var_idx = queue.pop()
+        if var_idx in relevant_variables:
+            continue
+        relevant_variables.add(var_idx)
+        for name in changing.pop(var_idx, ()):
+            if name in relevant_actions:
+                continue
+            relevant_actions.add(name)
+            queue.extend(prec_idx for prec_idx, _ in nd_actions[name][0].precondition if prec_idx in domains)
+
+    kept_actions = {name: det_actions for name, det_actions in nd_actions.items() if name in relevant_actions}
+    kept_domains = {var_idx: values for var_idx, values in domains.items() if var_idx in relevant_variables}
+    return kept_actions, kept_domains
+
+
+def _get_logger() -> logging.Logger:
+    logger = logging.getLogger(__name__)
+    coloredlogs.install(level=LOG_LEVEL, logger=logger)
+    return logger
@@ -9,10 +9,13 @@ import os
 from cpuinfo import get_cpu_info
 import platform
 import psutil
+import threading
 from pathlib import Path
 from urllib.parse import urlparse
 import datetime
 
+from cfondasp.base.config import MEMORY_POLL_INTERVAL
+
 def print_system_info():
     print("------------------------------------------------------------------------------")
     cpu_info = get_cpu_info()
@@ -50,6 +53,102 @@ def remove_files(output_dir: str, prefix:str):
         if prefix in file:
             os.remove(os.path.join(output_dir, file))
 
+def kill_process_tree(pid: int):
+    """
+    Kills a process and all its descendants (e.g., the clingo and translator processes of a run)
+    :param pid: process id of the root of the tree
+    """
+    try:
+        parent = psutil.Process(pid)
+        processes = parent.children(recursive=True) + [parent]
+    except psutil.NoSuchProcess:
+        return
+    for p in processes:
+        try:
+            p.kill()
+        except psutil.NoSuchProcess:
+            pass
+    psutil.wait_procs(processes)
+
+class MemoryLimitExceeded(Exception):
+    """A process tree went over its memory limit (and was killed)"""
+
+    def __init__(self, cmd, memory_limit: int, peak_rss: float):
+        self.cmd = cmd
+        self.memory_limit = memory_limit
+        self.peak_rss = peak_rss
+        super().__init__(f"Memory limit of {memory_limit} MB exceeded ({peak_rss:.0f} MB) by {cmd}")
+
+
+def get_tree_rss(pid: int) -> float | None:
+    """
+    Returns the memory used by a process and all its descendants (sum of their resident set sizes)
+    :param pid: process id of the root of the tree
+    :return: memory used (in MB), or None if the process does not exist anymore
+    """
+    try:
+        parent = psutil.Process(pid)
+        processes = [parent] + parent.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return None
+    rss = 0
+    for p in processes:
+        try:
+            rss += p.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return rss / 1024**2
+
+
+class MemoryWatcher(threading.Thread):
+    """
+    Thread sampling the memory used by a process tree (e.g., a clingo or translator process) every poll_interval
+    seconds, keeping its peak. If the memory limit is given and exceeded, the whole tree is killed (and exceeded set).
+
+    Use as a context manager around the wait for the process: the watcher stops when the block ends.
+    """
+
+    def __init__(self, pid: int, memory_limit: int = None, poll_interval: float = MEMORY_POLL_INTERVAL):
+        """
+        :param pid: process id of the root of the tree
+        :param memory_limit: memory limit (in MB), None for no limit (only the peak is kept)
+        :param poll_interval: time between samples (in seconds)
+        """
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.memory_limit = memory_limit
+        self.poll_interval = poll_interval
+        self.peak_rss = 0.0  # in MB
+        self.exceeded = False
+        self._stopped = threading.Event()
+
+    def run(self):
+        while True:
+            rss = get_tree_rss(self.pid)
+            if rss is None:
+                return
+            self.peak_rss = max(self.peak_rss, rss)
+            if self.memory_limit is not None and rss > self.memory_limit:
+                self.exceeded = True
+                kill_process_tree(self.pid)
+                return
+            if self._stopped.wait(self.poll_interval):
+                return
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def stop(self):
+        """Stops sampling (the process tree is left running)"""
+        self._stopped.set()
+        self.join()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
 def is_url(url):
     try:
         result = urlparse(url)
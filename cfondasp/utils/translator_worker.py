@@ -0,0 +1,195 @@
+"""
+Persistent SAS translator worker: runs translate.py for many problems without starting a new Python interpreter (and
+re-importing the translator modules) for each problem.
+
+The worker is a server on a Unix socket, started once with the translator modules already imported. For each
+request (the translator arguments and working folder), it forks a copy of itself that runs translate.py as
+__main__, exactly as the translator process would, with its stdout and stderr going to the files given by the
+client. So every translation starts from the same clean state, and requests from different processes (e.g., the jobs
+of the batch solver, forked after the worker is started) are served at the same time.
+
+The translator cannot be imported in the planner process itself: its top-level modules (e.g., pddl, options) clash
+with packages used by the planner. So the worker runs this file as a script, with only the standard library, and
+the translator folder first in its path (as when translate.py is run).
+
+TranslatorProcess is the client side, used like the subprocess.Popen of the translator (see execute_sas_translator).
+"""
+import atexit
+import importlib
+import json
+import os
+import resource
+import runpy
+import shutil
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import traceback
+
+_worker: tuple = None  # (worker process, socket path, translator path, pid of the process that started it)
+
+
+def start_translator_worker(translate_path: str) -> str:
+    """
+    Starts the translator worker of this process (and of the processes forked from it), if not started yet
+    :param translate_path: path to translate.py
+    :return: path of the socket of the worker
+    """
+    global _worker
+    if _worker is not None and _worker[2] == translate_path:
+        return _worker[1]
+    socket_path = os.path.join(tempfile.mkdtemp(prefix="cfondasp-translator-"), "worker.sock")
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), translate_path, socket_path],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+    )
+    if process.stdout.readline().strip() != b"ready":
+        process.kill()
+        raise Exception(f"The SAS translator worker could not start with {translate_path}")
+    _worker = (process, socket_path, translate_path, os.getpid())
+    atexit.register(stop_translator_worker)
+    return socket_path
+
+
+def stop_translator_worker():
+    """
+    Stops the translator worker, if this process started it (processes forked from it leave it running)
+    """
+    global _worker
+    if _worker is None or _worker[3] != os.getpid():
+        return
+    process, socket_path, _, _ = _worker
+    process.terminate()
+    process.wait()
+    shutil.rmtree(os.path.dirname(socket_path), ignore_errors=True)
+    _worker = None
+
+
+class TranslatorProcess(object):
+    """
+    A translation done by the worker, with the part of the subprocess.Popen interface used for the translator
+    process: pid (the forked copy running the translation), communicate and returncode.
+    """
+
+    def __init__(self, socket_path: str, args: list[str], cwd: str):
+        """
+        Sends the translation request to the worker, which starts it right away
+        :param socket_path: socket of the worker (see start_translator_worker)
+        :param args: arguments of translate.py
+        :param cwd: working folder of the translation
+        """
+        self._stdout = tempfile.TemporaryFile()
+        self._stderr = tempfile.TemporaryFile()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(socket_path)
+        # the memory limit of this process (e.g., of a batch job) applies to the translation, as to a child process
+        request = {"args": args, "cwd": cwd, "address_space": resource.getrlimit(resource.RLIMIT_AS)}
+        socket.send_fds(self._socket, [json.dumps(request).encode()], [self._stdout.fileno(), self._stderr.fileno()])
+        self._reply = self._socket.makefile("rb")
+        self.pid = int(self._reply.readline())
+        self.returncode = None
+
+    def communicate(self) -> tuple[bytes, bytes]:
+        """
+        Waits for the translation to end
+        :return: stdout and stderr of the translator
+        """
+        reply = self._reply.readline().strip()
+        self.returncode = int(reply) if reply else -1  # no reply: the translation was killed
+        self._reply.close()
+        self._socket.close()
+        outputs = []
+        for f in [self._stdout, self._stderr]:
+            f.seek(0)
+            outputs.append(f.read())
+            f.close()
+        return outputs[0], outputs[1]
+
+
+class _TranslationHandler(socketserver.BaseRequestHandler):
+    """
+    Runs a translation (in the copy of the worker forked for the request)
+    """
+
+    def handle(self):
+        message, fds, _, _ = socket.recv_fds(self.request, 1024**2, 2)
+        request = json.loads(message)
+        self.request.sendall(f"{os.getpid()}\n".encode())
+
+        os.chdir(request["cwd"])
+        os.dup2(fds[0], sys.stdout.fileno())
+        os.dup2(fds[1], sys.stderr.fileno())
+        resource.setrlimit(resource.RLIMIT_AS, tuple(request["address_space"]))
+        returncode = _run_translator(self.server.translate_path, request["args"])
+        self.request.sendall(f"{returncode}\n".encode())
+
+
+class _WorkerServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    translate_path: str = None
+
+
+def _run_translator(translate_path: str, args: list[str]) -> int:
+    """
+    Runs translate.py as __main__ with the arguments given
+    :param translate_path: path to translate.py
+    :param args: arguments of translate.py
+    :return: exit code of the translator
+    """
+    sys.argv = [translate_path] + args
+    # the translator options are parsed from the command line when the options module is imported
+    if "options" in sys.modules:
+        importlib.reload(sys.modules["options"])
+    try:
+        runpy.run_path(translate_path, run_name="__main__")
+        returncode = 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            returncode = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            returncode = 1
+    except BaseException:
+        traceback.print_exc()
+        returncode = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    return returncode
+
+
+def _serve(translate_path: str, socket_path: str):
+    """
+    Imports the translator modules and serves translation requests until terminated
+    :param translate_path: path to translate.py
+    :param socket_path: socket to listen to
+    """
+    sys.path[0] = os.path.dirname(translate_path)
+
+    # running translate.py (not as __main__) imports its modules, with placeholder files for the options parsed on
+    # import; its output (and errors, e.g., of translate.py scripts translating whatever their name) are dropped
+    out, err = os.dup(sys.stdout.fileno()), os.dup(sys.stderr.fileno())
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), sys.stdout.fileno())
+        os.dup2(devnull.fileno(), sys.stderr.fileno())
+        sys.argv = [translate_path, "domain.pddl", "problem.pddl"]
+        try:
+            runpy.run_path(translate_path, run_name="__translator__")
+        except BaseException:
+            pass
+        sys.stdout.flush()
+        sys.stderr.flush()
+    os.dup2(out, sys.stdout.fileno())
+    os.dup2(err, sys.stderr.fileno())
+    os.close(out)
+    os.close(err)
+
+    with _WorkerServer(socket_path, _TranslationHandler) as server:
+        server.translate_path = translate_path
+        print("ready", flush=True)
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    _serve(sys.argv[1], sys.argv[2])
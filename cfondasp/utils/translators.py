@@ -3,7 +3,8 @@ from pathlib import Path
 
 from cfondasp.base.elements import FONDProblem
 from cfondasp.utils.helper_sas import *
-from cfondasp.utils.helper_sas import get_indices_variables
+from cfondasp.utils.system_utils import MemoryLimitExceeded, MemoryWatcher
+from cfondasp.utils.translator_worker import TranslatorProcess, start_translator_worker
 
 from pddl import parse_domain
 from pddl.formatter import domain_to_string
@@ -24,52 +25,38 @@ def parse_sas(
 ) -> (State, State, tuple[list[Action], list[Variable]], List[State]):
     """
     Returns the initial state, goal state, and list of actions from a SAS file.
+    The file is read in a single pass (see read_sas_blocks), building each element as its block is read: variables
+    come first in SAS files, so the other elements can refer to them.
     :param sas_file: path to the sas file
     :return: Initial state, Goal state, List of actions
     """
-    with open(sas_file) as f:
-        info = f.readlines()
-
-    # extract variables
-    variable_indices: List[tuple[int, int]] = get_indices_variables(info)
     variables: List[Variable] = []
-    for i, j in variable_indices:
-        var = get_variable(info[i + 1 : j])
-        variables.append(var)
-
-    # extract actions
-    action_indices: List[tuple[int, int]] = get_indices_operators(info)
     actions: List[Action] = []
-    for i, j in action_indices:
-        action = get_action(info[i + 1 : j], variables)
-        action.generate_strips()
-        actions.append(action)
-
-    # initial state
-    init_i, init_j = get_indices_initial_state(info)
-    initial_state: State = State(variables, [-1] * len(variables))
-    for i in range(init_i + 1, init_j):
-        var_idx: int = i - (init_i + 1)
-        val = int(info[i])
-        initial_state.values[var_idx] = val
-
-    # goal state
-    init_i, init_j = get_indices_goal(info)
-    goal_state: State = State(variables, [-1] * len(variables))
-    num_vars = int(info[init_i + 1])
-    for i in range(init_i + 2, init_j):
-        [var_idx, val] = map(int, info[i].split())
-        goal_state.values[var_idx] = val
-
-    # mutex, we can model a mutex as a partial state. It represents a state that will never occur in the planning problem.
-    mutex_indices: List[tuple[int, int]] = get_indices_mutex(info)
+    initial_state: State = None
+    goal_state: State = None
     mutexs: List[State] = []
-    for i, j in mutex_indices:
-        mutex: State = State(variables, [-1] * len(variables))
-        for k in range(i + 2, j):
-            [var_idx, val] = map(int, info[k].split())
-            mutex.values[var_idx] = val
-        mutexs.append(mutex)
+
+    with open(sas_file) as f:
+        for block, info in read_sas_blocks(f):
+            if block == "variable":
+                variables.append(get_variable(info))
+
+            elif block == "operator":
+                action = get_action(info, variables)
+                action.generate_strips()
+                actions.append(action)
+
+            elif block == "state":
+                # initial state, a value per variable
+                initial_state = State(variables, [int(val) for val in info])
+
+            elif block == "goal":
+                # number of goal variables, then variable-value pairs
+                goal_state = State.from_facts(variables, [tuple(map(int, line.split())) for line in info[1:]])
+
+            elif block == "mutex_group":
+                # mutex, we can model a mutex as a partial state. It represents a state that will never occur in the planning problem.
+                mutexs.append(State.from_facts(variables, [tuple(map(int, line.split())) for line in info[1:]]))
 
     return initial_state, goal_state, actions, variables, mutexs
 
@@ -82,7 +69,9 @@ def execute_sas_translator(
     output_dir: str,
     sas_file: str,
     stats_file: str,
-):
+    memory_limit: int = None,
+    worker: bool = False,
+) -> float:
     """
     Execute the prp translator on the given domain and problem to generate a SAS output.
     :param translate_path: path to prp translate
@@ -91,7 +80,10 @@ def execute_sas_translator(
     :param translator_args: A template of arguments to pass to the translator
     :param output_dir: path to the output directory where output.sas will be saved
     :param stats_file: path to the stats file where the translation stats will be saved
-    :return:
+    :param memory_limit: memory limit for the translator (in MB), None for no limit
+    :param worker: run the translator in the persistent translator worker (see translator_worker.py) instead of a
+        new process
+    :return: peak memory used by the translator (in MB)
     """
 
     translator_cmd = (
@@ -101,11 +93,17 @@ def execute_sas_translator(
     )
     execution_cmd = [translate_path] + translator_cmd.split()
     _get_logger().debug("Executing the SAS translator with command: %s", execution_cmd)
-    process = subprocess.Popen(
-        execution_cmd, cwd=output_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-    )
+    if worker:
+        process = TranslatorProcess(start_translator_worker(translate_path), execution_cmd[1:], cwd=output_dir)
+    else:
+        process = subprocess.Popen(
+            execution_cmd, cwd=output_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
     print(" ".join(execution_cmd))
-    stdout, stderr = process.communicate()
+    with MemoryWatcher(process.pid, memory_limit) as watcher:
+        stdout, stderr = process.communicate()
+    if watcher.exceeded:
+        raise MemoryLimitExceeded(execution_cmd, memory_limit, watcher.peak_rss)
     if process.returncode != 0:
         _get_logger().error("Error in executing the SAS translator: \n %s", stderr.decode())
         raise Exception("Error in executing the SAS translator")
@@ -113,6 +111,23 @@ def execute_sas_translator(
     # all good, save the console output of the translator
     with open(stats_file, "w") as f:
         f.write(stdout.decode())
+    return watcher.peak_rss
+
+
+def get_translator_sources(translate_path: str) -> list[str]:
+    """
+    Returns the Python sources of the SAS translator: translate.py itself (links followed) and the modules in its
+    folder and in the packages under it (e.g., pddl/ of the FD translator), which translate.py imports
+    :param translate_path: path to translate.py
+    :return: paths of the source files, in a fixed order
+    """
+    translate_path = os.path.realpath(translate_path)
+    sources = [translate_path]
+    for root, dirs, files in os.walk(os.path.dirname(translate_path)):
+        # only Python packages are imported from subfolders
+        dirs[:] = sorted(d for d in dirs if os.path.isfile(os.path.join(root, d, "__init__.py")))
+        sources += [os.path.join(root, f) for f in sorted(files) if f.endswith(".py") and os.path.join(root, f) != translate_path]
+    return sources
 
 
 def execute_determiniser(
@@ -0,0 +1,89 @@
+"""
+Tests of the on-disk cache (cfondasp/utils/cache.py) and of the translator sources its translation keys depend on.
+
+    python -m pytest test/cache
+"""
+import os
+
+from cfondasp.utils.cache import cache_entry_file, cache_lookup, cache_store, evict_entries, get_content_hash
+from cfondasp.utils.translators import get_translator_sources
+
+
+def write(path, content: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+    return str(path)
+
+
+def test_content_hash(tmp_path):
+    domain = write(tmp_path / "domain.pddl", "(define (domain d))")
+    key = get_content_hash([domain, "--flag"])
+    assert get_content_hash([domain, "--flag"]) == key
+    # keyed by content, not by path
+    assert get_content_hash([write(tmp_path / "copy.pddl", "(define (domain d))"), "--flag"]) == key
+    write(domain, "(define (domain e))")
+    assert get_content_hash([domain, "--flag"]) != key
+    # parts are separated
+    assert get_content_hash(["ab", "c"]) != get_content_hash(["a", "bc"])
+    assert get_content_hash([b"ab"]) == get_content_hash(["ab"])
+
+
+def test_lookup_and_store(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    sas = write(tmp_path / "out" / "output.sas", "sas")
+    dest = str(tmp_path / "dest.sas")
+    key = get_content_hash([sas])
+
+    assert not cache_lookup(cache_dir, key, {"output.sas": dest})
+    assert cache_entry_file(cache_dir, key, "output.sas") is None
+    cache_store(cache_dir, key, {"output.sas": sas}, max_size=1 << 20)
+    assert cache_lookup(cache_dir, key, {"output.sas": dest})
+    with open(dest) as f:
+        assert f.read() == "sas"
+    assert cache_entry_file(cache_dir, key, "output.sas") == os.path.join(cache_dir, key, "output.sas")
+    # an entry missing one of the files asked for is a miss
+    assert not cache_lookup(cache_dir, key, {"output.sas": dest, "instance.lp": dest})
+    # storing the same entry twice keeps it
+    cache_store(cache_dir, key, {"output.sas": sas}, max_size=1 << 20)
+    assert cache_lookup(cache_dir, key, {"output.sas": dest})
+
+
+def test_eviction(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    src = write(tmp_path / "file", "x" * 100)
+    for key in ["a", "b", "c"]:
+        cache_store(cache_dir, key, {"file": src}, max_size=1 << 20)
+    for key, mtime in [("a", 1), ("b", 3), ("c", 2)]:
+        os.utime(os.path.join(cache_dir, key), (mtime, mtime))
+
+    # least recently used first, so "a" then "c", but never the entry to keep
+    evict_entries(cache_dir, 200, keep="a")
+    assert sorted(os.listdir(cache_dir)) == ["a", "b"]
+    evict_entries(cache_dir, 100)
+    assert os.listdir(cache_dir) == ["b"]
+    # storing over budget evicts the others, not the new entry
+    cache_store(cache_dir, "d", {"file": src}, max_size=100)
+    assert os.listdir(cache_dir) == ["d"]
+
+
+def test_translator_sources(tmp_path):
+    translate = write(tmp_path / "translator" / "translate.py", "import pddl")
+    write(tmp_path / "translator" / "normalize.py", "")
+    write(tmp_path / "translator" / "pddl" / "__init__.py", "")
+    write(tmp_path / "translator" / "pddl" / "actions.py", "")
+    write(tmp_path / "translator" / "tests" / "test_normalize.py", "")  # not a package: not imported
+    write(tmp_path / "translator" / "README", "")
+    os.symlink(translate, tmp_path / "translate.py")
+
+    sources = get_translator_sources(str(tmp_path / "translate.py"))
+    assert sources == [
+        translate,
+        str(tmp_path / "translator" / "normalize.py"),
+        str(tmp_path / "translator" / "pddl" / "__init__.py"),
+        str(tmp_path / "translator" / "pddl" / "actions.py"),
+    ]
+    # a change to a module of the translator changes the translation key
+    key = get_content_hash(sources)
+    write(tmp_path / "translator" / "pddl" / "actions.py", "# changed")
+    assert get_content_hash(get_translator_sources(str(tmp_path / "translate.py"))) != key
@@ -0,0 +1,64 @@
+"""
+Tests of the parsing of clingo --stats output (parse_clingo_stats, save_clingo_stats in asp_output.py), on saved clingo
+output files: clingo_out_4.out (UNSAT) and clingo_out_5.out (SAT, with a model).
+
+    python -m pytest test/clingo
+"""
+import json
+import os
+import shutil
+
+from cfondasp.base.config import FILE_CLINGO_STATS
+from cfondasp.utils.asp_output import parse_clingo_stats, save_clingo_stats
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_parse_unsat():
+    assert parse_clingo_stats(os.path.join(TEST_DIR, "clingo_out_4.out")) == {
+        "result": "UNSATISFIABLE",
+        "models": 0,
+        "more_models": False,
+        "calls": 1,
+        "time": 0.036,
+        "solving_time": 0.0,
+        "grounding_time": 0.036,
+        "first_model_time": 0.0,
+        "unsat_time": 0.0,
+        "cpu_time": 0.035,
+        "choices": 56,
+        "conflicts": 19,
+        "restarts": 0,
+        "rules": 23812,
+        "atoms": 12786,
+        "bodies": 13028,
+        "variables": 2537,
+        "constraints": 10619,
+    }
+
+
+def test_parse_sat():
+    stats = parse_clingo_stats(os.path.join(TEST_DIR, "clingo_out_5.out"))
+    assert stats["result"] == "SATISFIABLE"
+    assert stats["models"] == 1 and stats["more_models"]
+    assert (stats["time"], stats["solving_time"], stats["cpu_time"]) == (0.024, 0.0, 0.021)
+    # detail lines (e.g., "  Binary : 5") and unknown keys (e.g., "Model-Level") are not kept
+    assert (stats["choices"], stats["conflicts"], stats["rules"], stats["atoms"]) == (46, 18, 8069, 4312)
+    assert "model_level" not in stats and "binary" not in stats
+
+
+def test_parse_without_stats(tmp_path):
+    out_file = tmp_path / "clingo_out_1.out"
+    out_file.write_text("clingo instance.lp controller-fondsat.lp -c numStates=1\nSolving...\nUNSATISFIABLE\n")
+    assert parse_clingo_stats(str(out_file)) is None
+
+
+def test_save_stats(tmp_path):
+    for f in ["clingo_out_5.out", "clingo_out_4.out"]:
+        shutil.copy(os.path.join(TEST_DIR, f), tmp_path / f)
+    (tmp_path / "clingo_out_3.out").write_text("Solving...\nUNSATISFIABLE\n")
+
+    assert save_clingo_stats(str(tmp_path)) == 2
+    with open(tmp_path / FILE_CLINGO_STATS) as f:
+        records = [json.loads(line) for line in f]
+    assert [(r["num_states"], r["result"]) for r in records] == [(4, "UNSATISFIABLE"), (5, "SATISFIABLE")]
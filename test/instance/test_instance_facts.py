@@ -0,0 +1,70 @@
+"""
+Tests of the planning instance built in memory (get_instance_facts in helper_asp.py) against the one written to
+instance.lp (generate_asp_instance), on a small problem with an action of many effects and mutex groups.
+
+    python -m pytest test/instance
+"""
+import clingo
+import pytest
+
+from cfondasp.base.config import ASP_GOAL_STATE_TERM, ASP_INITIAL_STATE_TERM
+from cfondasp.base.elements import Action, State, Variable
+from cfondasp.solver.asp import generate_asp_instance
+from cfondasp.utils.helper_asp import add_instance, get_instance_facts
+
+NUM_VARIABLES = 5
+NUM_EFFECTS = 15  # more effects than variables and values
+
+# controller states 0 (initial) and 1 (goal), so that the rules of the instance are grounded too
+STATES = f"{ASP_INITIAL_STATE_TERM}(0). {ASP_GOAL_STATE_TERM}(1)."
+
+
+def small_problem():
+    """
+    Problem with binary variables, a mutex group, an action setting variable 0 and one with NUM_EFFECTS outcomes
+    (oneof), each setting another combination of the variables
+    :return: initial state, goal state, variables, mutexes and non-deterministic actions
+    """
+    variables = [Variable(f"var{i}", [f"Atom p{i}()", f"NegatedAtom p{i}()"]) for i in range(NUM_VARIABLES)]
+    initial_state = State(variables, [1] * NUM_VARIABLES)
+    goal_state = State(variables, [0, 0, -1, -1, -1])
+    mutexs = [State(variables, [0, 0, -1, -1, -1])]
+
+    def action(name: str, det_idx: int, precondition: list, effect: list) -> Action:
+        det_action = Action(f"{name}_detdup_{det_idx}", name, [], variables, precondition, [effect])
+        det_action.generate_strips()
+        return det_action
+
+    nd_actions = {
+        "start()": [action("start", 1, [], [(0, 0)])],
+        "toss()": [
+            action("toss", i, [(0, 0)], [(var_idx, (i >> var_idx) & 1) for var_idx in range(1, NUM_VARIABLES)])
+            for i in range(NUM_EFFECTS)
+        ],
+    }
+    return initial_state, goal_state, variables, mutexs, nd_actions
+
+
+def ground_atoms(ctl: clingo.Control) -> set[str]:
+    ctl.add("base", [], STATES)
+    ctl.ground([("base", [])])
+    return {str(atom.symbol) for atom in ctl.symbolic_atoms}
+
+
+@pytest.mark.parametrize("domains", [None, {0: [0, 1], 1: [0, 1], 2: [1], 4: [0, 1]}])
+def test_facts_match_instance_file(domains, tmp_path):
+    initial_state, goal_state, variables, mutexs, nd_actions = small_problem()
+
+    instance_file = str(tmp_path / "instance.lp")
+    generate_asp_instance(instance_file, initial_state, goal_state, variables, mutexs, nd_actions, domains=domains)
+    ctl = clingo.Control(["--warn=none"])
+    ctl.load(instance_file)
+    file_atoms = ground_atoms(ctl)
+
+    facts, rules = get_instance_facts(initial_state, goal_state, variables, mutexs, nd_actions, domains=domains)
+    ctl = clingo.Control(["--warn=none"])
+    add_instance(ctl, facts, rules)
+    memory_atoms = ground_atoms(ctl)
+
+    assert memory_atoms == file_atoms
+    assert f'numEffects("toss()",{NUM_EFFECTS})' in memory_atoms
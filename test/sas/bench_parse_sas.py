@@ -0,0 +1,105 @@
+"""
+Benchmark of the single-pass SAS parser (parse_sas) against the previous parser, which read the whole file with
+readlines and then located each kind of block (variables, operators, initial state, goal, mutex groups) with a
+separate scan of the lines.
+
+Both parsers are checked to build the same model before timing them, and the peak memory allocated while parsing
+(tracemalloc) is reported too.
+
+    python test/sas/bench_parse_sas.py output/output.sas [more SAS files...]
+
+The SAS files are those left in the output folder of planner runs (output.sas), the largest ones being the
+interesting ones.
+"""
+import argparse
+import os
+import timeit
+import tracemalloc
+from typing import List
+
+from cfondasp.base.elements import Action, State, Variable
+from cfondasp.utils.helper_sas import (
+    get_action,
+    get_indices_goal,
+    get_indices_initial_state,
+    get_indices_mutex,
+    get_indices_operators,
+    get_indices_variables,
+    get_variable,
+)
+from cfondasp.utils.translators import parse_sas
+
+
+def parse_sas_readlines(sas_file: str):
+    """
+    The previous parser: whole file in memory, one scan of the lines per kind of block
+    :param sas_file: path to the sas file
+    :return: Initial state, Goal state, List of actions, variables and mutexes
+    """
+    with open(sas_file) as f:
+        info = f.readlines()
+
+    variables: List[Variable] = []
+    for i, j in get_indices_variables(info):
+        variables.append(get_variable(info[i + 1 : j]))
+
+    actions: List[Action] = []
+    for i, j in get_indices_operators(info):
+        action = get_action(info[i + 1 : j], variables)
+        action.generate_strips()
+        actions.append(action)
+
+    init_i, init_j = get_indices_initial_state(info)
+    initial_state = State(variables, [int(info[i]) for i in range(init_i + 1, init_j)])
+
+    init_i, init_j = get_indices_goal(info)
+    goal_state = State.from_facts(variables, [tuple(map(int, info[i].split())) for i in range(init_i + 2, init_j)])
+
+    mutexs: List[State] = []
+    for i, j in get_indices_mutex(info):
+        mutexs.append(State.from_facts(variables, [tuple(map(int, info[k].split())) for k in range(i + 2, j)]))
+
+    return initial_state, goal_state, actions, variables, mutexs
+
+
+def _model(parsed) -> tuple:
+    initial_state, goal_state, actions, variables, mutexs = parsed
+    return (
+        list(initial_state.values),
+        list(goal_state.values),
+        [(a.name, a.arguments, a.precondition, a.effects, a.add, a.delete, a.cost) for a in actions],
+        [(v.name, v.domain) for v in variables],
+        [list(m.values) for m in mutexs],
+    )
+
+
+def _peak_memory(parser, sas_file: str) -> float:
+    tracemalloc.start()
+    parser(sas_file)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def bench(sas_file: str, repeat: int):
+    assert _model(parse_sas(sas_file)) == _model(parse_sas_readlines(sas_file)), "the parsers differ"
+    _, _, actions, variables, _ = parse_sas(sas_file)
+    size = os.path.getsize(sas_file) / 2**20
+    print(f"{sas_file}: {size:.1f} MB, {len(variables)} variables, {len(actions)} actions")
+    for name, parser in [("single-pass", parse_sas), ("readlines", parse_sas_readlines)]:
+        seconds = min(timeit.repeat(lambda: parser(sas_file), number=1, repeat=repeat))
+        print(f"  {name:<12} {seconds:8.3f} s   peak memory {_peak_memory(parser, sas_file):8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the SAS parser against the previous one.")
+    parser.add_argument("sas_files", nargs="+", help="SAS files (e.g., output.sas of planner runs).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions, best is kept (Default: %(default)s).")
+    args = parser.parse_args()
+
+    for sas_file in args.sas_files:
+        bench(sas_file, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Tests of the SAS model parsed from blocksworld-ipc08_p01.sas (the SAS file of benchmarks/blocksworld-ipc08/p01.pddl):
+the sparse preconditions and effects of the actions, against the operators read as dense lists of values, and the
+whole model, against the one of the previous parser (parse_sas_readlines in bench_parse_sas.py).
+
+    python -m pytest test/sas
+"""
+import os
+
+import pytest
+
+from bench_parse_sas import _model, parse_sas_readlines
+from cfondasp.utils.translators import parse_sas
+
+SAS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blocksworld-ipc08_p01.sas")
+
+
+@pytest.fixture(scope="module")
+def sas_model():
+    return parse_sas(SAS_FILE)
+
+
+def dense_operators(sas_file: str, num_variables: int) -> list[tuple[str, list[int], list[int]]]:
+    """
+    Reads the operators of a SAS file as dense lists of values (-1: variable not defined)
+    :param sas_file: path to the SAS file
+    :param num_variables: number of variables
+    :return: name, precondition values (prevail and effect conditions) and effect values of each operator
+    """
+    with open(sas_file) as f:
+        lines = [line.strip() for line in f]
+    operators = []
+    for i, line in enumerate(lines):
+        if line != "begin_operator":
+            continue
+        name = lines[i + 1]
+        precondition, effect = [-1] * num_variables, [-1] * num_variables
+        num_prevail = int(lines[i + 2])
+        for var_idx, val in (map(int, lines[i + 3 + k].split()) for k in range(num_prevail)):
+            precondition[var_idx] = val
+        num_effects = int(lines[i + 3 + num_prevail])
+        for k in range(num_effects):
+            _, var_idx, pre, post = map(int, lines[i + 4 + num_prevail + k].split())
+            if pre != -1:
+                precondition[var_idx] = pre
+            effect[var_idx] = post
+        operators.append((name, precondition, effect))
+    return operators
+
+
+def test_sparse_actions(sas_model):
+    initial_state, goal_state, actions, variables, mutexs = sas_model
+    operators = dense_operators(SAS_FILE, len(variables))
+    assert len(actions) == len(operators)
+
+    for action, (name, precondition, effect) in zip(actions, operators):
+        assert name.startswith(f"{action.name} {' '.join(action.arguments)}".strip())
+        # sparse: the (variable, value) pairs defined, sorted by variable
+        assert action.precondition == [(var_idx, val) for var_idx, val in enumerate(precondition) if val != -1]
+        assert action.effects == [[(var_idx, val) for var_idx, val in enumerate(effect) if val != -1]]
+        # as partial states for the logic operators
+        assert list(action.precondition_state().values) == precondition
+        assert list(action.effect_state(0).values) == effect
+        # STRIPS: the effect is added, and the precondition value (or every other value) of its variables deleted
+        assert action.add == action.effects[0]
+        assert sorted(action.delete) == sorted(
+            (var_idx, val)
+            for var_idx, post in action.effects[0]
+            for val in range(len(variables[var_idx].domain))
+            if (val == precondition[var_idx] if precondition[var_idx] != -1 else val != post)
+        )
+
+
+def test_parse_sas_matches_readlines(sas_model):
+    assert _model(sas_model) == _model(parse_sas_readlines(SAS_FILE))
+
+
+def test_parse_sas_model(sas_model):
+    initial_state, goal_state, actions, variables, mutexs = sas_model
+    assert (len(variables), len(actions), len(mutexs)) == (11, 425, 1)
+    assert len(initial_state.values) == len(goal_state.values) == len(mutexs[0].values) == len(variables)
+    assert -1 not in initial_state.values
+    # the goal is partial
+    assert -1 in goal_state.values
+
+
+def test_parse_sas_line_ends(tmp_path):
+    # Windows line ends and no trailing newline
+    with open(SAS_FILE) as f:
+        text = f.read()
+    sas_file = tmp_path / "output.sas"
+    sas_file.write_bytes(text.rstrip("\n").replace("\n", "\r\n").encode())
+    assert _model(parse_sas(str(sas_file))) == _model(parse_sas(SAS_FILE))
@@ -0,0 +1,91 @@
+"""
+Tests of the simplifications of the SAS model (cfondasp/utils/simplify.py), on doors_p01_extended.sas: the SAS model of
+benchmarks/doors/p01.pddl extended with variables and actions each simplification must remove, without changing the
+minimal controller size:
+    jump(l1): requires light-on(), which no action changes (static, unreachable)
+    blow-whistle(l1): only changes whistled(), which the goal does not depend on (irrelevant)
+    charge(l1) and arm(l1): each requires the value the other one adds (unreachable)
+
+    python -m pytest test/simplify
+"""
+import copy
+import os
+
+import clingo
+import pytest
+
+from cfondasp.solver.asp import generate_asp_instance
+from cfondasp.utils.helper_sas import organize_actions
+from cfondasp.utils.simplify import fold_static, get_domains, goal_in_domains, prune_irrelevant, prune_unreachable, simplify
+from cfondasp.utils.system_utils import get_pkg_root
+from cfondasp.utils.translators import parse_sas
+
+SAS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "doors_p01_extended.sas")
+CONTROLLER_MODEL = os.path.join(get_pkg_root(), "asp", "controller-fondsat.lp")
+MIN_NUM_STATES = 4  # numStates of the minimal controller of doors p01
+
+
+@pytest.fixture
+def sas_model():
+    initial_state, goal_state, actions, variables, mutexs = parse_sas(SAS_FILE)
+    _, nd_actions = organize_actions(actions)
+    return initial_state, goal_state, nd_actions, variables, mutexs
+
+
+def is_solvable(instance_file: str, num_states: int) -> bool:
+    ctl = clingo.Control(["-c", f"numStates={num_states}", "--warn=none"])
+    ctl.load(instance_file)
+    ctl.load(CONTROLLER_MODEL)
+    ctl.ground([("base", [])])
+    return ctl.solve().satisfiable
+
+
+def test_fold_static(sas_model):
+    initial_state, goal_state, nd_actions, variables, _ = sas_model
+    kept_actions, domains = fold_static(initial_state, goal_state, nd_actions, get_domains(variables))
+
+    assert set(nd_actions).difference(kept_actions) == {"jump(l1)"}
+    assert 6 not in domains and len(domains) == len(variables) - 1
+    assert goal_in_domains(goal_state, domains)
+
+    # a goal on another value of a static variable is kept, with only the initial value, and cannot be reached
+    goal_state = copy.copy(goal_state)
+    goal_state.values[6] = 1
+    _, domains = fold_static(initial_state, goal_state, nd_actions, get_domains(variables))
+    assert domains[6] == [0]
+    assert not goal_in_domains(goal_state, domains)
+
+
+def test_prune_unreachable(sas_model):
+    initial_state, goal_state, nd_actions, variables, _ = sas_model
+    kept_actions, domains = prune_unreachable(initial_state, nd_actions, get_domains(variables))
+
+    assert set(nd_actions).difference(kept_actions) == {"jump(l1)", "charge(l1)", "arm(l1)"}
+    # only the initial values of light-on(), charged() and armed() are reached
+    assert (domains[6], domains[8], domains[9]) == ([0], [1], [1])
+    assert domains[7] == [0, 1] and domains[5] == [0, 1, 2]
+    assert goal_in_domains(goal_state, domains)
+
+
+def test_prune_irrelevant(sas_model):
+    initial_state, goal_state, nd_actions, variables, _ = sas_model
+    kept_actions, domains = prune_irrelevant(goal_state, nd_actions, get_domains(variables))
+
+    assert set(nd_actions).difference(kept_actions) == {"blow-whistle(l1)"}
+    # every other variable is in the precondition of an action changing a relevant one (e.g., armed() for charge(l1))
+    assert sorted(domains) == [0, 1, 2, 3, 4, 5, 6, 8, 9]
+
+
+@pytest.mark.parametrize(
+    "simplifications", [[], ["static"], ["reachability"], ["relevance"], ["static", "reachability", "relevance"]]
+)
+def test_minimal_controller_size(sas_model, simplifications, tmp_path):
+    initial_state, goal_state, nd_actions, variables, mutexs = sas_model
+    domains = None  # as in solve: no simplification, all variables and values
+    if simplifications:
+        nd_actions, domains = simplify(simplifications, initial_state, goal_state, nd_actions, variables)
+    instance_file = str(tmp_path / "instance.lp")
+    generate_asp_instance(instance_file, initial_state, goal_state, variables, mutexs, nd_actions, domains=domains)
+
+    assert is_solvable(instance_file, MIN_NUM_STATES)
+    assert not is_solvable(instance_file, MIN_NUM_STATES - 1)
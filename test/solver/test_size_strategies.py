@@ -0,0 +1,60 @@
+"""
+Tests of the controller size search strategies (SIZE_SEARCH_STRATEGIES in asp.py): the sizes they probe and the size
+they report, against an oracle where every size from a given minimal size on is SAT (sizes are monotone).
+
+    python -m pytest test/solver
+"""
+import pytest
+
+from cfondasp.solver.asp import ADAPTIVE_FAST_PROBE, SIZE_SEARCH_STRATEGIES, adaptive_sizes, galloping_sizes, linear_sizes
+
+
+def run_strategy(strategy, min_sat: int | None, probe_time: float = 0.0) -> tuple[list[int], int | None]:
+    """
+    Runs a size strategy to the end
+    :param strategy: size strategy (generator), already initialised
+    :param min_sat: minimal SAT size of the oracle (None: no size is SAT)
+    :param probe_time: time reported for each probe (in seconds)
+    :return: sizes probed, in order, and size reported
+    """
+    probes = []
+    try:
+        num_states = next(strategy)
+        while True:
+            probes.append(num_states)
+            num_states = strategy.send((min_sat is not None and num_states >= min_sat, probe_time))
+    except StopIteration as e:
+        return probes, e.value
+
+
+def test_linear_sizes():
+    assert run_strategy(linear_sizes(1, 10, 1), 4) == ([1, 2, 3, 4], 4)
+    assert run_strategy(linear_sizes(3, 10, 2), 4) == ([3, 5], 5)
+    assert run_strategy(linear_sizes(1, 5, 1), None) == ([1, 2, 3, 4, 5], None)
+
+
+def test_galloping_sizes():
+    # step doubles after every UNSAT size, then binary search of the gap between 8 (UNSAT) and 16 (SAT)
+    assert run_strategy(galloping_sizes(1, 100, 1), 11) == ([1, 2, 4, 8, 16, 12, 10, 11], 11)
+    # the last size probed is max_states
+    assert run_strategy(galloping_sizes(1, 10, 1), None) == ([1, 2, 4, 8, 10], None)
+
+
+def test_adaptive_sizes():
+    # fast UNSAT answers: the step doubles before each new size
+    assert run_strategy(adaptive_sizes(1, 100, 1), 11) == ([1, 3, 7, 15, 11, 9, 10], 11)
+    # slow UNSAT answers: the step stays at inc_states, as in a linear sweep
+    assert run_strategy(adaptive_sizes(1, 100, 1), 11, probe_time=ADAPTIVE_FAST_PROBE) == (list(range(1, 12)), 11)
+
+
+@pytest.mark.parametrize("name", sorted(SIZE_SEARCH_STRATEGIES))
+@pytest.mark.parametrize("min_sat", list(range(1, 41)) + [None])
+def test_strategies_report_minimal_size(name: str, min_sat: int | None):
+    probes, solution_size = run_strategy(SIZE_SEARCH_STRATEGIES[name](1, 40, 1), min_sat)
+    assert solution_size == min_sat
+    assert all(1 <= n <= 40 for n in probes)
+    assert len(probes) == len(set(probes)), "a size was probed twice"
+    if min_sat is not None:
+        # the size reported was probed SAT, and the one below it probed UNSAT (or is below min_states)
+        assert min_sat in probes
+        assert min_sat == 1 or min_sat - 1 in probes
@@ -0,0 +1,147 @@
+"""
+Microbenchmark of the logic operators (entails, consistent, update, progress, regress) on the states of SAS files,
+against the element-wise versions over lists of values (as they were before states packed their values).
+
+States are collected by random walks from the initial state (progressing random applicable actions), and every
+operator is checked to give the same results as the list version before timing it.
+
+    python test/state/bench_logic_operators.py output/output.sas [more SAS files...]
+
+The SAS files are those left in the output folder of planner runs (output.sas).
+"""
+import argparse
+import random
+import timeit
+
+from cfondasp.base.elements import Action, State
+from cfondasp.base.logic_operators import consistent, entails, progress, regress, update
+from cfondasp.utils.translators import parse_sas
+
+
+def list_entails(values_1: list, values_2: list) -> bool:
+    for i, v in enumerate(values_2):
+        if v >= 0 and values_1[i] != v:
+            return False
+    return True
+
+
+def list_consistent(values_1: list, values_2: list) -> bool:
+    for i, v in enumerate(values_1):
+        if not (v == values_2[i] or v == -1 or values_2[i] == -1):
+            return False
+    return True
+
+
+def list_update(values_1: list, values_2: list) -> list:
+    values_3 = values_1[:]
+    for i, v in enumerate(values_2):
+        if v >= 0:
+            values_3[i] = v
+    return values_3
+
+
+def list_progress(values: list, precondition: list, effect: list) -> list | None:
+    if list_consistent(values, precondition):
+        return list_update(list_update(values, precondition), effect)
+    return None
+
+
+def list_regress(values: list, precondition: list, effect: list) -> list | None:
+    if list_consistent(values, effect):
+        values_2 = values[:]
+        for i, v in enumerate(precondition):
+            if v >= 0:
+                values_2[i] = v
+            elif effect[i] == values[i]:
+                values_2[i] = -1
+        return values_2
+    return None
+
+
+def random_walks(initial_state: State, actions: list[Action], num_states: int, walk_length: int = 20) -> list[State]:
+    """
+    Collects states by random walks from the initial state
+    :param initial_state: Initial state
+    :param actions: deterministic actions
+    :param num_states: number of states to collect
+    :param walk_length: steps before restarting from the initial state
+    :return: states visited
+    """
+    states = []
+    state = initial_state
+    while len(states) < num_states:
+        states.append(state)
+        sample = random.sample(actions, min(len(actions), 200))
+        applicable = [a for a in sample if consistent(state, a.precondition_state())]
+        if not applicable or len(states) % walk_length == 0:
+            state = initial_state
+        else:
+            state = progress(state, random.choice(applicable), 0)
+    return states
+
+
+def bench(sas_file: str, num_states: int, repeat: int):
+    initial_state, goal_state, actions, variables, mutexs = parse_sas(sas_file)
+    states = random_walks(initial_state, actions, num_states)
+    pairs = [(random.choice(states), random.choice(actions)) for _ in range(num_states)]
+    partial = [goal_state] + [a.precondition_state() for a in actions[:num_states]]
+
+    lists = {id(s): list(s.values) for s in states + partial}
+    preconditions = {id(a): list(a.precondition_state().values) for _, a in pairs}
+    effects = {id(a): list(a.effect_state(0).values) for _, a in pairs}
+    cases = {  # operator: (packed version, list version, packed results as lists)
+        "entails": (
+            lambda: [entails(s, p) for s in states for p in partial[:10]],
+            lambda: [list_entails(lists[id(s)], lists[id(p)]) for s in states for p in partial[:10]],
+            None,
+        ),
+        "consistent": (
+            lambda: [consistent(s, a.precondition_state()) for s, a in pairs],
+            lambda: [list_consistent(lists[id(s)], preconditions[id(a)]) for s, a in pairs],
+            None,
+        ),
+        "update": (
+            lambda: [update(s, a.effect_state(0)) for s, a in pairs],
+            lambda: [list_update(lists[id(s)], effects[id(a)]) for s, a in pairs],
+            _values,
+        ),
+        "progress": (
+            lambda: [progress(s, a, 0) for s, a in pairs],
+            lambda: [list_progress(lists[id(s)], preconditions[id(a)], effects[id(a)]) for s, a in pairs],
+            _values,
+        ),
+        "regress": (
+            lambda: [regress(s, a, 0) for s, a in pairs],
+            lambda: [list_regress(lists[id(s)], preconditions[id(a)], effects[id(a)]) for s, a in pairs],
+            _values,
+        ),
+    }
+
+    print(f"{sas_file}: {len(variables)} variables, {len(actions)} actions, {len(states)} states")
+    for name, (packed_op, list_op, to_lists) in cases.items():
+        results = packed_op() if to_lists is None else [to_lists(r) for r in packed_op()]
+        assert results == list_op(), f"{name} differs from the list version"
+        packed_time = min(timeit.repeat(packed_op, number=1, repeat=repeat))
+        list_time = min(timeit.repeat(list_op, number=1, repeat=repeat))
+        print(f"  {name:<10} packed {packed_time * 1000:8.2f} ms   list {list_time * 1000:8.2f} ms   speed-up {list_time / packed_time:5.2f}x")
+
+
+def _values(state: State | None) -> list | None:
+    return list(state.values) if state is not None else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark of the logic operators on states of SAS files.")
+    parser.add_argument("sas_files", nargs="+", help="SAS files (e.g., output.sas of planner runs).")
+    parser.add_argument("--states", type=int, default=2000, help="Number of states (Default: %(default)s).")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions, best is kept (Default: %(default)s).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (Default: %(default)s).")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    for sas_file in args.sas_files:
+        bench(sas_file, args.states, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Tests of the logic operators on packed states (cfondasp/base/logic_operators.py) against the element-wise versions over
+lists of values of bench_logic_operators.py, on random partial states and actions.
+
+    python -m pytest test/state
+"""
+import random
+
+import pytest
+
+from bench_logic_operators import list_consistent, list_entails, list_progress, list_regress, list_update
+from cfondasp.base.elements import Action, State, Variable
+from cfondasp.base.logic_operators import consistent, entails, progress, regress, update
+
+
+def random_variables(num_variables: int, max_domain: int) -> list[Variable]:
+    return [Variable(f"var{i}", [f"value{j}" for j in range(random.randint(2, max_domain))]) for i in range(num_variables)]
+
+
+def random_values(variables: list[Variable], p_undefined: float) -> list[int]:
+    return [-1 if random.random() < p_undefined else random.randrange(len(var.domain)) for var in variables]
+
+
+def random_partial(variables: list[Variable], values: list[int], max_defined: int) -> list[int]:
+    """
+    Random partial values on a few variables, most of them agreeing with values (so that entails, consistent, progress
+    and regress are often true)
+    """
+    partial = [-1] * len(variables)
+    for i in random.sample(range(len(variables)), random.randint(0, min(max_defined, len(variables)))):
+        partial[i] = values[i] if values[i] != -1 and random.random() < 0.8 else random.randrange(len(variables[i].domain))
+    return partial
+
+
+def random_action(variables: list[Variable], values: list[int]) -> Action:
+    precondition = [(i, v) for i, v in enumerate(random_partial(variables, values, 3)) if v != -1]
+    effect = [(i, v) for i, v in enumerate(random_partial(variables, values, 3)) if v != -1]
+    return Action("a_detdup_1", "a", [], variables, precondition, [effect])
+
+
+@pytest.mark.parametrize("num_variables,max_domain", [(1, 2), (5, 3), (70, 4), (12, 1000)])
+def test_operators_match_lists(num_variables: int, max_domain: int):
+    random.seed(num_variables)
+    variables = random_variables(num_variables, max_domain)
+    for _ in range(300):
+        values_1 = random_values(variables, 0.3)
+        values_2 = random_partial(variables, values_1, 4)
+        state_1, state_2 = State(variables, values_1), State(variables, values_2)
+        action = random_action(variables, values_1)
+        precondition, effect = list(action.precondition_state().values), list(action.effect_state(0).values)
+
+        assert entails(state_1, state_2) == list_entails(values_1, values_2)
+        assert consistent(state_1, state_2) == list_consistent(values_1, values_2)
+        assert list(update(state_1, state_2).values) == list_update(values_1, values_2)
+        for operator, list_operator in [(progress, list_progress), (regress, list_regress)]:
+            result = operator(state_1, action, 0)
+            expected = list_operator(values_1, precondition, effect)
+            assert (list(result.values) if result is not None else None) == expected
+
+
+def test_operator_results_are_consistent():
+    variables = random_variables(3, 3)
+    state = State(variables, [0, -1, 2])
+    # results are packed from their fields: their values, equality and hash agree with a state built from them
+    result = update(state, State(variables, [-1, 1, -1]))
+    assert list(result.values) == [0, 1, 2]
+    assert result == State(variables, [0, 1, 2]) and hash(result) == hash(State(variables, [0, 1, 2]))
+    assert entails(result, state) and not entails(state, result)
+
+
+def test_state_equality_depends_on_length():
+    variables = random_variables(3, 3)
+    # -1 values are packed as undefined fields, like the ones past the end of a shorter state
+    short, long = State(variables[:2], [0, 1]), State(variables, [0, 1, -1])
+    assert short != long
+    assert len({short, long}) == 2
+    assert State(variables, [0, 1, -1]) == long and hash(State(variables, [0, 1, -1])) == hash(long)
@@ -0,0 +1,84 @@
+"""
+Tests of the symmetry breaking constraints (cfondasp/reason/symmetry.py) on a problem with 3 interchangeable keys to
+pick up, each pick possibly failing (strong cyclic): the constraints do not change the minimal controller size, and
+are written the same way whatever the hash seed of the Python run.
+
+    python -m pytest test/symmetry-breaking
+"""
+import os
+import subprocess
+import sys
+
+import clingo
+
+from cfondasp.base.elements import Action, State, Variable
+from cfondasp.reason.symmetry import create_symmetry_constraints
+from cfondasp.utils.helper_asp import add_instance, get_instance_facts
+from cfondasp.utils.system_utils import get_pkg_root
+
+KEYS = ["k1", "k2", "k3"]
+MAX_STATES = 6
+
+
+def keys_problem():
+    """
+    Picking up all the keys: pick(k) either gets key k or does nothing
+    :return: initial state, goal state, variables, mutexes and non-deterministic actions
+    """
+    variables = [Variable(f"var{i}", [f"Atom held({key})", f"NegatedAtom held({key})"]) for i, key in enumerate(KEYS)]
+    initial_state = State(variables, [1] * len(KEYS))
+    goal_state = State(variables, [0] * len(KEYS))
+
+    nd_actions = {}
+    for i, key in enumerate(KEYS):
+        nd_actions[f"pick({key})"] = []
+        for det_idx, effect in enumerate([[(i, 0)], []]):
+            action = Action(f"pick_DETDUP_{det_idx}", "pick", [key], variables, [(i, 1)], [effect])
+            action.generate_strips()
+            nd_actions[f"pick({key})"].append(action)
+    return initial_state, goal_state, variables, [], nd_actions
+
+
+def write_symmetry_constraints(file: str) -> int:
+    initial_state, goal_state, variables, mutexs, nd_actions = keys_problem()
+    return create_symmetry_constraints(initial_state, goal_state, nd_actions, variables, mutexs, file)
+
+
+def min_size(symmetry_file: str = None) -> int | None:
+    initial_state, goal_state, variables, mutexs, nd_actions = keys_problem()
+    facts, rules = get_instance_facts(initial_state, goal_state, variables, mutexs, nd_actions)
+    for num_states in range(1, MAX_STATES + 1):
+        ctl = clingo.Control(["--warn=none", "-c", f"numStates={num_states}"])
+        add_instance(ctl, facts, rules)
+        ctl.load(os.path.join(get_pkg_root(), "asp", "controller-fondsat.lp"))
+        if symmetry_file is not None:
+            ctl.load(symmetry_file)
+        ctl.ground([("base", [])])
+        if ctl.solve().satisfiable:
+            return num_states
+    return None
+
+
+def test_minimal_size_kept(tmp_path):
+    symmetry_file = str(tmp_path / "symmetry.lp")
+    # k1 <-> k2 and k1 <-> k3
+    assert write_symmetry_constraints(symmetry_file) == 2
+
+    size = min_size()
+    assert size == len(KEYS)
+    assert min_size(symmetry_file) == size
+
+
+def test_same_constraints_across_runs(tmp_path):
+    contents = set()
+    for seed in ["1", "2", "3", "4"]:
+        symmetry_file = str(tmp_path / f"symmetry_{seed}.lp")
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        subprocess.run([sys.executable, __file__, symmetry_file], env=env, check=True, capture_output=True)
+        with open(symmetry_file) as f:
+            contents.add(f.read())
+    assert len(contents) == 1
+
+
+if __name__ == "__main__":
+    write_symmetry_constraints(sys.argv[1])
@@ -0,0 +1,71 @@
+"""
+Benchmark of the SAS translation of many problems of a domain, with a new translator process per problem (the
+default) and with the persistent translator worker (--translator-worker, see translator_worker.py).
+
+The domain is determinized once (as the planner does), then each problem is translated both ways and the SAS files
+produced are checked to be the same.
+
+    python test/translator/bench_translator_worker.py benchmarks/blocksworld-ipc08/domain.pddl benchmarks/blocksworld-ipc08/p0*.pddl
+
+The translator is translate.py in the path, or the one given with --translator-path.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from cfondasp.base.config import DETERMINISTIC_ACTION_SUFFIX, FD_INV_LIMIT, TRANSLATOR_BIN
+from cfondasp.utils.translators import execute_determiniser, execute_sas_translator
+
+
+def translate_all(translate_path: str, domain: str, problems: list[str], output_dir: str, worker: bool) -> float:
+    """
+    Translates the problems one after the other, each in its own subfolder of the output folder
+    :param translate_path: path to translate.py
+    :param domain: all outcomes determinized domain
+    :param problems: problems to translate
+    :param output_dir: output folder
+    :param worker: use the translator worker
+    :return: time taken (in seconds)
+    """
+    translator_args = "{domain} {instance} --sas-file {sas_file}" + f" --invariant-generation-max-time {FD_INV_LIMIT}"
+    start = time.perf_counter()
+    for i, problem in enumerate(problems):
+        problem_dir = os.path.join(output_dir, str(i))
+        os.makedirs(problem_dir)
+        sas_file = os.path.join(problem_dir, "output.sas")
+        stats_file = os.path.join(problem_dir, "sas_stats.txt")
+        execute_sas_translator(translate_path, domain, problem, translator_args, problem_dir, sas_file, stats_file, worker=worker)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the translator worker against a process per problem.")
+    parser.add_argument("domain", help="FOND PDDL domain.")
+    parser.add_argument("problems", nargs="+", help="PDDL problems of the domain.")
+    parser.add_argument("--translator-path", default=TRANSLATOR_BIN, help="SAS translator (Default: %(default)s).")
+    args = parser.parse_args()
+    translate_path = os.path.abspath(shutil.which(args.translator_path))
+    problems = [os.path.abspath(p) for p in args.problems]
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        domain = os.path.join(output_dir, "domain_all_outcomes.pddl")
+        execute_determiniser(None, os.path.abspath(args.domain), domain, output_dir, DETERMINISTIC_ACTION_SUFFIX)
+
+        times = {}
+        for name, worker in [("process", False), ("worker", True)]:
+            times[name] = translate_all(translate_path, domain, problems, os.path.join(output_dir, name), worker)
+        for i, problem in enumerate(problems):
+            with open(os.path.join(output_dir, "process", str(i), "output.sas")) as f1:
+                with open(os.path.join(output_dir, "worker", str(i), "output.sas")) as f2:
+                    assert f1.read() == f2.read(), f"the SAS files of {problem} differ"
+
+    print(f"{len(problems)} problems, same SAS files")
+    for name, seconds in times.items():
+        print(f"  {name:<8} {seconds:8.2f} s   {seconds / len(problems):6.3f} s per problem")
+    print(f"  speed-up {times['process'] / times['worker']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark of the strong cyclic check of the verifier (one backward BFS from the goal, see
+SolutionSpace.nodes_not_reaching_goal) against the previous check, which computed all-pairs shortest paths (networkit
+APSP, quadratic memory) and then read the distances to the goal.
+
+Solution spaces are random graphs shaped like those explored by the verifier: every non-goal node has a few
+successors (the effects of its policy action), some of them back to earlier nodes (cycles), and the last node is the
+goal. Both checks are run on them, with and without a dead end, and checked to agree before timing them.
+
+    python test/verify/bench_strong_cyclic.py --nodes 1000 5000 10000
+"""
+import argparse
+import random
+import timeit
+
+import networkit as nk
+
+from cfondasp.checker.verify import SolutionSpace
+
+
+def apsp_is_strong_cyclic(solution_space: SolutionSpace, goal_node: int) -> bool:
+    """
+    The previous check: distances between all pairs of nodes, then those to the goal
+    """
+    graph = solution_space._graph
+    dg = nk.distance.APSP(graph)
+    max_nodes = graph.numberOfNodes()
+    dg.run()
+    target_node = solution_space._controller_nodes[goal_node]
+    for node in graph.iterNodes():
+        if dg.getDistance(node, target_node) > max_nodes:
+            return False
+    return True
+
+
+def random_solution_space(num_nodes: int, dead_end: bool, max_effects: int = 3) -> SolutionSpace:
+    """
+    Random solution space, node i being controller node i and the last node the goal
+    :param num_nodes: number of nodes
+    :param dead_end: make a node (and the nodes only reaching it) unable to reach the goal
+    :param max_effects: maximum number of successors of a node
+    :return: solution space (only its graph and controller nodes are set)
+    """
+    solution_space = object.__new__(SolutionSpace)
+    solution_space._graph = nk.Graph(num_nodes, directed=True)
+    solution_space._controller_nodes = {i: i for i in range(num_nodes)}
+    goal = num_nodes - 1
+    for node in range(goal):
+        # one successor forward, so every node can reach the goal, and some anywhere
+        solution_space._graph.addEdge(node, random.randint(node + 1, goal))
+        for _ in range(random.randint(0, max_effects - 1)):
+            solution_space._graph.addEdge(node, random.randint(0, goal))
+    if dead_end:
+        # a node looping onto itself
+        node = random.randint(0, goal - 1)
+        for next_node in list(solution_space._graph.iterNeighbors(node)):
+            solution_space._graph.removeEdge(node, next_node)
+        solution_space._graph.addEdge(node, node)
+    return solution_space
+
+
+def bench(num_nodes: int, repeat: int):
+    print(f"{num_nodes} nodes")
+    for dead_end in [False, True]:
+        solution_space = random_solution_space(num_nodes, dead_end)
+        goal = num_nodes - 1
+        assert solution_space.is_strong_cyclic(goal) == apsp_is_strong_cyclic(solution_space, goal) == (not dead_end)
+        for name, check in [("bfs", solution_space.is_strong_cyclic), ("apsp", lambda g: apsp_is_strong_cyclic(solution_space, g))]:
+            seconds = min(timeit.repeat(lambda: check(goal), number=1, repeat=repeat))
+            print(f"  {'dead end' if dead_end else 'sound':<9} {name:<5} {seconds:10.4f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the strong cyclic check against the APSP one.")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1000, 5000], help="Solution space sizes (Default: %(default)s).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions, best is kept (Default: %(default)s).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (Default: %(default)s).")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    for num_nodes in args.nodes:
+        bench(num_nodes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Tests of the clingo output deciding the result of a run (_get_last_output_file in verify.py) when a size search stops
+early, of the removal of the outputs of larger SAT sizes (keep_smallest_sat_output in asp_output.py), and of building
+the controller of a run without a solution.
+
+    python -m pytest test/verify
+"""
+from cfondasp.checker.verify import _get_last_output_file, _get_status, build_controller
+from cfondasp.utils.asp_output import keep_smallest_sat_output
+
+RESULTS = {
+    "SAT": "Solving...\nAnswer: 1\nholds(0,0,1)\nSATISFIABLE\n",
+    "UNSAT": "Solving...\nUNSATISFIABLE\n",
+    "TIMEOUT": "Solving...\n\nClingo run timed out\n",
+    "MEMOUT": "Solving...\n\nClingo run exceeded memory limit (100 MB)\n",
+}
+
+
+def write_outputs(output_dir, results: dict[int, str]):
+    for num_states, result in results.items():
+        (output_dir / f"clingo_out_{num_states}.out").write_text(RESULTS[result])
+
+
+def test_search_stopped_by_time_limit(tmp_path):
+    # galloping: 16 UNSAT, 32 SAT, 24 SAT, 20 UNSAT, 22 SAT, then the time limit at 21
+    write_outputs(tmp_path, {16: "UNSAT", 32: "SAT", 24: "SAT", 20: "UNSAT", 22: "SAT", 21: "TIMEOUT"})
+    # the smallest controller found decides, not the largest size tried
+    assert _get_last_output_file(str(tmp_path)) == "clingo_out_22.out"
+
+    assert keep_smallest_sat_output(str(tmp_path), [32, 24, 22]) == 22
+    assert sorted(f.name for f in tmp_path.iterdir()) == [
+        "clingo_out_16.out", "clingo_out_20.out", "clingo_out_21.out", "clingo_out_22.out"
+    ]
+    assert _get_last_output_file(str(tmp_path)) == "clingo_out_22.out"
+    assert keep_smallest_sat_output(str(tmp_path), []) is None
+
+
+def test_no_solution(tmp_path):
+    assert _get_last_output_file(str(tmp_path)) is None
+    write_outputs(tmp_path, {1: "UNSAT", 2: "UNSAT", 10: "TIMEOUT"})
+    assert _get_last_output_file(str(tmp_path)) == "clingo_out_10.out"
+    assert _get_status(str(tmp_path / "clingo_out_10.out")) == "TIMEOUT"
+
+
+def test_no_controller_without_solution(tmp_path):
+    for result in ["UNSAT", "TIMEOUT", "MEMOUT"]:
+        write_outputs(tmp_path, {1: "UNSAT", 2: result})
+        assert _get_status(str(tmp_path / "clingo_out_2.out")) == {"UNSAT": "UNSOLVED"}.get(result, result)
+        assert build_controller(str(tmp_path)) == (None, None, None)
@@ -0,0 +1,73 @@
+"""
+Tests of the strong cyclic and strong checks of the verifier (SolutionSpace.nodes_not_reaching_goal, is_acyclic) on
+small solution spaces, and against the all-pairs shortest paths check of bench_strong_cyclic.py on random ones.
+
+    python -m pytest test/verify
+"""
+import random
+
+import networkit as nk
+import pytest
+
+from bench_strong_cyclic import apsp_is_strong_cyclic, random_solution_space
+from cfondasp.checker.verify import SolutionSpace
+
+
+def solution_space(num_nodes: int, edges: list[tuple[int, int]], controller_nodes: dict[int, int] = None) -> SolutionSpace:
+    """
+    Solution space with the given graph (only its graph and controller nodes are set)
+    :param num_nodes: number of nodes
+    :param edges: edges (node, next node)
+    :param controller_nodes: controller node -> node (Default: node i is controller node i)
+    :return: solution space
+    """
+    space = object.__new__(SolutionSpace)
+    space._graph = nk.Graph(num_nodes, directed=True)
+    for node, next_node in edges:
+        space._graph.addEdge(node, next_node)
+    space._controller_nodes = controller_nodes if controller_nodes is not None else {i: i for i in range(num_nodes)}
+    return space
+
+
+def test_chain():
+    space = solution_space(3, [(0, 1), (1, 2)])
+    assert space.nodes_not_reaching_goal(2) == []
+    assert space.is_strong_cyclic(2) and space.is_acyclic() and space.is_strong(2)
+    # the goal is controller node 2, node 0 cannot reach controller node 0 again
+    assert space.nodes_not_reaching_goal(0) == [1, 2]
+
+
+def test_cycles():
+    # 0 -> 1 -> 0 (retry) and 1 -> 2 (goal), with a multi-edge: strong cyclic but not strong
+    space = solution_space(3, [(0, 1), (1, 0), (1, 2), (1, 2)])
+    assert space.is_strong_cyclic(2) and not space.is_acyclic() and not space.is_strong(2)
+    # a self-loop is a cycle too
+    space = solution_space(3, [(0, 1), (1, 1), (1, 2)])
+    assert space.is_strong_cyclic(2) and not space.is_acyclic()
+
+
+def test_dead_ends():
+    # 3 only loops onto itself, and 4 only reaches 3
+    space = solution_space(5, [(0, 1), (0, 4), (1, 2), (3, 3), (4, 3)])
+    assert space.nodes_not_reaching_goal(2) == [3, 4]
+    assert not space.is_strong_cyclic(2) and not space.is_strong(2)
+    # a goal never reached by the controller: no node reaches it
+    space = solution_space(3, [(0, 1), (1, 0)], controller_nodes={0: 0, 1: 1})
+    assert space.nodes_not_reaching_goal(2) == [0, 1]
+    assert not space.is_strong_cyclic(2)
+
+
+def test_controller_nodes():
+    # controller nodes are reported, not graph nodes, and the goal is found through them
+    space = solution_space(3, [(2, 0), (0, 1)], controller_nodes={10: 2, 11: 0, 12: 1})
+    assert space.is_strong_cyclic(12) and space.is_strong(12)
+    assert space.nodes_not_reaching_goal(11) == [12]
+
+
+@pytest.mark.parametrize("dead_end", [False, True])
+def test_matches_apsp(dead_end: bool):
+    random.seed(dead_end)
+    for num_nodes in [2, 5, 20, 100]:
+        space = random_solution_space(num_nodes, dead_end)
+        goal = num_nodes - 1
+        assert space.is_strong_cyclic(goal) == apsp_is_strong_cyclic(space, goal) == (not dead_end)